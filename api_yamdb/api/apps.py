@@ -1,6 +1,35 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from api.authentication import forget_user
+        from api.cache import invalidate_instance
+        from api.timing import install_query_timer
+        from reviews.models import Category, Comment, Genre, Review, Title
+        from users.models import User
+
+        def forget(sender, instance, **kwargs):
+            forget_user(instance.pk)
+
+        post_save.connect(forget, sender=User, weak=False,
+                          dispatch_uid='api.forget_saved_user')
+        post_delete.connect(forget, sender=User, weak=False,
+                            dispatch_uid='api.forget_deleted_user')
+
+        for model in (Title, Category, Genre, Review, Comment):
+            label = model._meta.label_lower
+            post_save.connect(invalidate_instance, sender=model,
+                              dispatch_uid=f'api.invalidate_saved_{label}')
+            post_delete.connect(
+                invalidate_instance, sender=model,
+                dispatch_uid=f'api.invalidate_deleted_{label}')
+        if settings.PERF_TIMING:
+            connection_created.connect(install_query_timer,
+                                       dispatch_uid='api.query_timer')
@@ -0,0 +1,61 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.routers import DefaultRouter
+
+
+def _render(view):
+    @wraps(view)
+    def run(request, *args, **kwargs):
+        try:
+            response = view(request, *args, **kwargs)
+            if not getattr(response, 'is_rendered', True):
+                response.render()
+            return response
+        finally:
+            # В потоках пула нет request_finished: закрываем соединения
+            # с базой по тем же правилам (CONN_MAX_AGE), что и в WSGI.
+            close_old_connections()
+    return run
+
+
+def async_read_view(view):
+    """
+    Асинхронная обёртка над синхронным DRF view для работы под ASGI.
+
+    Под ASGI Django выполняет синхронные view в одном общем потоке, и
+    запрос, ждущий базу, задерживает все остальные. Здесь чтение (GET,
+    HEAD, OPTIONS) выполняется в пуле потоков вместе с рендерингом ответа,
+    а запись остаётся в общем потоке, как у обычного синхронного view.
+
+    Асинхронного ORM в Django 3.2 нет, поэтому запросы к базе остаются
+    синхронными, но ждут параллельно в разных потоках.
+    """
+    read = sync_to_async(_render(view), thread_sensitive=False)
+    write = sync_to_async(view, thread_sensitive=True)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        handler = read if request.method in SAFE_METHODS else write
+        return await handler(request, *args, **kwargs)
+
+    return async_view
+
+
+class AsyncReadRouter(DefaultRouter):
+    """DefaultRouter, view которого при ``async_reads`` - async_read_view."""
+
+    def __init__(self, *args, async_reads=False, **kwargs):
+        self.async_reads = async_reads
+        super().__init__(*args, **kwargs)
+
+    def get_urls(self):
+        urls = super().get_urls()
+        if not self.async_reads:
+            return urls
+        for url in urls:
+            if getattr(url.callback, 'cls', None) is not None:
+                url.callback = async_read_view(url.callback)
+        return urls
@@ -0,0 +1,97 @@
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+# Поля пользователя, которые передаются в токене и по которым
+# работают права доступа.
+CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+CHECKED_USERS_LIMIT = 10000
+
+# user_id -> (момент истечения проверки, значения CLAIMS или None).
+_checked = {}
+
+
+class RoleAccessToken(AccessToken):
+    """Токен доступа с ролью пользователя в полезной нагрузке."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+def forget_user(user_id):
+    """Сбрасывает проверку пользователя в этом процессе."""
+    _checked.pop(user_id, None)
+
+
+def forget_all_users():
+    _checked.clear()
+
+
+def actual_claims(user_id):
+    """
+    Текущие значения CLAIMS пользователя или None, если он удалён
+    или заблокирован.
+
+    Результат запоминается в процессе на AUTH_CLAIMS_CHECK_TTL секунд,
+    поэтому база проверяется не чаще раза в TTL на пользователя.
+    """
+    now = time.monotonic()
+    entry = _checked.get(user_id)
+    if entry is None or entry[0] <= now:
+        claims = User.objects.filter(
+            pk=user_id, is_active=True).values_list(*CLAIMS).first()
+        if len(_checked) >= CHECKED_USERS_LIMIT:
+            _checked.clear()
+        entry = (now + settings.AUTH_CLAIMS_CHECK_TTL, claims)
+        _checked[user_id] = entry
+    return entry[1]
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без чтения пользователя из базы на каждый запрос.
+
+    Пользователь собирается из полей токена, выданного RoleAccessToken.
+    Токен отклоняется, если пользователь удалён, заблокирован или его
+    роль изменилась после выдачи; изменения, сделанные в другом процессе,
+    становятся видны в пределах AUTH_CLAIMS_CHECK_TTL. Токены без роли
+    обрабатываются как раньше, с чтением пользователя из базы.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        claims = tuple(validated_token[claim] for claim in CLAIMS)
+        if actual_claims(user_id) != claims:
+            raise AuthenticationFailed(
+                'Токен отозван: получите новый токен.',
+                code='token_revoked',
+            )
+        user = User(pk=user_id, **dict(zip(CLAIMS, claims)))
+        user._state.adding = False
+        return user
+
+
+def token_user_id(request):
+    """Пользователь из JWT в заголовке запроса без чтения базы или None."""
+    authentication = RoleJWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except AuthenticationFailed:
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
@@ -0,0 +1,159 @@
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import time_ns
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'api:version:{}'
+RESPONSE_KEY = 'api:response:{}'
+STATS_KEY = 'api:stats:{}'
+# Версия, общая для всех ресурсов: её сдвигают команды, которые пишут
+# в базу пачками в обход моделей (load_data, generate_dataset,
+# recount_counters).
+ALL_RESOURCES = '*'
+# Ресурсы моделей без родителя в URL, см. instance_resources().
+MODEL_RESOURCES = {
+    'title': ('titles',),
+    'category': ('categories',),
+    'genre': ('genres',),
+}
+
+# Версии, которые вызывающий код сдвигает сам, см. invalidated_by_caller().
+_invalidated_by_caller = ContextVar('cache_invalidated_by_caller',
+                                    default=False)
+
+# Бэкенды, которые видит только текущий процесс.
+LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def is_shared():
+    """
+    Общий ли кэш у процессов: версии ресурсов, ответы, счётчики и метки
+    чтения из основной базы должны быть одни для всех воркеров,
+    purge_hidden и команд.
+    """
+    return settings.CACHES['default']['BACKEND'] not in LOCAL_BACKENDS
+
+
+def get_versions(*resources):
+    """
+    Текущие версии ресурсов и общая версия ALL_RESOURCES.
+
+    Версия - время последнего изменения в наносекундах, поэтому после
+    вытеснения ключа из кэша новая версия всегда больше старой и
+    устаревшие ответы не могут совпасть с новым ключом. Ключи версий
+    живут API_CACHE_TIMEOUT: изменения, которые версии не сдвигают
+    (update() в обход моделей), попадают в ETag не позже этого срока.
+    """
+    keys = [VERSION_KEY.format(resource)
+            for resource in (*resources, ALL_RESOURCES)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = time_ns()
+            cache.add(key, version, timeout=settings.API_CACHE_TIMEOUT)
+            versions[key] = cache.get(key, version)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*resources):
+    now = time_ns()
+    cache.set_many(
+        {VERSION_KEY.format(resource): now for resource in resources},
+        timeout=settings.API_CACHE_TIMEOUT,
+    )
+
+
+def bump_all_versions():
+    """Сбрасывает версии и кэш ответов всех ресурсов сразу."""
+    bump_versions(ALL_RESOURCES)
+
+
+def instance_resources(instance):
+    """
+    Ресурсы, в ответах которых есть instance: их версии сдвигаются
+    при save() и delete() из любого места, в том числе из админки.
+    Счётчики и рейтинг в обход API не меняются, поэтому родительские
+    ресурсы здесь не нужны.
+    """
+    name = instance._meta.model_name
+    if name == 'review':
+        return (f'reviews:{instance.title_id}',)
+    if name == 'comment':
+        return (f'comments:{instance.review_id}',)
+    return MODEL_RESOURCES[name]
+
+
+@contextmanager
+def invalidated_by_caller():
+    """
+    Версии ресурсов, изменённых внутри блока, вызывающий код сдвигает
+    сам, один раз на запрос или пачку, а не обработчик сигналов по
+    строке на объект.
+    """
+    token = _invalidated_by_caller.set(True)
+    try:
+        yield
+    finally:
+        _invalidated_by_caller.reset(token)
+
+
+def invalidate_instance(sender, instance, using, **kwargs):
+    """
+    Обработчик post_save/post_delete для записей из админки, shell и
+    команд через save()/delete().
+    """
+    if _invalidated_by_caller.get():
+        return
+    resources = instance_resources(instance)
+    transaction.on_commit(lambda: bump_versions(*resources), using=using)
+
+
+def _digest(request, versions, *extra):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    raw = ':'.join(map(str, (*versions, *extra, request.path, query)))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def response_key(request, versions):
+    return RESPONSE_KEY.format(_digest(request, versions))
+
+
+def make_etag(request, versions):
+    """Сильный ETag ответа: версии ресурсов, запрос и формат ответа."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    media_type = renderer.media_type if renderer else ''
+    return f'"{_digest(request, versions, media_type)}"'
+
+
+def get_response_data(key):
+    data = cache.get(key)
+    count_event('hits' if data is not None else 'misses')
+    return data
+
+
+def set_response_data(key, data):
+    cache.set(key, data, timeout=settings.API_CACHE_TIMEOUT)
+
+
+def count_event(name):
+    key = STATS_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кэша ответов."""
+    names = ('hits', 'misses')
+    values = cache.get_many([STATS_KEY.format(name) for name in names])
+    return {name: values.get(STATS_KEY.format(name), 0) for name in names}
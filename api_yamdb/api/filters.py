@@ -1,6 +1,9 @@
 import django_filters
+from django.db.models import Subquery
+from rest_framework import filters
 
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+from reviews.search import search_titles
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -8,10 +11,45 @@ class TitleFilter(django_filters.FilterSet):
         field_name='name',
         lookup_expr='icontains'
     )
-    category = django_filters.CharFilter(field_name='category__slug',)
-    genre = django_filters.CharFilter(field_name='genre__slug',)
+    category = django_filters.CharFilter(method='filter_category')
+    genre = django_filters.CharFilter(method='filter_genre')
     year = django_filters.CharFilter(field_name='year')
+    rating_min = django_filters.NumberFilter(
+        field_name='rating',
+        lookup_expr='gte'
+    )
+    rating_max = django_filters.NumberFilter(
+        field_name='rating',
+        lookup_expr='lte'
+    )
+    search = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('name', 'category', 'genre', 'year',)
+        fields = (
+            'name', 'category', 'genre', 'year', 'rating_min', 'rating_max',
+            'search',
+        )
+
+    # id по slug - подзапросом, а не соединением: тогда PostgreSQL ищет
+    # по title_category_name_idx и genre_title_idx со сравнением на
+    # равенство и не сортирует результат заново.
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(category=Subquery(
+            Category.objects.filter(slug=value).order_by().values('id')[:1]))
+
+    def filter_genre(self, queryset, name, value):
+        return queryset.filter(genre=Subquery(
+            Genre.objects.filter(slug=value).order_by().values('id')[:1]))
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class TitleOrderingFilter(filters.OrderingFilter):
+    """Без явного ?ordering результаты поиска идут по релевантности."""
+
+    def get_default_ordering(self, view):
+        if view.request.query_params.get('search', '').strip():
+            return ('-search_rank', 'name')
+        return super().get_default_ordering(view)
@@ -0,0 +1,80 @@
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import (ENCODERS, RESOURCES, ExportFilterError, export,
+                        filter_titles)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгрузка произведений, отзывов или комментариев в JSON Lines '
+        'или CSV, как /api/v1/export/: строки читаются пачками.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=tuple(RESOURCES))
+        parser.add_argument(
+            '--format',
+            dest='file_format',
+            choices=tuple(ENCODERS),
+            default='jsonl',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Сжимать выгрузку gzip.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки, по умолчанию - стандартный вывод.',
+        )
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='NAME=VALUE',
+            help='Фильтр произведений, как в /titles/ '
+                 '(--filter category=movie --filter year=1994).',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.EXPORT_CHUNK_SIZE,
+            help='Сколько строк читать одним запросом.',
+        )
+
+    def parse_filters(self, filters):
+        params = {}
+        for item in filters:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Filter must be NAME=VALUE: {item}')
+            params[name] = value
+        return params
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        try:
+            titles = filter_titles(self.parse_filters(options['filter']))
+        except ExportFilterError as error:
+            raise CommandError(f'Invalid filters: {dict(error.errors)}')
+        parts = export(options['resource'], options['file_format'], titles,
+                       compress=options['gzip'],
+                       chunk_size=options['chunk_size'])
+        if options['output'] is None:
+            self.write(parts, sys.stdout.buffer)
+            return
+        with open(options['output'], 'wb') as output:
+            written = self.write(parts, output)
+        self.stderr.write(f'{written} bytes written to {options["output"]}')
+
+    def write(self, parts, output):
+        written = 0
+        for part in parts:
+            output.write(part)
+            written += len(part)
+        output.flush()
+        return written
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import is_shared
+from api.purge import STEPS, prune_tombstones, purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаление скрытых через API произведений и пользователей: '
+        'зависимые записи удаляются пачками, каждая в своей транзакции. '
+        'Заодно удаляются устаревшие записи ленты удалений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help='Сколько строк удалять в одной транзакции.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда удалять нечего.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Удалить скрытые сейчас объекты и завершиться.',
+        )
+
+    def purge_hidden(self, batch_size):
+        purged = 0
+        for model in STEPS:
+            for pk in model.objects.filter(hidden=True).values_list(
+                    'pk', flat=True):
+                instance = model.objects.filter(pk=pk).first()
+                if instance is None:
+                    # Удалён между выборкой id и purge, например в запросе.
+                    continue
+                started = time.monotonic()
+                purge(instance, batch_size=batch_size)
+                purged += 1
+                self.stdout.write(
+                    f'Purged {model._meta.label} {pk} '
+                    f'in {time.monotonic() - started:.2f}s'
+                )
+        return purged
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        if not is_shared():
+            # Версии ресурсов сдвигаются в кэше этого процесса, воркеры
+            # API их не увидят.
+            self.stderr.write(
+                'Warning: the cache is local to this process, API workers '
+                'will serve stale responses after purges. Set CACHE_BACKEND '
+                'to a shared cache.'
+            )
+        while True:
+            purged = self.purge_hidden(options['batch_size'])
+            prune_tombstones(options['batch_size'])
+            if options['once']:
+                break
+            if not purged:
+                time.sleep(options['interval'])
@@ -0,0 +1,151 @@
+"""
+Метрики API в формате Prometheus: GET /metrics.
+
+Запросы считаются по имени маршрута из api/urls.py (``titles-list``,
+``reviews-detail``, ``token``...), методу и статусу; задержка - гистограмма
+по маршруту; запросы к базе - по маршруту. Попадания в кэш ответов берутся
+из общих счётчиков api.cache при каждом опросе, состояние пулов соединений
+(DB_POOL_SIZE) - из pool_stats() процесса, который отвечает на опрос,
+с меткой pid.
+
+Несколько процессов (воркеры gunicorn): при заданной переменной окружения
+PROMETHEUS_MULTIPROC_DIR prometheus_client пишет значения каждого процесса
+в свой файл в этом каталоге, а /metrics суммирует файлы всех процессов.
+Каталог очищается при старте gunicorn (gunicorn.conf.py).
+"""
+import hmac
+import os
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (CONTENT_TYPE_LATEST, CollectorRegistry, Counter,
+                               Histogram, generate_latest, multiprocess)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from api_yamdb.db.base import pool_stats
+
+from .cache import get_stats
+
+REGISTRY = CollectorRegistry()
+
+REQUESTS = Counter(
+    'yamdb_http_requests', 'HTTP-запросы по маршрутам и статусам.',
+    ('view', 'method', 'status'), registry=REGISTRY,
+)
+LATENCY = Histogram(
+    'yamdb_http_request_duration_seconds', 'Время обработки запроса.',
+    ('view',), registry=REGISTRY,
+)
+DB_QUERIES = Counter(
+    'yamdb_db_queries', 'Запросы к базе по маршрутам.',
+    ('view',), registry=REGISTRY,
+)
+DB_TIME = Counter(
+    'yamdb_db_query_seconds', 'Время запросов к базе по маршрутам.',
+    ('view',), registry=REGISTRY,
+)
+
+# Дочерние метрики по значениям меток: labels() берёт блокировку метрики,
+# а чтение словаря - нет.
+_children = {}
+
+
+class ResponseCacheCollector:
+    """Попадания и промахи кэша ответов (общие для всех процессов)."""
+
+    def collect(self):
+        family = CounterMetricFamily(
+            'yamdb_response_cache_requests',
+            'Обращения к кэшу ответов API.', labels=('result',))
+        for name, value in get_stats().items():
+            family.add_metric((name,), value)
+        yield family
+
+
+class ConnectionPoolCollector:
+    """Пулы соединений с базой текущего процесса по алиасам баз."""
+    gauges = {
+        'max_size': 'Наибольшее число соединений пула.',
+        'size': 'Открытые соединения пула.',
+        'idle': 'Свободные соединения пула.',
+        'in_use': 'Выданные соединения пула.',
+    }
+    counters = {
+        'checkouts': 'Выдачи соединений из пула.',
+        'connects': 'Новые соединения пула.',
+        'waits': 'Ожидания свободного соединения.',
+        'timeouts': 'Отказы: нет свободного соединения за DB_POOL_TIMEOUT.',
+        'discarded': 'Закрытые пулом соединения.',
+        'wait_seconds': 'Время ожидания свободного соединения.',
+        'checkout_seconds': 'Время выдачи соединений.',
+    }
+
+    def collect(self):
+        stats = pool_stats()
+        pid = str(os.getpid())
+        for names, family_class in ((self.gauges, GaugeMetricFamily),
+                                    (self.counters, CounterMetricFamily)):
+            for name, documentation in names.items():
+                family = family_class(f'yamdb_db_pool_{name}', documentation,
+                                      labels=('database', 'pid'))
+                for alias, values in stats.items():
+                    family.add_metric((alias, pid), values[name])
+                yield family
+
+
+REGISTRY.register(ResponseCacheCollector())
+REGISTRY.register(ConnectionPoolCollector())
+
+
+def view_name(request):
+    """Метка маршрута: имя URL API или пространство имён остальных."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    if match.namespace == 'api':
+        return match.url_name
+    return match.namespace or match.url_name or 'other'
+
+
+def child(metric, *labels):
+    key = (metric, labels)
+    if key not in _children:
+        _children[key] = metric.labels(*labels)
+    return _children[key]
+
+
+def observe(view, method, status, duration, queries, db_time):
+    child(REQUESTS, view, method, str(status)).inc()
+    child(LATENCY, view).observe(duration)
+    if queries:
+        child(DB_QUERIES, view).inc(queries)
+        child(DB_TIME, view).inc(db_time)
+
+
+def observe_request(request, response, measured):
+    observe(view_name(request), request.method, response.status_code,
+            measured.total, measured.queries, measured.db)
+
+
+def scrape_registry():
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(ResponseCacheCollector())
+    registry.register(ConnectionPoolCollector())
+    return registry
+
+
+def metrics_view(request):
+    """
+    Метрики для Prometheus по Bearer-токену METRICS_TOKEN; без токена
+    в настройках эндпоинт закрыт.
+    """
+    # compare_digest принимает строки только из ASCII, заголовок - любой.
+    if not settings.METRICS_TOKEN or not hmac.compare_digest(
+            request.headers.get('Authorization', '').encode(),
+            f'Bearer {settings.METRICS_TOKEN}'.encode()):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(scrape_registry()),
+                        content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,136 @@
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+
+from api_yamdb.db.router import (is_pinned, pin_to_primary, reset_routing,
+                                 route_reads)
+
+from . import metrics, timing
+from .authentication import token_user_id
+from .cache import is_shared
+
+logger = logging.getLogger(__name__)
+
+
+def reads_from_replica(request):
+    if request.method not in SAFE_METHODS:
+        return False
+    user_id = token_user_id(request)
+    return user_id is None or not is_pinned(user_id)
+
+
+def pin_writer(request):
+    if request.method in SAFE_METHODS:
+        return
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        pin_to_primary(user.pk)
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    Чтение безопасных запросов с реплик, см. api_yamdb.db.router.
+
+    После записи пользователь DB_REPLICA_PIN_SECONDS секунд читает из
+    основной базы, чтобы видеть свои изменения. Без DB_REPLICAS
+    middleware отключается. Метки записи и версии ресурсов должны быть
+    видны всем процессам, поэтому реплики требуют общего кэша.
+    """
+    if not settings.DATABASE_REPLICAS:
+        raise MiddlewareNotUsed
+    if not is_shared():
+        raise ImproperlyConfigured(
+            'DB_REPLICAS requires a shared cache (CACHE_BACKEND): with a '
+            'process-local cache other workers would read stale data from '
+            'replicas after a write.'
+        )
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            replica = await sync_to_async(reads_from_replica)(request)
+            token = route_reads(replica)
+            try:
+                response = await get_response(request)
+            finally:
+                reset_routing(token)
+            await sync_to_async(pin_writer)(request)
+            return response
+    else:
+        def middleware(request):
+            token = route_reads(reads_from_replica(request))
+            try:
+                response = get_response(request)
+            finally:
+                reset_routing(token)
+            pin_writer(request)
+            return response
+
+    return middleware
+
+
+def loaded_user(request):
+    """
+    Пользователь запроса, если его уже загрузили аутентификация DRF или
+    view. Ленивый пользователь сессии не загружается: это лишний запрос,
+    а в асинхронной ветке - SynchronousOnlyOperation.
+    """
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+def report_timing(request, response, measured):
+    if getattr(loaded_user(request), 'is_admin', False):
+        response['Server-Timing'] = measured.server_timing()
+    if measured.total * 1000 >= settings.PERF_SLOW_REQUEST_MS:
+        logger.warning(
+            'Slow request %s %s: %s, %.1f ms, %d queries in %.1f ms, '
+            'slowest query %.1f ms: %.1000s',
+            request.method, request.get_full_path(), response.status_code,
+            measured.total * 1000, measured.queries, measured.db * 1000,
+            measured.slowest * 1000, measured.slowest_sql,
+        )
+    if settings.METRICS_ENABLED:
+        metrics.observe_request(request, response, measured)
+
+
+@sync_and_async_middleware
+def performance_middleware(get_response):
+    """
+    Замеры времени запроса (api/timing.py): число и время запросов к базе,
+    проверки доступа, рендеринг. Администраторы получают их в заголовке
+    Server-Timing, запросы дольше PERF_SLOW_REQUEST_MS пишутся в лог
+    вместе с самым долгим SQL, метрики для /metrics записываются в
+    api/metrics.py. PERF_TIMING=0 отключает middleware.
+    """
+    if not settings.PERF_TIMING:
+        raise MiddlewareNotUsed
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = timing.start()
+            try:
+                response = await get_response(request)
+            finally:
+                measured = timing.stop(token)
+            report_timing(request, response, measured)
+            return response
+    else:
+        def middleware(request):
+            token = timing.start()
+            try:
+                response = get_response(request)
+            finally:
+                measured = timing.stop(token)
+            report_timing(request, response, measured)
+            return response
+
+    return middleware
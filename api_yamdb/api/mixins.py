@@ -1,9 +1,404 @@
 import re
+from time import time_ns
 
-from rest_framework import mixins, viewsets, filters, serializers
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from rest_framework import (mixins, viewsets, filters, serializers,
+                            status)
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+from api_yamdb.db.router import use_primary
+from reviews.changes import (PARENT_FIELDS, RESOURCES, feed_start,
+                             retention_start)
+from reviews.models import Tombstone
+
+from .cache import (bump_versions, get_response_data, get_versions,
+                    invalidated_by_caller, make_etag, response_key,
+                    set_response_data)
+from .permissions import IsAdmin
+from .timing import phase
+
+
+class TimedInitialMixin:
+    """Аутентификация, права и троттлинг view - этап auth в Server-Timing."""
+
+    def initial(self, request, *args, **kwargs):
+        with phase('auth'):
+            super().initial(request, *args, **kwargs)
+
+
+class InvalidateCacheMixin:
+    """
+    Сдвигает версии ресурсов в кэше после успешной записи. Версии
+    сдвигает сам view, поэтому обработчики сигналов моделей на время
+    запроса отключены.
+    """
+    cache_invalidates = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        with invalidated_by_caller():
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_cache_invalidates(self):
+        return self.cache_invalidates
+
+    def invalidate_cache(self):
+        resources = self.get_cache_invalidates()
+        transaction.on_commit(lambda: bump_versions(*resources))
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.invalidate_cache()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.invalidate_cache()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.invalidate_cache()
+
+
+class VersionedReadMixin(InvalidateCacheMixin):
+    """
+    Условные GET-запросы и кэш ответов на чтение по версиям ресурсов.
+
+    ETag и Last-Modified вычисляются из версий ``get_cache_resources()``
+    до вызова сериализатора, поэтому If-None-Match/If-Modified-Since
+    отвечают 304 без обращения к базе. При ``cache_responses`` ответы
+    анонимным пользователям дополнительно берутся из кэша: ключ строится
+    из пути, отсортированных параметров запроса и тех же версий.
+    """
+    cache_resource = None
+    cache_dependencies = ()
+    cache_responses = False
+
+    def get_cache_resources(self):
+        return (self.cache_resource, *self.cache_dependencies)
+
+    def get_cache_invalidates(self):
+        return (self.cache_resource,)
+
+    def versioned_response(self, handler, request, *args, **kwargs):
+        versions = get_versions(*self.get_cache_resources())
+        changed = (time_ns() - max(versions)) / 10 ** 9
+        if changed < settings.DB_REPLICA_PIN_SECONDS:
+            # Реплики могут ещё не получить последнее изменение, а ответ
+            # с реплики попал бы в кэш и ETag новой версии.
+            use_primary()
+        etag = make_etag(request, versions)
+        last_modified = max(versions) // 10 ** 9
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        if self.cache_responses and not request.user.is_authenticated:
+            response = self.cached_response(
+                response_key(request, versions),
+                handler, request, *args, **kwargs
+            )
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def cached_response(self, key, handler, request, *args, **kwargs):
+        data = get_response_data(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_response_data(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.versioned_response(
+            super().list, request, *args, **kwargs)
+
+
+class VersionedDetailMixin(VersionedReadMixin):
+    """VersionedReadMixin для вьюсетов с чтением отдельного объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.versioned_response(
+            super().retrieve, request, *args, **kwargs)
+
+
+class NestedResourceMixin:
+    """
+    Вложенный ресурс, родитель которого проверяется без лишних запросов.
+
+    ``get_queryset()`` отбирает дочерние записи сразу по всей цепочке
+    идентификаторов из URL, поэтому отдельный запрос родителя нужен только
+    при создании записи и при пустой странице списка: так пустой список
+    существующего родителя отличается от несуществующего родителя.
+    """
+    lookup_value_regex = r'\d+'
+    parent_not_found_message = None
+    parent_checked = False
+
+    def get_parent_queryset(self):
+        raise NotImplementedError
+
+    def check_parent(self):
+        if self.parent_checked:
+            return
+        if not self.get_parent_queryset().exists():
+            raise NotFound(self.parent_not_found_message)
+        self.parent_checked = True
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page:
+            self.check_parent()
+        return page
+
+    def create(self, request, *args, **kwargs):
+        self.check_parent()
+        return super().create(request, *args, **kwargs)
+
+
+class ChangeFeedMixin:
+    """
+    Лента изменений для синхронизации клиентов.
+
+    ``?updated_since=<ISO 8601>`` в списке отдаёт записи, изменённые не
+    раньше этого момента, по порядку (updated_at, id); ``<список>/deleted/
+    ?updated_since=`` - id удалённых с этого момента записей по порядку
+    (deleted_at, id). Обе выборки листаются курсором (``?pagination=cursor``).
+    Следующий опрос передаёт updated_at последней полученной записи и
+    deleted_at последнего удаления. Выборка начинается на
+    CHANGE_FEED_OVERLAP_SECONDS раньше границы (reviews/changes.py):
+    записи, зафиксированные позже опроса с более ранней отметкой, не
+    теряются, а уже полученные приходят повторно.
+
+    Удаления хранятся TOMBSTONE_RETENTION_DAYS дней; клиенту, который
+    отстал сильнее, нужна полная синхронизация.
+    """
+    updated_since_param = 'updated_since'
+    feed_ordering = ('updated_at', 'id')
+    deleted_ordering = ('deleted_at', 'id')
+    tombstone_parent_kwarg = None
+
+    def get_updated_since(self):
+        value = self.request.query_params.get(self.updated_since_param)
+        if value is None:
+            return None
+        try:
+            since = parse_datetime(value)
+        except ValueError:
+            since = None
+        if since is None:
+            raise ValidationError({self.updated_since_param: [
+                'Ожидается дата и время в формате ISO 8601.']})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def get_keyset_ordering(self):
+        if self.action == 'deleted':
+            return self.deleted_ordering
+        if self.get_updated_since() is not None:
+            return self.feed_ordering
+        return self.keyset_ordering
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        since = self.get_updated_since()
+        if self.action != 'list' or since is None:
+            return queryset
+        return queryset.filter(updated_at__gte=feed_start(since)).order_by(
+            *self.feed_ordering)
+
+    def check_deleted_parent(self):
+        """
+        Родитель из URL проверяется по всей цепочке, как в списке, даже
+        если удаления есть: иначе чужой родитель отдавал бы свои удаления.
+        Удалённый или скрытый родитель проверяется по его записи
+        об удалении.
+        """
+        parents = self.get_parent_queryset()
+        parent_field = PARENT_FIELDS[parents.model]
+        tombstones = Tombstone.objects.filter(
+            resource=RESOURCES[parents.model],
+            object_id=self.kwargs[self.tombstone_parent_kwarg],
+            parent_id=self.kwargs[parent_field] if parent_field else None,
+        )
+        if not (parents.exists() or tombstones.exists()):
+            raise NotFound(self.parent_not_found_message)
+        self.parent_checked = True
+
+    @action(detail=False)
+    def deleted(self, request, *args, **kwargs):
+        since = self.get_updated_since()
+        if since is None:
+            raise ValidationError({self.updated_since_param: [
+                'Обязательный параметр.']})
+        if since < retention_start():
+            raise ValidationError({self.updated_since_param: [
+                'Удаления хранятся '
+                f'{settings.TOMBSTONE_RETENTION_DAYS} дней, '
+                'нужна полная синхронизация.']})
+        parent_id = None
+        if self.tombstone_parent_kwarg:
+            parent_id = self.kwargs[self.tombstone_parent_kwarg]
+            self.check_deleted_parent()
+        page = self.paginate_queryset(Tombstone.objects.filter(
+            resource=RESOURCES[self.queryset.model], parent_id=parent_id,
+            deleted_at__gte=feed_start(since),
+        ).order_by(*self.deleted_ordering))
+        return self.get_paginated_response([
+            {'id': tombstone.object_id, 'deleted_at': tombstone.deleted_at}
+            for tombstone in page
+        ])
+
+
+class BulkCreateMixin:
+    """
+    Массовое создание объектов: POST <список>/bulk/ с массивом объектов.
+
+    Все элементы проверяются одним экземпляром сериализатора; объекты
+    по слагам загружаются заранее одним запросом на модель, уникальность
+    ``bulk_unique_fields`` проверяется одним запросом на поле. Запись идёт
+    через bulk_create в одной транзакции.
+
+    ``?mode=atomic`` (по умолчанию) не создаёт ничего, если хотя бы один
+    элемент с ошибкой, ``?mode=partial`` создаёт корректные элементы.
+    Ответ - список ``{"index": ..., <bulk_result_fields>}`` или
+    ``{"index": ..., "errors": ...}`` по каждому элементу; корректные
+    элементы, не созданные из-за ошибок в режиме atomic, отдаются как
+    ``{"index": ..., "valid": true}``.
+    """
+    bulk_modes = ('atomic', 'partial')
+    bulk_unique_fields = ()
+    bulk_result_fields = ('id',)
+
+    def get_bulk_serializer(self, items):
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context())
+        for name, field in serializer.fields.items():
+            relation = getattr(field, 'child_relation', field)
+            if field.read_only or not hasattr(relation, 'preload'):
+                continue
+            slugs = set()
+            for item in items:
+                value = item.get(name) if isinstance(item, dict) else None
+                if not isinstance(value, list):
+                    value = [] if value is None else [value]
+                slugs.update(map(str, value))
+            relation.preload(slugs)
+        for name in self.bulk_unique_fields:
+            # Уникальность проверяется для всей пачки в check_bulk_unique.
+            serializer.fields[name].validators = [
+                validator for validator in serializer.fields[name].validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return serializer
+
+    def check_bulk_unique(self, valid, errors):
+        model = self.get_serializer_class().Meta.model
+        for name in self.bulk_unique_fields:
+            values = [data[name] for _, data in valid]
+            taken = set(model.objects.filter(
+                **{f'{name}__in': values}).values_list(name, flat=True))
+            for index, data in valid:
+                if data[name] in taken:
+                    errors[index] = {name: [
+                        f'Объект с {name}={data[name]} уже существует.']}
+                taken.add(data[name])
+        return [(index, data) for index, data in valid if index not in errors]
+
+    def validate_bulk(self, items):
+        serializer = self.get_bulk_serializer(items)
+        valid, errors = [], {}
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, serializer.run_validation(item)))
+            except ValidationError as error:
+                errors[index] = error.detail
+        return self.check_bulk_unique(valid, errors), errors
+
+    def bulk_insert(self, model, objects):
+        """bulk_create, если база возвращает ключи вставленных строк."""
+        if connection.features.can_return_rows_from_bulk_insert:
+            return model.objects.bulk_create(
+                objects, batch_size=settings.BULK_BATCH_SIZE)
+        for obj in objects:
+            obj.save(force_insert=True)
+        return objects
+
+    def perform_bulk_create(self, items):
+        model = self.get_serializer_class().Meta.model
+        return self.bulk_insert(model, [model(**data) for data in items])
+
+    def get_bulk_mode(self, request):
+        mode = request.query_params.get('mode', self.bulk_modes[0])
+        if mode not in self.bulk_modes:
+            raise ValidationError({'mode': [
+                f'Допустимые режимы: {", ".join(self.bulk_modes)}.']})
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(['Ожидается непустой список объектов.'])
+        if len(items) > settings.BULK_MAX_ITEMS:
+            raise ValidationError([
+                f'Не больше {settings.BULK_MAX_ITEMS} объектов за запрос.'])
+        return mode
+
+    def bulk_response(self, size, created, errors):
+        results = []
+        for index in range(size):
+            if index in created:
+                results.append({'index': index, **{
+                    name: getattr(created[index], name)
+                    for name in self.bulk_result_fields}})
+            elif index in errors:
+                results.append({'index': index, 'errors': errors[index]})
+            else:
+                results.append({'index': index, 'valid': True})
+        if not errors:
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(results, status=response_status)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdmin])
+    def bulk(self, request):
+        mode = self.get_bulk_mode(request)
+        valid, errors = self.validate_bulk(request.data)
+        created = {}
+        if valid and not (errors and mode == 'atomic'):
+            try:
+                with transaction.atomic():
+                    objects = self.perform_bulk_create(
+                        [data for _, data in valid])
+                    self.invalidate_cache()
+            except IntegrityError:
+                return Response(
+                    {'detail': 'Конфликт с одновременной записью, '
+                               'повторите запрос.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            created = dict(zip((index for index, _ in valid), objects))
+        return self.bulk_response(len(request.data), created, errors)
 
 
 class CreateDestroyList(
+    TimedInitialMixin,
+    VersionedReadMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -12,6 +407,7 @@ class CreateDestroyList(
     filter_backends = (filters.SearchFilter, )
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_responses = True
 
 
 class MeValidator(
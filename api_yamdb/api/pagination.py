@@ -0,0 +1,158 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Постраничный вывод с опциональным режимом курсора.
+
+    По умолчанию работает как обычный PageNumberPagination. Параметр
+    ``?pagination=cursor`` (или переданный ``cursor``) включает keyset-режим:
+    записи упорядочиваются по ``view.get_keyset_ordering()`` (или
+    ``view.keyset_ordering``) и следующая страница выбирается условием
+    "после последней записи" без COUNT(*) и OFFSET.
+
+    Сортировка OrderingFilter вьюсета (``?ordering=``) становится ключом
+    курсора с id в конце, если все её поля - обязательные поля модели.
+    Остальные сортировки (по связанным объектам, по полям с NULL, по
+    релевантности поиска) курсор соблюсти не может: ответ 400.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = settings.MAX_PAGE_SIZE
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    invalid_cursor_message = 'Некорректный курсор.'
+    unsupported_ordering_message = (
+        'Сортировка {} недоступна в режиме курсора.')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = self.get_ordering(request, queryset, view)
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_position = (
+            [getattr(rows[-1], name.lstrip('-')) for name in self.ordering]
+            if self.has_next else None
+        )
+        return rows
+
+    def get_ordering(self, request, queryset, view):
+        """Ключ курсора: сортировка ?ordering= или keyset-сортировка view."""
+        get_ordering = getattr(view, 'get_keyset_ordering', None)
+        default = get_ordering() if get_ordering else view.keyset_ordering
+        backend = next((backend() for backend in view.filter_backends
+                        if issubclass(backend, OrderingFilter)), None)
+        if backend is None:
+            return default
+        requested = backend.ordering_param in request.query_params
+        if default != view.keyset_ordering:
+            # Лента изменений идёт в своём порядке.
+            if requested:
+                self.unsupported_ordering(backend, 'по параметру')
+            return default
+        ordering = backend.get_ordering(request, queryset, view)
+        if not ordering:
+            return default
+        for name in ordering:
+            if not self.is_keyset_field(queryset.model, name.lstrip('-')):
+                self.unsupported_ordering(backend, name)
+        if {'id', '-id', 'pk', '-pk'} & set(ordering):
+            return tuple(ordering)
+        return (*ordering, 'id')
+
+    def is_keyset_field(self, model, name):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        return field.concrete and not field.is_relation and not field.null
+
+    def unsupported_ordering(self, backend, name):
+        raise exceptions.ValidationError({backend.ordering_param: [
+            self.unsupported_ordering_message.format(name)]})
+
+    def after(self, position):
+        """
+        Условие "строго после position" для составного ключа.
+
+        Для ключа (a, b) строится ``a >= x AND (a > x OR (a = x AND b > y))``:
+        первая часть даёт диапазон по ведущему столбцу индекса.
+        """
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        leading = self.ordering[0]
+        lookup = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{f'{leading.lstrip("-")}__{lookup}': position[0]}) & (
+            condition
+        )
+
+    def encode_cursor(self, position):
+        data = json.dumps(
+            [value.isoformat() if hasattr(value, 'isoformat') else value
+             for value in position]
+        )
+        return base64.urlsafe_b64encode(data.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,163 @@
+"""
+Удаление произведений и пользователей с большим числом отзывов.
+
+DELETE в API сразу скрывает объект (hidden=True), а зависимые записи
+удаляются пачками по PURGE_BATCH_SIZE строк, каждая пачка в своей
+транзакции. Память и время блокировок не зависят от числа отзывов:
+обычный delete() загрузил бы в Python все связанные объекты и удалял бы
+их в одной транзакции. В самом запросе удаляется не больше
+PURGE_INLINE_ROWS строк, остальное дочищает команда purge_hidden.
+
+Отзывы скрытого пользователя вычитаются из счётчиков произведений
+сразу при скрытии, поэтому при чистке их удаление счётчики не сдвигает.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from reviews.changes import record_deleted, recorded_by_caller, retention_start
+from reviews.counters import (apply_comment_deltas, apply_review_delta,
+                              withdraw_author_reviews)
+from reviews.models import Comment, GenreTitle, Review, Title, Tombstone
+from users.models import User
+
+from .cache import bump_all_versions, bump_versions, invalidated_by_caller
+
+
+def invalidate(*resources):
+    """Одна отложенная до фиксации запись версий на пачку."""
+    transaction.on_commit(lambda: bump_versions(*resources))
+
+
+def delete_rows(queryset, batch_size):
+    ids = list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+    if ids:
+        queryset.model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def delete_comments(queryset, batch_size):
+    """Пачка комментариев вместе со сдвигом счётчиков их отзывов."""
+    rows = list(queryset.order_by().select_for_update().values_list(
+        'pk', 'review_id', 'review__title_id')[:batch_size])
+    if not rows:
+        return 0
+    with recorded_by_caller(), invalidated_by_caller():
+        Comment.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+    record_deleted(Comment, [(pk, review_id) for pk, review_id, _ in rows])
+    deltas = defaultdict(int)
+    for _, review_id, _ in rows:
+        deltas[review_id] -= 1
+    # Как и в delete_reviews: строки отзывов блокируются по порядку id.
+    list(Review.objects.filter(pk__in=deltas).order_by('pk')
+         .select_for_update().values_list('pk'))
+    apply_comment_deltas(deltas)
+    invalidate(
+        *(f'comments:{review_id}' for review_id in deltas),
+        *{f'reviews:{title_id}' for _, _, title_id in rows},
+    )
+    return len(rows)
+
+
+def delete_reviews(queryset, batch_size):
+    """Пачка отзывов вместе со сдвигом счётчиков их произведений."""
+    rows = list(queryset.order_by().select_for_update().values_list(
+        'pk', 'title_id', 'score', 'author__hidden')[:batch_size])
+    if not rows:
+        return 0
+    with recorded_by_caller(), invalidated_by_caller():
+        Review.objects.filter(pk__in=[pk for pk, _, _, _ in rows]).delete()
+    record_deleted(Review, [(pk, title_id) for pk, title_id, _, _ in rows])
+    deltas = defaultdict(lambda: [0, 0])
+    for _, title_id, score, author_hidden in rows:
+        # Отзывы скрытого автора вычтены из счётчиков в hide().
+        if not author_hidden:
+            deltas[title_id][0] -= score
+            deltas[title_id][1] -= 1
+    # Строки произведений блокируются по порядку id, чтобы параллельные
+    # чистки не ждали друг друга по кругу.
+    for title_id in sorted(deltas):
+        apply_review_delta(title_id, *deltas[title_id])
+    invalidate(
+        'titles',
+        *{f'reviews:{title_id}' for _, title_id, _, _ in rows},
+        *(f'comments:{pk}' for pk, _, _, _ in rows),
+    )
+    return len(rows)
+
+
+def title_steps(title):
+    return (
+        (delete_comments, Comment.objects.filter(review__title=title)),
+        (delete_reviews, Review.objects.filter(title=title)),
+        (delete_rows, GenreTitle.objects.filter(title=title)),
+    )
+
+
+def user_steps(user):
+    return (
+        (delete_comments, Comment.objects.filter(author=user)),
+        (delete_comments, Comment.objects.filter(review__author=user)),
+        (delete_reviews, Review.objects.filter(author=user)),
+    )
+
+
+STEPS = {Title: title_steps, User: user_steps}
+
+
+@transaction.atomic
+def hide(instance):
+    """
+    Скрывает произведение или пользователя до удаления. Записи скрытого
+    объекта пропадают из многих списков сразу, поэтому после фиксации
+    сбрасывается весь кэш API.
+    """
+    instance.hidden = True
+    fields = ['hidden']
+    if isinstance(instance, User):
+        # Токены пользователя перестают приниматься сразу.
+        instance.is_active = False
+        fields.append('is_active')
+        withdraw_author_reviews(instance)
+    else:
+        # Для ленты изменений произведение удалено уже сейчас.
+        record_deleted(Title, [(instance.pk, None)])
+    with invalidated_by_caller():
+        instance.save(update_fields=fields)
+    transaction.on_commit(bump_all_versions)
+
+
+def prune_tombstones(batch_size=None):
+    """Удаляет записи об удалениях старше TOMBSTONE_RETENTION_DAYS."""
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    queryset = Tombstone.objects.filter(deleted_at__lt=retention_start())
+    pruned = 0
+    while True:
+        with transaction.atomic():
+            batch = delete_rows(queryset, batch_size)
+        pruned += batch
+        if batch < batch_size:
+            return pruned
+
+
+def purge(instance, max_rows=None, batch_size=None):
+    """
+    Удаляет зависимые записи скрытого объекта пачками, затем сам объект.
+
+    Возвращает False, если удалено max_rows строк, а записи ещё остались:
+    тогда объект дочищает purge_hidden.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    deleted = 0
+    for delete, queryset in STEPS[type(instance)](instance):
+        while True:
+            if max_rows is not None and deleted >= max_rows:
+                return False
+            with transaction.atomic():
+                batch = delete(queryset, batch_size)
+            deleted += batch
+            if batch < batch_size:
+                break
+    instance.delete()
+    return True
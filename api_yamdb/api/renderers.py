@@ -0,0 +1,11 @@
+from rest_framework.renderers import JSONRenderer
+
+from .timing import phase
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer, время которого попадает в Server-Timing (render)."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with phase('render'):
+            return super().render(data, accepted_media_type, renderer_context)
@@ -1,30 +1,107 @@
 import datetime
+from collections import OrderedDict
 
 from django.conf import settings
 from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import transaction
+from django.utils.encoding import smart_str
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from rest_framework.validators import UniqueValidator
 
 from .mixins import MeValidator
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
 from users.models import User
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class SlugSerializer(serializers.ModelSerializer):
+    """Слаг не должен совпадать с маршрутом списка, например bulk/."""
+
+    RESERVED_SLUGS = ('bulk',)
+
+    def validate_slug(self, value):
+        if value in self.RESERVED_SLUGS:
+            raise serializers.ValidationError(
+                f'Слаг "{value}" зарезервирован.')
+        return value
+
+
+class CategorySerializer(SlugSerializer):
     """"Сериализатор для работы с категориями"""
 
     class Meta:
         model = Category
-        exclude = ('id',)
+        fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(SlugSerializer):
     """"Сериализатор для работы с жанрами"""
 
     class Meta:
         model = Genre
-        exclude = ('id',)
+        fields = ('name', 'slug')
+
+
+class ManySlugRelatedField(serializers.ManyRelatedField):
+    """Список слагов, который разрешается одним запросом с IN."""
+    default_error_messages = {
+        'does_not_exist': 'Не найдены объекты со значениями {slug_name}: '
+                          '{values}.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        slug_field = self.child_relation.slug_field
+        slugs = list(dict.fromkeys(map(str, data)))
+        objects = self.child_relation.preloaded
+        if objects is None:
+            objects = self.child_relation.find(slugs)
+        missing = [slug for slug in slugs if slug not in objects]
+        if missing:
+            self.fail('does_not_exist', slug_name=slug_field,
+                      values=', '.join(missing))
+        return [objects[slug] for slug in slugs]
+
+
+class SlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField, который при many=True проверяет слаги пачкой.
+
+    Для массовой загрузки объекты можно заранее получить методом
+    preload(): тогда поле не обращается к базе при валидации.
+    """
+    preloaded = None
+
+    def find(self, slugs):
+        return {
+            getattr(obj, self.slug_field): obj
+            for obj in self.get_queryset().filter(
+                **{f'{self.slug_field}__in': slugs})
+        }
+
+    def preload(self, slugs):
+        self.preloaded = self.find(slugs)
+
+    def to_internal_value(self, data):
+        if self.preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            return self.preloaded[str(data)]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return ManySlugRelatedField(**list_kwargs)
 
 
 class TitleListRetrieveSerializer(serializers.ModelSerializer):
@@ -38,20 +115,21 @@ class TitleListRetrieveSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'name',
             'year', 'description',
-            'category', 'genre', 'rating',
+            'category', 'genre', 'rating', 'reviews_count', 'updated_at',
         )
         read_only_fields = (
             'id', 'name', 'year', 'description', 'category', 'genre', 'rating',
+            'reviews_count', 'updated_at',
         )
 
 
 class TitleSerializer(serializers.ModelSerializer):
     """"Сериализатор для работы произведенями"""
-    category = serializers.SlugRelatedField(
+    category = SlugRelatedField(
         queryset=Category.objects.all(),
         slug_field='slug'
     )
-    genre = serializers.SlugRelatedField(
+    genre = SlugRelatedField(
         queryset=Genre.objects.all(),
         many=True,
         slug_field='slug'
@@ -68,8 +146,64 @@ class TitleSerializer(serializers.ModelSerializer):
             )
         return value
 
+    def save_genres(self, title, genres, created=False):
+        """
+        Приводит связи произведения с жанрами к списку genres.
+
+        Удаляются только лишние связи и добавляются только недостающие.
+        Текущие жанры берутся из prefetch_related, если он уже выполнен;
+        ignore_conflicts вместе с уникальностью (title, genre) защищает
+        от дублей при одновременном редактировании.
+        """
+        if created:
+            current = set()
+        elif 'genre' in getattr(title, '_prefetched_objects_cache', {}):
+            current = {genre.pk for genre in title.genre.all()}
+        else:
+            current = set(GenreTitle.objects.filter(title=title).order_by()
+                          .values_list('genre_id', flat=True))
+        wanted = {genre.pk for genre in genres}
+        if current - wanted:
+            GenreTitle.objects.filter(
+                title=title, genre_id__in=current - wanted).delete()
+        if wanted - current:
+            GenreTitle.objects.bulk_create(
+                [GenreTitle(title=title, genre_id=genre_id)
+                 for genre_id in wanted - current],
+                ignore_conflicts=not created,
+            )
+        self._genres = genres
+
+    def create(self, validated_data):
+        genres = validated_data.pop('genre', [])
+        with transaction.atomic():
+            title = super().create(validated_data)
+            self.save_genres(title, genres, created=True)
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        if genres is None:
+            self._genres = list(instance.genre.all())
+            return super().update(instance, validated_data)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            self.save_genres(instance, genres)
+        return instance
+
     def to_representation(self, value):
-        return TitleListRetrieveSerializer(value).data
+        serializer = TitleListRetrieveSerializer(value)
+        genres = getattr(self, '_genres', None)
+        if genres is None:
+            return serializer.data
+        # Жанры уже известны после записи: поле жанров заполняется ими,
+        # а не повторным чтением связи из базы.
+        genre_field = serializer.fields.pop('genre')
+        data = serializer.data
+        data['genre'] = genre_field.to_representation(
+            sorted(genres, key=lambda genre: genre.name))
+        return OrderedDict(
+            (name, data[name]) for name in serializer.Meta.fields)
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -88,8 +222,9 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
-        read_only_fields = ('title',)
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count', 'updated_at')
+        read_only_fields = ('title', 'comments_count', 'updated_at')
 
     def validate(self, data):
         if (self.context['request'].method == 'POST' and Review.objects.filter(
@@ -110,8 +245,8 @@ class CommentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Comment
-        fields = ('id', 'text', 'author', 'pub_date')
-        read_only_fields = ('review',)
+        fields = ('id', 'text', 'author', 'pub_date', 'updated_at')
+        read_only_fields = ('review', 'updated_at')
 
 
 class UsersSerializer(serializers.ModelSerializer):
@@ -0,0 +1,98 @@
+"""
+Замеры времени обработки запроса: SQL, проверки доступа, рендеринг.
+
+Замер текущего запроса хранится в contextvar, поэтому виден и в потоках
+sync_to_async (api/async_views.py). Запросы к базе считает обёртка
+record_query, которая ставится на каждое новое соединение.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    """Время этапов одного HTTP-запроса в секундах."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        self.db = 0.0
+        self.slowest_sql = None
+        self.slowest = 0.0
+        self.phases = {}
+
+    def add_query(self, sql, duration):
+        self.queries += 1
+        self.db += duration
+        if duration > self.slowest:
+            self.slowest, self.slowest_sql = duration, sql
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        """
+        Значение заголовка Server-Timing. app - время Python в приложении:
+        всё, кроме запросов к базе и рендеринга ответа.
+        """
+        render = self.phases.get('render', 0.0)
+        metrics = [
+            ('total', self.total, None),
+            ('db', self.db, f'{self.queries} queries'),
+            *((name, value, None) for name, value in self.phases.items()),
+            ('app', max(self.total - self.db - render, 0.0), None),
+        ]
+        return ', '.join(
+            f'{name};dur={value * 1000:.1f}'
+            + (f';desc="{description}"' if description else '')
+            for name, value, description in metrics
+        )
+
+
+def start():
+    return _current.set(RequestTiming())
+
+
+def stop(token):
+    timing = _current.get()
+    _current.reset(token)
+    timing.finish()
+    return timing
+
+
+@contextmanager
+def phase(name):
+    """Замер этапа текущего запроса; вне запроса ничего не делает."""
+    timing = _current.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.phases[name] = (timing.phases.get(name, 0.0)
+                               + time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """Обработчик connection_created: обёртка ставится один раз."""
+    if record_query not in connection.execute_wrappers:
+        # В начало списка: соединение может открыться внутри
+        # connection.execute_wrapper(), который при выходе снимает
+        # последнюю обёртку.
+        connection.execute_wrappers.insert(0, record_query)
@@ -1,25 +1,26 @@
-from django.urls import include, path
-from rest_framework.routers import DefaultRouter
+from django.conf import settings
+from django.urls import include, path, re_path
 
+from .async_views import AsyncReadRouter
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UsersViewSet,
+                    ReviewViewSet, TitleViewSet, UsersViewSet, export_catalog,
                     get_token_for_user, signup)
 
 app_name = 'api'
 
-router_v1 = DefaultRouter()
+router_v1 = AsyncReadRouter(async_reads=settings.API_ASYNC_READS)
 router_v1.register('titles', TitleViewSet, basename='titles')
 router_v1.register('categories', CategoryViewSet, basename='categories')
 router_v1.register('genres', GenreViewSet, basename='genres')
 router_v1.register('users', UsersViewSet, basename='users')
 
 router_v1.register(
-    r'titles/(?P<title_id>.+)/reviews',
+    r'titles/(?P<title_id>\d+)/reviews',
     ReviewViewSet,
     basename='reviews'
 )
 router_v1.register(
-    r'titles/(?P<title_id>.+)/reviews/(?P<review_id>.+)/comments',
+    r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet,
     basename='comments')
 
@@ -28,4 +29,10 @@ urlpatterns = [
     path('', include(router_v1.urls)),
     path('auth/token/', get_token_for_user, name='token'),
     path('auth/signup/', signup, name='signup'),
+    re_path(
+        r'^export/(?P<resource>titles|reviews|comments)'
+        r'\.(?P<file_format>jsonl|csv)(?P<compression>\.gz)?$',
+        export_catalog,
+        name='export',
+    ),
 ]
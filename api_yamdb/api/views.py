@@ -1,108 +1,246 @@
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.core.handlers.asgi import ASGIRequest
+from django.db import router, transaction
 from django.db.utils import IntegrityError
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets, serializers
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
-from .filters import TitleFilter
-from .mixins import CreateDestroyList
+from . import export
+from .authentication import RoleAccessToken
+from .filters import TitleFilter, TitleOrderingFilter
+from .mixins import (BulkCreateMixin, ChangeFeedMixin, CreateDestroyList,
+                     NestedResourceMixin, TimedInitialMixin,
+                     VersionedDetailMixin)
+from .pagination import KeysetPagination
 from .permissions import (IsAdmin, IsAdminOrReadOnly,
                           IsAdminOrModeratorOrReadOnly)
+from .purge import hide, purge
 from .serializers import (CategorySerializer, CommentSerializer,
                           GenreSerializer, GetTokenSerializer,
                           ReviewSerializer, SignUpSerializer,
                           TitleListRetrieveSerializer, TitleSerializer,
                           UsersSerializer)
-from reviews.models import Category, Comment, Genre, Review, Title
+from api_yamdb.db.router import pin_to_primary
+from reviews.changes import touch
+from reviews.counters import apply_comment_deltas, apply_review_delta
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title)
 from users.models import User
+from users.outbox import enqueue_email
 
 
 @permission_classes([IsAdminOrReadOnly])
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(TimedInitialMixin, BulkCreateMixin, VersionedDetailMixin,
+                   ChangeFeedMixin, viewsets.ModelViewSet):
     """"Создание произведений"""
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter,)
+    cache_resource = 'titles'
+    cache_dependencies = ('categories', 'genres')
+    cache_responses = True
+    queryset = Title.objects.filter(hidden=False).select_related(
+        'category').prefetch_related('genre')
+    filter_backends = (DjangoFilterBackend, TitleOrderingFilter,)
     filterset_class = TitleFilter
-    ordering_fields = ('name', 'year', 'category', 'genre', 'rating',)
+    ordering_fields = (
+        'name', 'year', 'category', 'genre', 'rating', 'reviews_count',
+    )
     ordering = ('name',)
+    pagination_class = KeysetPagination
+    keyset_ordering = ('name', 'id')
+    lookup_value_regex = r'\d+'
+
+    def get_cache_invalidates(self):
+        if self.action == 'destroy':
+            return ('titles', f'reviews:{self.kwargs["pk"]}')
+        return ('titles',)
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleListRetrieveSerializer
         return TitleSerializer
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            hide(instance)
+            self.invalidate_cache()
+        purge(instance, max_rows=settings.PURGE_INLINE_ROWS)
+
+    def perform_bulk_create(self, items):
+        genres = [data.pop('genre', []) for data in items]
+        titles = self.bulk_insert(Title, [Title(**data) for data in items])
+        GenreTitle.objects.bulk_create(
+            [GenreTitle(title=title, genre=genre)
+             for title, title_genres in zip(titles, genres)
+             for genre in title_genres],
+            batch_size=settings.BULK_BATCH_SIZE,
+        )
+        return titles
+
 
 @permission_classes([IsAdminOrReadOnly])
-class CategoryViewSet(CreateDestroyList):
+class CategoryViewSet(BulkCreateMixin, CreateDestroyList):
     """"Создание категорий"""
+    cache_resource = 'categories'
+    bulk_unique_fields = ('slug',)
+    bulk_result_fields = ('slug',)
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
 
+    def perform_destroy(self, instance):
+        # Категория произведений обнуляется в обход save().
+        with transaction.atomic():
+            touch(Title.objects.filter(category=instance))
+            super().perform_destroy(instance)
+
 
 @permission_classes([IsAdminOrReadOnly])
-class GenreViewSet(CreateDestroyList):
+class GenreViewSet(BulkCreateMixin, CreateDestroyList):
     """"Создание жанров"""
+    cache_resource = 'genres'
+    bulk_unique_fields = ('slug',)
+    bulk_result_fields = ('slug',)
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            touch(Title.objects.filter(genre=instance))
+            super().perform_destroy(instance)
+
 
 @permission_classes([IsAdminOrModeratorOrReadOnly])
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(TimedInitialMixin, NestedResourceMixin,
+                    VersionedDetailMixin, ChangeFeedMixin,
+                    viewsets.ModelViewSet):
     """"Создание оценок"""
-    queryset = Review.objects.all()
+    queryset = Review.objects.select_related('author')
     serializer_class = ReviewSerializer
+    filter_backends = (filters.OrderingFilter,)
+    ordering_fields = ('pub_date', 'score', 'comments_count')
+    pagination_class = KeysetPagination
+    keyset_ordering = ('pub_date', 'id')
+    tombstone_parent_kwarg = 'title_id'
 
-    def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+    def get_cache_resources(self):
+        return (f'reviews:{self.kwargs["title_id"]}',)
+
+    def get_cache_invalidates(self):
+        resources = ('titles', f'reviews:{self.kwargs["title_id"]}')
+        if self.action == 'destroy':
+            return (*resources, f'comments:{self.kwargs["pk"]}')
+        return resources
+
+    parent_not_found_message = 'Произведение не найдено.'
+
+    def get_parent_queryset(self):
+        return Title.objects.filter(pk=self.kwargs['title_id'], hidden=False)
 
     def perform_create(self, serializer):
-        serializer.save(title=self.get_title(),
-                        author=self.request.user)
+        with transaction.atomic():
+            review = serializer.save(title_id=self.kwargs['title_id'],
+                                     author=self.request.user)
+            apply_review_delta(review.title_id, review.score, 1)
+            self.invalidate_cache()
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            old_score = Review.objects.select_for_update().values_list(
+                'score', flat=True).get(pk=serializer.instance.pk)
+            review = serializer.save()
+            apply_review_delta(review.title_id, review.score - old_score)
+            self.invalidate_cache()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            score = Review.objects.select_for_update().values_list(
+                'score', flat=True).get(pk=instance.pk)
+            instance.delete()
+            apply_review_delta(instance.title_id, -score, -1)
+            self.invalidate_cache()
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.queryset.filter(title_id=self.kwargs['title_id'],
+                                    title__hidden=False, author__hidden=False)
 
 
 @permission_classes([IsAdminOrModeratorOrReadOnly])
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(TimedInitialMixin, NestedResourceMixin,
+                     VersionedDetailMixin, ChangeFeedMixin,
+                     viewsets.ModelViewSet):
     """"Создание комментариев"""
-    queryset = Comment.objects.all()
+    queryset = Comment.objects.select_related('author')
     serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('pub_date', 'id')
+    tombstone_parent_kwarg = 'review_id'
+
+    def get_cache_resources(self):
+        return (f'comments:{self.kwargs["review_id"]}',)
 
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+    def get_cache_invalidates(self):
+        # comments_count отзыва отдаётся в списке отзывов произведения.
+        return (f'comments:{self.kwargs["review_id"]}',
+                f'reviews:{self.kwargs["title_id"]}')
+
+    parent_not_found_message = 'Отзыв не найден.'
+
+    def get_parent_queryset(self):
+        return Review.objects.filter(pk=self.kwargs['review_id'],
+                                     title_id=self.kwargs['title_id'],
+                                     title__hidden=False,
+                                     author__hidden=False)
 
     def perform_create(self, serializer):
-        serializer.save(review=self.get_review(),
-                        author=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(review_id=self.kwargs['review_id'],
+                                      author=self.request.user)
+            apply_comment_deltas({comment.review_id: 1})
+            self.invalidate_cache()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # Счётчик уменьшается, только если строку удалил этот запрос,
+            # а не параллельный DELETE того же комментария.
+            deleted, _ = Comment.objects.filter(pk=instance.pk).delete()
+            apply_comment_deltas({instance.review_id: -deleted})
+            self.invalidate_cache()
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.queryset.filter(
+            review_id=self.kwargs['review_id'],
+            review__title_id=self.kwargs['title_id'],
+            review__title__hidden=False,
+            review__author__hidden=False,
+            author__hidden=False,
+        )
 
 
 @permission_classes([IsAdmin])
-class UsersViewSet(viewsets.ModelViewSet):
+class UsersViewSet(TimedInitialMixin, viewsets.ModelViewSet):
     """"Работа с пользователями"""
     http_method_names = ['get', 'post', 'patch', 'delete']
-    queryset = User.objects.all()
+    queryset = User.objects.filter(hidden=False)
     serializer_class = UsersSerializer
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
     lookup_field = 'username'
 
+    def perform_destroy(self, instance):
+        hide(instance)
+        purge(instance, max_rows=settings.PURGE_INLINE_ROWS)
+
     @action(detail=False,
             methods=['patch', 'get'],
             url_path='me',
             permission_classes=[permissions.IsAuthenticated],
             )
     def me(self, request):
-        user = request.user
+        # request.user собран из токена, профиль читаем из базы.
+        user = get_object_or_404(User, pk=request.user.pk)
         if request.method == 'PATCH':
             serializer = UsersSerializer(
                 user,
@@ -134,12 +272,10 @@ def signup(request):
         raise serializers.ValidationError(detail=[valid_error, ])
 
     confirmation_code = default_token_generator.make_token(user)
-    send_mail(
+    enqueue_email(
         'Подтверждение email',
         f'Ваш код подтверждения: {confirmation_code}',
-        from_email=settings.FROM_EMAIL,
-        recipient_list=[serializer.validated_data['email']],
-        fail_silently=True,
+        serializer.validated_data['email'],
     )
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -152,6 +288,48 @@ def get_token_for_user(request):
         User, username=serializer.validated_data['username'])
     if default_token_generator.check_token(
             user, serializer.validated_data['confirmation_code']):
-        token = AccessToken.for_user(user)
+        token = RoleAccessToken.for_user(user)
+        # Пользователь мог только что зарегистрироваться.
+        pin_to_primary(user.pk)
         return Response({"token": str(token)}, status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def export_catalog(request, resource, file_format, compression=None):
+    """
+    Потоковая выгрузка /export/<titles|reviews|comments>.<jsonl|csv>[.gz];
+    параметры запроса - фильтры произведений, как в /titles/.
+
+    Только для WSGI-воркеров: под ASGI Django 3.2 перебирает потоковый
+    ответ в цикле событий, где запросы к базе запрещены, а чтение пачек
+    в другом потоке всё равно останавливало бы цикл событий, то есть все
+    запросы воркера, на время каждой пачки. Поэтому под ASGI выгрузка
+    отвечает 501; её нужно направлять на WSGI-воркеры или выполнять
+    командой export_catalog.
+    """
+    if isinstance(request._request, ASGIRequest):
+        return Response(
+            {'detail': 'Выгрузка недоступна на ASGI-воркерах, '
+                       'используйте WSGI-воркеры или export_catalog.'},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+    # Генератор выполняется после выхода из middleware, поэтому база
+    # для чтения (реплика) выбирается сейчас.
+    using = router.db_for_read(Title)
+    try:
+        titles = export.filter_titles(request.query_params, using=using)
+    except export.ExportFilterError as error:
+        raise serializers.ValidationError(error.errors)
+    compress = compression is not None
+    response = StreamingHttpResponse(
+        export.export(resource, file_format, titles, compress=compress),
+        content_type=('application/gzip' if compress
+                      else export.FORMATS[file_format]),
+    )
+    response['Content-Disposition'] = (
+        'attachment; filename='
+        f'"{export.file_name(resource, file_format, compress)}"'
+    )
+    return response
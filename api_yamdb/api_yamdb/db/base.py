@@ -0,0 +1,119 @@
+"""
+Бэкенд PostgreSQL с проверкой соединений и пулом внутри процесса.
+
+Подключается через ENGINE = 'api_yamdb.db'. Дополнительно к стандартному
+бэкенду Django 3.2 поддерживает:
+
+- CONN_HEALTH_CHECKS: постоянное соединение проверяется перед первым
+  запросом в каждом HTTP-запросе и переоткрывается, если оборвалось
+  (как в Django 4.1);
+- OPTIONS['pool'] = {'max_size': ..., 'timeout': ..., 'max_lifetime': ...}:
+  соединения не закрываются, а возвращаются в пул процесса и выдаются
+  следующему потоку или запросу.
+"""
+import os
+
+from django.db.backends.postgresql import base
+from psycopg2 import OperationalError, extensions
+
+from .pool import ConnectionPool, PoolTimeoutError
+
+_pools = {}
+
+
+def get_pool(alias, options):
+    """Пул для алиаса базы; после fork создаётся заново."""
+    pool = _pools.get(alias)
+    if pool is None or pool.pid != os.getpid():
+        _pools[alias] = ConnectionPool(**options)
+    return _pools[alias]
+
+
+def pool_stats():
+    """Статистика пулов текущего процесса по алиасам баз."""
+    return {alias: pool.stats() for alias, pool in _pools.items()
+            if pool.pid == os.getpid()}
+
+
+def is_alive(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        if not connection.autocommit:
+            connection.rollback()
+    except OperationalError:
+        return False
+    return True
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        return None if options is None else get_pool(self.alias, options)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        check = None
+        if self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            check = is_alive
+        try:
+            connection = pool.getconn(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params),
+                check,
+            )
+        except PoolTimeoutError as error:
+            raise OperationalError(str(error)) from error
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level)
+        return connection
+
+    def connect(self):
+        # Новое соединение проверять не нужно; флаг ставится до connect(),
+        # который сам вызывает ensure_connection() при настройке autocommit.
+        self.health_check_done = True
+        super().connect()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Начало или конец HTTP-запроса: следующее использование
+        # постоянного соединения снова проверит его.
+        self.health_check_done = False
+
+    def ensure_connection(self):
+        if (self.connection is not None and not self.health_check_done
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not self.in_atomic_block):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            super()._close()
+            return
+        connection = self.connection
+        status = connection.info.transaction_status
+        discard = status == extensions.TRANSACTION_STATUS_UNKNOWN
+        if status in (extensions.TRANSACTION_STATUS_INTRANS,
+                      extensions.TRANSACTION_STATUS_INERROR):
+            try:
+                connection.rollback()
+            except OperationalError:
+                discard = True
+        pool.putconn(connection, discard=discard)
@@ -0,0 +1,13 @@
+"""Общие операции миграций."""
+
+
+def run_sql(vendor, statements):
+    """
+    Функция для RunPython: выполняет statements только в базе vendor,
+    в остальных базах миграция ничего не делает.
+    """
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == vendor:
+            for statement in statements:
+                schema_editor.execute(statement)
+    return operation
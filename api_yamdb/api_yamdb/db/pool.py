@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Пул соединений с базой, общий для потоков процесса.
+
+    Соединения создаются по требованию, не больше max_size. Когда все
+    заняты, getconn ждёт освобождения не дольше timeout секунд.
+    Соединения старше max_lifetime секунд закрываются при возврате.
+    """
+
+    def __init__(self, max_size, timeout=10, max_lifetime=None):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.pid = os.getpid()
+        self._idle = deque()
+        self._created = {}
+        self._condition = threading.Condition()
+        self._stats = dict.fromkeys(
+            ('checkouts', 'connects', 'waits', 'timeouts', 'discarded'), 0)
+        self._wait_seconds = 0.0
+        self._checkout_seconds = 0.0
+
+    def _expired(self, connection):
+        return self.max_lifetime is not None and (
+            time.monotonic() - self._created[connection] > self.max_lifetime)
+
+    def _discard(self, connection):
+        """Закрывает соединение и освобождает его место (вызывать без lock)."""
+        with self._condition:
+            self._created.pop(connection, None)
+            self._stats['discarded'] += 1
+            self._condition.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def getconn(self, connect, check=None):
+        """
+        Выдаёт соединение из пула или создаёт новое функцией connect.
+
+        check(connection) -> bool проверяет свободное соединение перед
+        выдачей, неисправные закрываются. Проверка и закрытие - запросы
+        к базе, поэтому идут без блокировки пула: взятое соединение уже
+        не в списке свободных и занимает своё место в пуле.
+        """
+        started = time.monotonic()
+        while True:
+            with self._condition:
+                connection = self._wait_for_connection(started)
+                if connection is None:
+                    # Место под новое соединение занято до подключения.
+                    slot = object()
+                    self._created[slot] = started
+                    break
+            if not connection.closed and (check is None or check(connection)):
+                with self._condition:
+                    self._checked_out(started)
+                return connection
+            self._discard(connection)
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                del self._created[slot]
+                self._condition.notify()
+            raise
+        with self._condition:
+            del self._created[slot]
+            self._created[connection] = time.monotonic()
+            self._stats['connects'] += 1
+            self._checked_out(started)
+        return connection
+
+    def _wait_for_connection(self, started):
+        """
+        Свободное соединение или None, если можно открыть новое
+        (вызывать под lock).
+        """
+        deadline = started + self.timeout
+        waited = False
+        while not self._idle and len(self._created) >= self.max_size:
+            if not waited:
+                waited = True
+                self._stats['waits'] += 1
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._stats['timeouts'] += 1
+                self._wait_seconds += time.monotonic() - started
+                logger.warning('Database pool exhausted (%s connections)',
+                               self.max_size)
+                raise PoolTimeoutError(
+                    f'No free database connection in {self.timeout}s')
+            self._condition.wait(remaining)
+        if waited:
+            self._wait_seconds += time.monotonic() - started
+        return self._idle.pop() if self._idle else None
+
+    def _checked_out(self, started):
+        self._stats['checkouts'] += 1
+        self._checkout_seconds += time.monotonic() - started
+
+    def putconn(self, connection, discard=False):
+        with self._condition:
+            if connection not in self._created:
+                return
+            if not (discard or connection.closed
+                    or self._expired(connection)):
+                self._idle.append(connection)
+                self._condition.notify()
+                return
+        self._discard(connection)
+
+    def close(self):
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._condition:
+            size = len(self._created)
+            return {
+                'max_size': self.max_size,
+                'size': size,
+                'idle': len(self._idle),
+                'in_use': size - len(self._idle),
+                **self._stats,
+                'wait_seconds': round(self._wait_seconds, 6),
+                'checkout_seconds': round(self._checkout_seconds, 6),
+            }
@@ -0,0 +1,72 @@
+"""
+Чтение с реплик базы для безопасных HTTP-запросов.
+
+Реплики перечислены в settings.DATABASE_REPLICAS. Middleware
+(api.middleware.ReplicaRoutingMiddleware) выбирает реплику на время
+GET/HEAD/OPTIONS-запроса, все остальные запросы, команды и фоновые
+процессы читают и пишут в основную базу. Метки записи пользователей
+хранятся в кэше, общем для всех процессов (middleware без него не
+запускается).
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_KEY = 'db:pinned:{}'
+
+# Алиас реплики для чтения в текущем запросе, None - основная база.
+_read_alias = ContextVar('db_read_alias', default=None)
+
+
+def route_reads(to_replica):
+    """
+    Направляет чтение текущего запроса на случайную реплику или,
+    при to_replica=False, в основную базу. Возвращает токен для
+    reset_routing().
+    """
+    alias = random.choice(settings.DATABASE_REPLICAS) if to_replica else None
+    return _read_alias.set(alias)
+
+
+def use_primary():
+    """До конца текущего запроса читать из основной базы."""
+    _read_alias.set(None)
+
+
+def reset_routing(token):
+    _read_alias.reset(token)
+
+
+def pin_to_primary(user_id):
+    """
+    Следующие DB_REPLICA_PIN_SECONDS секунд запросы пользователя читают
+    из основной базы: реплики могут ещё не получить его изменения.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return
+    cache.set(PIN_KEY.format(user_id), True,
+              timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return cache.get(PIN_KEY.format(user_id), False)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        return obj1._state.db in aliases and obj2._state.db in aliases
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными от основной базы.
+        return db not in settings.DATABASE_REPLICAS
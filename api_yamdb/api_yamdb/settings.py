@@ -31,11 +31,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.performance_middleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
 
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.replica_routing_middleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -60,6 +62,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
+ASGI_APPLICATION = 'api_yamdb.asgi.application'
+# Чтение через API в пуле потоков (api/async_views.py). asgi.py включает
+# режим по умолчанию, под WSGI он не нужен.
+API_ASYNC_READS = os.getenv('API_ASYNC_READS', default='0') == '1'
 
 DATABASES = {
     'default': {
@@ -69,8 +75,60 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
         'PORT': os.getenv('DB_PORT', default='5432'),
+        # Время жизни постоянного соединения в секундах, 0 - новое
+        # соединение на каждый запрос.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', default='0') == '1',
     }
 }
+# Пул соединений процесса (api_yamdb/db): соединения возвращаются в пул
+# в конце запроса и достаются следующему запросу или потоку.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', default=0))
+if DB_POOL_SIZE:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'max_size': DB_POOL_SIZE,
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', default=1800)),
+        },
+    }
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+# Проверки соединений и пул реализованы в бэкенде api_yamdb.db,
+# стандартный бэкенд Django 3.2 их не поддерживает.
+if DB_POOL_SIZE or DATABASES['default']['CONN_HEALTH_CHECKS']:
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql':
+        DATABASES['default']['ENGINE'] = 'api_yamdb.db'
+# Реплики для чтения: DB_REPLICAS=host1:5432,host2 (для SQLite - пути
+# к файлам баз). Безопасные запросы читают с реплик (api_yamdb/db/router.py),
+# пользователь после записи DB_REPLICA_PIN_SECONDS секунд читает из основной.
+DATABASE_REPLICAS = []
+for number, address in enumerate(filter(None, os.getenv('DB_REPLICAS', default='').split(',')), 1):
+    replica = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    if replica['ENGINE'] == 'django.db.backends.sqlite3':
+        replica['NAME'] = address
+    else:
+        host, _, port = address.partition(':')
+        replica.update(HOST=host, PORT=port or replica['PORT'])
+    DATABASES[f'replica_{number}'] = replica
+    DATABASE_REPLICAS.append(f'replica_{number}')
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ['api_yamdb.db.router.ReplicaRouter']
+DB_REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', default=5))
+
+# Кэш в памяти процесса годится только для одного процесса: несколько
+# воркеров gunicorn с ним не запускаются (gunicorn.conf.py), в Docker
+# используется memcached (infra/docker-compose.yaml).
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+# Время жизни закэшированных ответов API и версий ресурсов. Записи через
+# API, save()/delete() моделей (админка) и команды загрузки сбрасывают кэш
+# сразу, update() в обход моделей виден по истечении TTL.
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=300))
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,23 +171,67 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.RoleJWTAuthentication',
     ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.'
                                 'PageNumberPagination',
     "PAGE_SIZE": 5,
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+MAX_PAGE_SIZE = 100
+# Списки админки, где по оценке PostgreSQL не меньше строк, показывают
+# оценку вместо COUNT(*) (api_yamdb/admin.py).
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT',
+                                        default=10000))
+# Замеры времени запросов (api/timing.py): Server-Timing для администраторов
+# и лог запросов дольше PERF_SLOW_REQUEST_MS.
+PERF_TIMING = os.getenv('PERF_TIMING', default='1') == '1'
+PERF_SLOW_REQUEST_MS = int(os.getenv('PERF_SLOW_REQUEST_MS', default=500))
+# Метрики Prometheus (api/metrics.py) записываются при PERF_TIMING.
+# /metrics требует заголовок Authorization: Bearer <METRICS_TOKEN>;
+# без METRICS_TOKEN эндпоинт закрыт.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', default='1') == '1'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', default='')
+# Массовое создание: POST /api/v1/<titles|genres|categories>/bulk/
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', default=5000))
+BULK_BATCH_SIZE = 1000
+# Удаление произведений и пользователей (api/purge.py): строк в одной
+# транзакции и сколько строк удаляется в самом запросе DELETE.
+PURGE_BATCH_SIZE = int(os.getenv('PURGE_BATCH_SIZE', default=1000))
+PURGE_INLINE_ROWS = int(os.getenv('PURGE_INLINE_ROWS', default=1000))
+# Лента изменений (?updated_since=, <ресурс>/deleted/): сколько дней
+# хранятся записи об удалениях.
+TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS',
+                                         default=30))
+# На сколько секунд раньше ?updated_since= начинается лента: запас на
+# транзакции, которые фиксируются позже, чем получили updated_at.
+CHANGE_FEED_OVERLAP_SECONDS = int(os.getenv('CHANGE_FEED_OVERLAP_SECONDS',
+                                            default=60))
+# Выгрузка каталога (api/export.py): строк в одном запросе к базе.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', default=2000))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'AUTH_HEADER_TYPES': ('Bearer',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
 }
+# Как долго процесс доверяет роли из токена без сверки с базой.
+AUTH_CLAIMS_CHECK_TTL = int(os.getenv('AUTH_CLAIMS_CHECK_TTL', default=30))
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', default='django.core.mail.backends.filebased.EmailBackend')
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 FROM_EMAIL = 'YandexTeam@example.com'
+# Очередь писем: users/management/commands/send_emails.py
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', default=100))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.getenv('EMAIL_OUTBOX_RETRY_DELAY', default=60))
+# Сколько дней хранятся отправленные и недоставленные письма (без текста).
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', default=7))
 
 USERNAME_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
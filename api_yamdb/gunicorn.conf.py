@@ -0,0 +1,36 @@
+"""
+Настройки gunicorn (читаются из рабочего каталога по умолчанию).
+
+Метрики Prometheus воркеров пишутся в файлы PROMETHEUS_MULTIPROC_DIR,
+см. api/metrics.py; файлы прошлого запуска удаляются при старте.
+Несколько воркеров с кэшем в памяти процесса не запускаются: каждый
+видел бы свои версии ресурсов и отдавал устаревшие ответы.
+"""
+import os
+import shutil
+
+
+def check_cache(workers):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    from api.cache import is_shared
+
+    if workers > 1 and not is_shared():
+        raise RuntimeError(
+            f'{workers} workers need a shared cache: set CACHE_BACKEND '
+            'and CACHE_LOCATION (e.g. memcached), not LocMemCache.'
+        )
+
+
+def on_starting(server):
+    check_cache(server.cfg.workers)
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
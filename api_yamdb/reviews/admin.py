@@ -1,22 +1,32 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
 
+from api_yamdb.admin import LargeTableAdmin
+
 from .models import Category, Comment, Genre, GenreTitle, Review, Title
 
 
 class GenreTitleTabular(admin.TabularInline):
     model = GenreTitle
+    autocomplete_fields = ('genre',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('title', 'genre')
 
 
 @admin.register(Title)
-class TitleAdmin(admin.ModelAdmin):
+class TitleAdmin(LargeTableAdmin):
     list_display = ('pk', 'name', 'category', 'year', 'get_genres')
     list_filter = ('category',)
     list_editable = ('category', 'year',)
-    search_fields = ('name',)
+    list_select_related = ('category',)
+    search_fields = ('^name',)
     empty_value_display = '-пусто-'
     inlines = [GenreTitleTabular, ]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('genre')
+
     def get_genres(self, obj):
         return ', '.join([str(genre) for genre in obj.genre.all()])
     get_genres.short_description = 'Жанры'
@@ -41,24 +51,36 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'score', 'title', 'author')
     list_filter = ('pub_date',)
-    search_fields = ('text',)
+    list_select_related = ('title', 'author')
+    search_fields = ('^title__name', '^author__username')
+    autocomplete_fields = ('title', 'author')
+    # Новые сверху по первичному ключу: для (pub_date, id) модели
+    # индекса по всей таблице нет.
+    ordering = ('-id',)
     empty_value_display = '-пусто-'
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ('pk', 'text', 'pub_date', 'review', 'author')
     list_filter = ('pub_date',)
-    search_fields = ('text',)
+    list_select_related = ('review', 'author')
+    search_fields = ('^author__username',)
+    raw_id_fields = ('review',)
+    autocomplete_fields = ('author',)
+    ordering = ('-id',)
     empty_value_display = '-пусто-'
 
 
 @admin.register(GenreTitle)
-class GenreTitleAdmin(admin.ModelAdmin):
+class GenreTitleAdmin(LargeTableAdmin):
     list_display = ('pk', 'title', 'genre')
+    list_select_related = ('title', 'genre')
+    search_fields = ('^title__name',)
+    autocomplete_fields = ('title', 'genre')
 
 
 admin.site.unregister(Group)
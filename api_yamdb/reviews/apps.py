@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
     verbose_name = 'Произведения'
+
+    def ready(self):
+        from reviews.changes import RESOURCES, record_instance_deleted
+        from reviews.search import restore_sqlite_fts
+        post_migrate.connect(restore_sqlite_fts, sender=self)
+        for model in RESOURCES:
+            post_delete.connect(
+                record_instance_deleted, sender=model,
+                dispatch_uid=f'reviews.tombstone_{model._meta.model_name}')
@@ -0,0 +1,89 @@
+"""
+Лента изменений для синхронизации: updated_at и записи об удалениях.
+
+updated_at заполняет auto_now при save(); запросы update() в обход
+модели сдвигают его сами: счётчики в reviews/counters.py, удаление
+категории или жанра произведений - через touch().
+Удаления записываются в Tombstone по сигналу post_delete, поэтому
+в ленту попадают и удаления из админки, shell и каскадные удаления
+(QuerySet.delete() из-за обработчика сигнала не удаляет эти модели
+в обход Python). Скрытое произведение записывается при скрытии, пачки
+purge - одной вставкой внутри recorded_by_caller().
+
+Отметки времени берутся до фиксации транзакции: запись, которая
+фиксируется позже опроса клиента, может получить отметку раньше
+возвращённой им границы. Поэтому лента отдаёт записи начиная на
+CHANGE_FEED_OVERLAP_SECONDS раньше запрошенного момента (feed_start()):
+клиент получает часть записей повторно, но не теряет их, пока запись
+фиксируется быстрее этого окна.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from reviews.models import Comment, Review, Title, Tombstone
+
+RESOURCES = {Title: 'titles', Review: 'reviews', Comment: 'comments'}
+# Поле id родителя в записи об удалении.
+PARENT_FIELDS = {Title: None, Review: 'title_id', Comment: 'review_id'}
+
+# Удаления, которые вызывающий код записывает сам, см. recorded_by_caller().
+_recorded_by_caller = ContextVar('tombstones_recorded_by_caller',
+                                 default=False)
+
+
+def touch(queryset):
+    """
+    Сдвигает updated_at записей, изменённых в обход save(). Время берётся
+    из Python, как у auto_now: CURRENT_TIMESTAMP в SQLite - с точностью
+    до секунды.
+    """
+    return queryset.update(updated_at=timezone.now())
+
+
+def record_deleted(model, rows, using=None):
+    """
+    Записи об удалении объектов model: rows - пары (id, id родителя);
+    родитель отзыва - произведение, комментария - отзыв.
+    """
+    Tombstone.objects.using(using).bulk_create(
+        Tombstone(resource=RESOURCES[model], object_id=object_id,
+                  parent_id=parent_id)
+        for object_id, parent_id in rows
+    )
+
+
+def retention_start():
+    """Раньше этого момента записи об удалениях уже могли быть удалены."""
+    return timezone.now() - timedelta(
+        days=settings.TOMBSTONE_RETENTION_DAYS)
+
+
+@contextmanager
+def recorded_by_caller():
+    """
+    Удаления внутри блока записывает вызывающий код одним bulk_create,
+    а не обработчик post_delete по строке на объект.
+    """
+    token = _recorded_by_caller.set(True)
+    try:
+        yield
+    finally:
+        _recorded_by_caller.reset(token)
+
+
+def record_instance_deleted(sender, instance, using, **kwargs):
+    """Обработчик post_delete произведений, отзывов и комментариев."""
+    if _recorded_by_caller.get() or (sender is Title and instance.hidden):
+        return
+    parent_field = PARENT_FIELDS[sender]
+    parent_id = getattr(instance, parent_field) if parent_field else None
+    record_deleted(sender, [(instance.pk, parent_id)], using=using)
+
+
+def feed_start(since):
+    """Начало выборки ленты для границы since с запасом на поздние фиксации."""
+    return since - timedelta(seconds=settings.CHANGE_FEED_OVERLAP_SECONDS)
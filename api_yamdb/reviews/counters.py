@@ -0,0 +1,151 @@
+from django.db.models import (Avg, Case, Count, ExpressionWrapper, F,
+                              FloatField, IntegerField, OuterRef, Q, Subquery,
+                              Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from reviews.models import Comment, Review, Title
+
+
+def rating_expression(score_sum, reviews_count):
+    """Рейтинг как среднее: сумма оценок / количество отзывов."""
+    return ExpressionWrapper(
+        Cast(score_sum, FloatField()) / NullIf(reviews_count, 0),
+        output_field=FloatField(),
+    )
+
+
+def apply_review_delta(title_id, score_delta=0, count_delta=0):
+    """
+    Атомарно сдвигает счётчики произведения одним UPDATE.
+    Рейтинг отдаётся в API, поэтому сдвигается и updated_at.
+
+    Новые значения считаются в базе через F-выражения, поэтому
+    параллельные изменения отзывов одного произведения не теряются:
+    строка блокируется на время UPDATE, и каждая транзакция видит
+    результат предыдущей.
+    """
+    score_sum = F('score_sum') + score_delta
+    reviews_count = F('reviews_count') + count_delta
+    return Title.objects.filter(pk=title_id).update(
+        score_sum=score_sum,
+        reviews_count=reviews_count,
+        rating=rating_expression(score_sum, reviews_count),
+        updated_at=timezone.now(),
+    )
+
+
+def _reviews_aggregate(aggregate, **filters):
+    return Subquery(
+        Review.objects.filter(title=OuterRef('pk'), **filters)
+        .order_by()
+        .values('title')
+        .annotate(value=aggregate)
+        .values('value')
+    )
+
+
+def actual_counters():
+    """
+    Значения счётчиков, посчитанные по таблице отзывов. Отзывы скрытых
+    пользователей не считаются: они вычитаются при скрытии автора.
+    """
+    return {
+        'score_sum': Coalesce(
+            _reviews_aggregate(Sum('score'), author__hidden=False), 0),
+        'reviews_count': Coalesce(
+            _reviews_aggregate(Count('pk'), author__hidden=False), 0),
+        'rating': _reviews_aggregate(
+            Avg('score', output_field=FloatField()), author__hidden=False
+        ),
+    }
+
+
+def withdraw_author_reviews(author):
+    """
+    Вычитает отзывы автора из счётчиков его произведений одним UPDATE,
+    как apply_review_delta: вызывается при скрытии пользователя.
+    """
+    score_sum = F('score_sum') - Coalesce(
+        _reviews_aggregate(Sum('score'), author=author), 0)
+    reviews_count = F('reviews_count') - Coalesce(
+        _reviews_aggregate(Count('pk'), author=author), 0)
+    return Title.objects.filter(
+        pk__in=Review.objects.filter(author=author).values('title_id')
+    ).update(
+        score_sum=score_sum,
+        reviews_count=reviews_count,
+        rating=rating_expression(score_sum, reviews_count),
+        updated_at=timezone.now(),
+    )
+
+
+def titles_with_drift(queryset=None):
+    """Произведения, у которых сохранённые счётчики разошлись с отзывами."""
+    if queryset is None:
+        queryset = Title.objects.all()
+    counters = actual_counters()
+    return queryset.annotate(
+        actual_score_sum=counters['score_sum'],
+        actual_reviews_count=counters['reviews_count'],
+    ).filter(
+        ~Q(score_sum=F('actual_score_sum'))
+        | ~Q(reviews_count=F('actual_reviews_count'))
+    )
+
+
+def recount_titles(queryset=None):
+    """
+    Пересчитывает счётчики произведений одним UPDATE; рейтинг отдаётся
+    в API, поэтому сдвигается и updated_at.
+    """
+    if queryset is None:
+        queryset = Title.objects.all()
+    return queryset.update(**actual_counters(), updated_at=timezone.now())
+
+
+def apply_comment_deltas(deltas):
+    """
+    Сдвигает comments_count отзывов одним UPDATE.
+
+    deltas - {id отзыва: изменение}; как и apply_review_delta, значения
+    считаются в базе, поэтому параллельные изменения не теряются.
+    """
+    if not deltas:
+        return 0
+    return Review.objects.filter(pk__in=deltas).update(
+        comments_count=F('comments_count') + Case(
+            *(When(pk=pk, then=Value(delta))
+              for pk, delta in deltas.items()),
+            output_field=IntegerField(),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def actual_comments_count():
+    """Число комментариев отзыва, посчитанное по таблице комментариев."""
+    return Coalesce(Subquery(
+        Comment.objects.filter(review=OuterRef('pk'))
+        .order_by()
+        .values('review')
+        .annotate(value=Count('pk'))
+        .values('value')
+    ), 0)
+
+
+def reviews_with_drift(queryset=None):
+    """Отзывы, у которых comments_count разошёлся с комментариями."""
+    if queryset is None:
+        queryset = Review.objects.all()
+    return queryset.annotate(
+        actual_comments_count=actual_comments_count(),
+    ).exclude(comments_count=F('actual_comments_count'))
+
+
+def recount_reviews(queryset=None):
+    """Пересчитывает счётчики комментариев отзывов одним UPDATE."""
+    if queryset is None:
+        queryset = Review.objects.all()
+    return queryset.update(comments_count=actual_comments_count(),
+                           updated_at=timezone.now())
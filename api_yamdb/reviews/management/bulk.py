@@ -0,0 +1,56 @@
+from contextlib import contextmanager
+from itertools import islice
+
+from django.core.management.color import no_style
+from django.db import connection
+from django.utils import timezone
+
+
+def batched(iterable, size):
+    """Разбивает поток объектов на списки не длиннее size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """
+    Временно отключает auto_now_add у полей модели.
+
+    bulk_create подставляет текущее время в такие поля, а при загрузке
+    данных нужно сохранить исходные даты публикации.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def copy_default(field):
+    """
+    Значение поля, не переданного в COPY: у полей с auto_now(_add) нет
+    значения по умолчанию, его подставляет save().
+    """
+    if getattr(field, 'auto_now', False) or getattr(
+            field, 'auto_now_add', False):
+        return timezone.now()
+    return field.get_default()
+
+
+def reset_sequences(*models):
+    """Сдвигает последовательности id после вставки с явными ключами."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
@@ -0,0 +1,314 @@
+import csv
+import io
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from math import gcd
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+
+from api.cache import bump_all_versions
+from reviews.counters import recount_reviews, recount_titles
+from reviews.management.bulk import (batched, copy_default, keep_auto_now_add,
+                                     reset_sequences)
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from users.models import User
+
+WORDS = (
+    'книга фильм песня сюжет герой финал автор музыка роль сцена мир '
+    'история жанр ритм голос образ смысл время память дорога свет'
+).split()
+TEXTS_POOL_SIZE = 1000
+# Оценки смещены к 7-9, как в реальных отзывах.
+SCORES = range(1, 11)
+SCORE_WEIGHTS = (1, 1, 2, 2, 4, 6, 10, 12, 9, 5)
+PERIOD_END = datetime(2024, 1, 1, tzinfo=timezone.utc)
+PERIOD = timedelta(days=3 * 365)
+
+# Значение NULL в данных для COPY.
+NULL = '\\N'
+# Диапазон id сгенерированных объектов: first, first + 1, ...
+Ids = namedtuple('Ids', 'first count')
+
+
+def zipf_rank(rng, size, exponent):
+    """
+    Номер от 0 до size - 1 с вероятностью ~ 1 / (номер + 1) ** exponent.
+
+    Обратная функция распределения непрерывного степенного закона: выборка
+    не требует памяти под таблицу весов, поэтому годится для миллионов
+    объектов.
+    """
+    if exponent == 1:
+        value = (size + 1) ** rng.random()
+    else:
+        power = 1 - exponent
+        value = (1 + rng.random() * ((size + 1) ** power - 1)) ** (1 / power)
+    return min(int(value), size) - 1
+
+
+class Scatter:
+    """
+    Перестановка номеров 0..size - 1, по которой популярные объекты
+    разбрасываются по всему диапазону id, а не занимают первые.
+    """
+
+    def __init__(self, rng, size):
+        self.size = max(size, 1)
+        self.step = rng.randrange(self.size // 2, self.size) or 1
+        while gcd(self.step, self.size) != 1:
+            self.step += 1
+        self.offset = rng.randrange(self.size)
+
+    def __call__(self, rank):
+        return (rank * self.step + self.offset) % self.size
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерация синтетических данных для нагрузочного тестирования. '
+        'Число отзывов на произведение и комментариев на отзыв '
+        'распределено по закону Ципфа; при одинаковых параметрах и --seed '
+        'на пустой базе получаются одинаковые данные.'
+    )
+
+    def add_arguments(self, parser):
+        volumes = (('users', 1000), ('categories', 10), ('genres', 30),
+                   ('titles', 10000), ('reviews', 100000),
+                   ('comments', 300000))
+        for name, default in volumes:
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Количество объектов (по умолчанию {default}).',
+            )
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения Ципфа: чем больше, тем сильнее '
+                 'отзывы и комментарии сосредоточены на популярных объектах.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Вставлять пачки через COPY (только PostgreSQL).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одном bulk_create.',
+        )
+
+    def rng(self, table):
+        # Свой генератор у каждой таблицы: изменение объёма одной таблицы
+        # не меняет данные остальных.
+        return random.Random(f'{self.seed}:{table}')
+
+    def copy_rows(self, model, fields, rows):
+        """COPY пачки строк, остальные поля получают значения по умолчанию."""
+        quote = connection.ops.quote_name
+        provided = [model._meta.get_field(name) for name in fields]
+        defaults = [
+            field for field in model._meta.concrete_fields
+            if field not in provided and not field.primary_key
+        ]
+        constants = [field.get_db_prep_save(copy_default(field), connection)
+                     for field in defaults]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow([NULL if value is None else value
+                             for value in (*row, *constants)])
+        buffer.seek(0)
+        columns = ', '.join(quote(field.column)
+                            for field in (*provided, *defaults))
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(model._meta.db_table)} ({columns}) '
+                f"FROM STDIN WITH (FORMAT csv, NULL '{NULL}')",
+                buffer,
+            )
+
+    def insert(self, model, fields, rows):
+        started = time.monotonic()
+        inserted = 0
+        with keep_auto_now_add(model):
+            for batch in batched(rows, self.batch_size):
+                with transaction.atomic():
+                    if self.use_copy:
+                        self.copy_rows(model, fields, batch)
+                    else:
+                        model.objects.bulk_create(
+                            model(**dict(zip(fields, row))) for row in batch)
+                inserted += len(batch)
+                if inserted % (self.batch_size * 10) < len(batch):
+                    self.stdout.write(f'{model.__name__}: {inserted} rows')
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{model.__name__}: {inserted} rows generated in {elapsed:.1f}s '
+            f'({inserted / max(elapsed, 1e-6):.0f} rows/s)'
+        )
+        return inserted
+
+    def texts(self, rng, words):
+        """
+        Выбор из заранее собранных текстов длиной words слов: сборка
+        текста на каждую строку заметно замедляет генерацию.
+        """
+        pool = [
+            ' '.join(rng.choices(WORDS, k=rng.randint(*words))).capitalize()
+            for _ in range(TEXTS_POOL_SIZE)
+        ]
+        return lambda: rng.choice(pool)
+
+    def users(self, ids):
+        rng = self.rng('users')
+        roles = (User.USER, User.MODERATOR, User.ADMIN)
+        for pk in range(ids.first, ids.first + ids.count):
+            role = rng.choices(roles, (97, 2, 1))[0]
+            yield pk, f'user{pk}', f'user{pk}@yamdb.fake', role, '!'
+
+    def slugged(self, model, ids):
+        prefix = model.__name__.lower()
+        for pk in range(ids.first, ids.first + ids.count):
+            yield pk, f'{model._meta.verbose_name} {pk}', f'{prefix}-{pk}'
+
+    def titles(self, ids, categories):
+        rng = self.rng('titles')
+        text = self.texts(rng, (5, 20))
+        scatter = Scatter(rng, categories.count)
+        for pk in range(ids.first, ids.first + ids.count):
+            category = None
+            if categories.count:
+                category = categories.first + scatter(
+                    zipf_rank(rng, categories.count, self.zipf))
+            yield (pk, f'Произведение {pk}',
+                   rng.randint(1900, PERIOD_END.year),
+                   text(), category)
+
+    def genre_links(self, titles, genres):
+        rng = self.rng('genre_titles')
+        scatter = Scatter(rng, genres.count)
+        for title in range(titles.first, titles.first + titles.count):
+            size = rng.randint(1, min(3, genres.count))
+            linked = set()
+            while len(linked) < size:
+                linked.add(scatter(zipf_rank(rng, genres.count, self.zipf)))
+            for genre in sorted(linked):
+                yield title, genres.first + genre
+
+    def reviews_per_title(self, rng, titles, users, total):
+        """
+        Число отзывов каждого произведения. У отзывов на одно произведение
+        разные авторы, поэтому отзывы сверх числа пользователей достаются
+        следующим по популярности произведениям.
+        """
+        counts = [0] * titles.count
+        scatter = Scatter(rng, titles.count)
+        placed = 0
+        while placed < min(total, titles.count * users.count):
+            title = scatter(zipf_rank(rng, titles.count, self.zipf))
+            if counts[title] < users.count:
+                counts[title] += 1
+                placed += 1
+        return counts
+
+    def review_date(self, index, total):
+        # Даты отзывов растут вместе с id: дату отзыва для комментария
+        # можно вычислить, не храня отзывы в памяти.
+        return PERIOD_END - PERIOD + PERIOD * (index / max(total, 1))
+
+    def reviews(self, titles, users, counts, first):
+        rng = self.rng('reviews')
+        text = self.texts(rng, (10, 60))
+        total = sum(counts)
+        index = 0
+        for title, count in enumerate(counts):
+            for author in rng.sample(range(users.count), count):
+                yield (first + index, titles.first + title,
+                       users.first + author,
+                       rng.choices(SCORES, SCORE_WEIGHTS)[0],
+                       text(),
+                       self.review_date(index, total))
+                index += 1
+
+    def comments(self, ids, reviews, users):
+        rng = self.rng('comments')
+        text = self.texts(rng, (3, 30))
+        hot_reviews = Scatter(rng, reviews.count)
+        active_users = Scatter(rng, users.count)
+        for pk in range(ids.first, ids.first + ids.count):
+            review = hot_reviews(zipf_rank(rng, reviews.count, self.zipf))
+            published = self.review_date(review, reviews.count)
+            author = active_users(zipf_rank(rng, users.count, self.zipf))
+            yield (pk, reviews.first + review, users.first + author,
+                   text(),
+                   published + (PERIOD_END - published) * rng.random())
+
+    def check_options(self, options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        if min(options[name] for name in (
+                'users', 'categories', 'genres', 'titles', 'reviews',
+                'comments')) < 0:
+            raise CommandError('Volumes must not be negative.')
+        required = (('titles', 'genres'), ('reviews', 'titles'),
+                    ('reviews', 'users'), ('comments', 'reviews'),
+                    ('comments', 'users'))
+        for table, dependency in required:
+            if options[table] and not options[dependency]:
+                raise CommandError(
+                    f'--{table} requires at least one of --{dependency}.')
+
+    def next_ids(self, model, count):
+        last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        return Ids(last + 1, count)
+
+    def handle(self, *args, **options):
+        self.check_options(options)
+        self.seed = options['seed']
+        self.zipf = options['zipf']
+        self.batch_size = options['batch_size']
+        self.use_copy = options['copy']
+        if self.use_copy and connection.vendor != 'postgresql':
+            self.stderr.write('COPY is available only on PostgreSQL, '
+                              'falling back to bulk_create.')
+            self.use_copy = False
+        users = self.next_ids(User, options['users'])
+        categories = self.next_ids(Category, options['categories'])
+        genres = self.next_ids(Genre, options['genres'])
+        titles = self.next_ids(Title, options['titles'])
+        self.insert(User, ('id', 'username', 'email', 'role', 'password'),
+                    self.users(users))
+        for model, ids in ((Category, categories), (Genre, genres)):
+            self.insert(model, ('id', 'name', 'slug'),
+                        self.slugged(model, ids))
+        self.insert(Title,
+                    ('id', 'name', 'year', 'description', 'category_id'),
+                    self.titles(titles, categories))
+        self.insert(GenreTitle, ('title_id', 'genre_id'),
+                    self.genre_links(titles, genres))
+        counts = self.reviews_per_title(
+            self.rng('review_counts'), titles, users, options['reviews'])
+        first_review = self.next_ids(Review, 0).first
+        reviews = Ids(first_review, self.insert(
+            Review,
+            ('id', 'title_id', 'author_id', 'score', 'text', 'pub_date'),
+            self.reviews(titles, users, counts, first_review),
+        ))
+        if reviews.count < options['reviews']:
+            self.stdout.write(
+                f'{options["reviews"] - reviews.count} reviews skipped: '
+                f'every user has already reviewed every title.')
+        comments = self.next_ids(Comment, options['comments'])
+        self.insert(Comment,
+                    ('id', 'review_id', 'author_id', 'text', 'pub_date'),
+                    self.comments(comments, reviews, users))
+        reset_sequences(User, Category, Genre, Title, GenreTitle, Review,
+                        Comment)
+        recount_titles()
+        recount_reviews()
+        self.stdout.write('Title and review counters are recalculated!')
+        # Строки вставлены в обход моделей: сбрасываем кэш API целиком.
+        bump_all_versions()
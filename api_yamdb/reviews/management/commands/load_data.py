@@ -1,129 +1,207 @@
 import csv
+import os
+from collections import namedtuple
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
+from api.cache import bump_all_versions
+from reviews.counters import recount_reviews, recount_titles
+from reviews.management.bulk import (batched, copy_default, keep_auto_now_add,
+                                     reset_sequences)
 from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
 from users.models import User
 
+Table = namedtuple('Table', 'filename model renames foreign_keys')
+
+TABLES = (
+    Table('users.csv', User, {}, {}),
+    Table('category.csv', Category, {}, {}),
+    Table('genre.csv', Genre, {}, {}),
+    Table('titles.csv', Title, {'category': 'category_id'},
+          {'category_id': Category}),
+    Table('genre_title.csv', GenreTitle, {},
+          {'title_id': Title, 'genre_id': Genre}),
+    Table('review.csv', Review, {'author': 'author_id'},
+          {'title_id': Title, 'author_id': User}),
+    Table('comments.csv', Comment, {'author': 'author_id'},
+          {'review_id': Review, 'author_id': User}),
+)
+
+
+class ProgressReader:
+    """Файл для COPY, который сообщает о прочитанной доле данных."""
+
+    def __init__(self, file, total, report):
+        self.file = file
+        self.total = max(total, 1)
+        self.report = report
+        self.done = 0
+        self.reported = 0
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.done += len(data)
+        percent = min(100, self.done * 100 // self.total)
+        if percent >= self.reported + 10:
+            self.reported = percent
+            self.report(percent)
+        return data
+
 
 class Command(BaseCommand):
-    help = 'Загрузка данных из .csv файлов'
-
-    def _load_user(self):
-        with open(
-                'static/data/users.csv',
-                encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            object_list = []
-            for row in reader:
-                object_list.append(User(**row))
-            User.objects.bulk_create(objs=object_list)
-        self.stdout.write('Data for the User table is loaded!')
-
-    def _load_category(self):
-        with open(
-                'static/data/category.csv',
-                encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            object_list = []
-            for row in reader:
-                object_list.append(Category(**row))
-            Category.objects.bulk_create(objs=object_list)
-        self.stdout.write('Data for the Category table is loaded!')
-
-    def _load_genre(self):
-        with open(
-                'static/data/genre.csv',
-                encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            object_list = []
-            for row in reader:
-                object_list.append(Genre(**row))
-            Genre.objects.bulk_create(objs=object_list)
-        self.stdout.write('Data for the Genre table is loaded!')
-
-    def _load_title(self):
-        with open(
-                'static/data/titles.csv',
-                encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            object_list = []
-            for row in reader:
-                object_list.append(Title(
-                    pk=row['id'],
-                    name=row['name'],
-                    year=row['year'],
-                    category=Category.objects.get(pk=row['category']),
-                ))
-            Title.objects.bulk_create(objs=object_list)
-        self.stdout.write('Data for the Title table is loaded!')
-
-    def _load_genretitle(self):
-        with open(
-                'static/data/genre_title.csv',
-                encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            object_list = []
-            for row in reader:
-                object_list.append(GenreTitle(
-                    pk=row['id'],
-                    genre=Genre.objects.get(pk=row['genre_id']),
-                    title=Title.objects.get(pk=row['title_id']),
-                ))
-            GenreTitle.objects.bulk_create(objs=object_list)
-        self.stdout.write('Data for the GenreTitle table is loaded!')
-
-    def _load_review(self):
-        with open(
-                'static/data/review.csv',
-                encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                data = Review(
-                    pk=row['id'],
-                    title=Title.objects.get(pk=row['title_id']),
-                    text=row['text'],
-                    author=User.objects.get(pk=row['author']),
-                    score=row['score'],
-                    pub_date=row['pub_date'],
-                )
-                data.save()
-                Review.objects.filter(
-                    pk=row['id']).update(pub_date=row['pub_date']
-                                         )
-        self.stdout.write('Data for the Review table is loaded!')
-
-    def _load_comment(self):
-        with open(
-                'static/data/comments.csv',
-                encoding='utf-8'
-        ) as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                data = Comment(
-                    pk=row['id'],
-                    review=Review.objects.get(pk=row['review_id']),
-                    text=row['text'],
-                    author=User.objects.get(pk=row['author']),
-                    pub_date=row['pub_date'],
-                )
-                data.save()
-                Comment.objects.filter(
-                    pk=row['id']).update(pub_date=row['pub_date']
-                                         )
-        self.stdout.write('Data for the Comment table is loaded!')
+    help = (
+        'Загрузка данных из .csv файлов. Повторный запуск после сбоя '
+        'продолжает загрузку: уже загруженные строки пропускаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Каталог с .csv файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одном bulk_create.',
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Загружать через COPY (только PostgreSQL).',
+        )
+
+    def _row_fields(self, row, table, known_ids):
+        """
+        Поля модели из строки .csv или None, если строку нужно пропустить.
+
+        Ссылка на отсутствующий объект обнуляется у необязательных внешних
+        ключей, а строка с такой ссылкой в обязательном ключе пропускается.
+        """
+        fields = {table.renames.get(key, key): value
+                  for key, value in row.items()}
+        for name, ids in known_ids.items():
+            if fields[name] and int(fields[name]) in ids:
+                continue
+            if not table.model._meta.get_field(name).null:
+                return None
+            fields[name] = None
+        return fields
+
+    def _load_bulk(self, table, path, batch_size):
+        known_ids = {
+            name: set(model.objects.values_list('pk', flat=True))
+            for name, model in table.foreign_keys.items()
+        }
+        # ignore_conflicts не сообщает, сколько строк вставлено: вставленные
+        # считаются по числу строк в таблице до и после загрузки.
+        before = table.model.objects.count()
+        processed = 0
+        with keep_auto_now_add(table.model), open(
+                path, encoding='utf-8', newline='') as csvfile:
+            rows = csv.DictReader(csvfile)
+            for batch in batched(rows, batch_size):
+                objects = []
+                for row in batch:
+                    fields = self._row_fields(row, table, known_ids)
+                    if fields is not None:
+                        objects.append(table.model(**fields))
+                with transaction.atomic():
+                    table.model.objects.bulk_create(
+                        objects, ignore_conflicts=True)
+                processed += len(batch)
+                self.stdout.write(
+                    f'{table.model.__name__}: {processed} rows processed')
+        loaded = table.model.objects.count() - before
+        return loaded, processed - loaded
+
+    def _copy_sql(self, table, columns):
+        quote = connection.ops.quote_name
+        model = table.model
+        db_table = quote(model._meta.db_table)
+        names = ', '.join(map(quote, columns))
+        defaults = {
+            field.column: copy_default(field)
+            for field in model._meta.concrete_fields
+            if field.column not in columns and not field.primary_key
+        }
+        values = {column: f's.{quote(column)}' for column in columns}
+        conditions = ['TRUE']
+        for column, related in table.foreign_keys.items():
+            exists = (
+                f'EXISTS (SELECT 1 FROM {quote(related._meta.db_table)} r '
+                f'WHERE r.id = s.{quote(column)})'
+            )
+            if model._meta.get_field(column).null:
+                values[column] = (
+                    f'CASE WHEN {exists} THEN {values[column]} END')
+            else:
+                conditions.append(exists)
+        insert = (
+            f'INSERT INTO {db_table} '
+            f'({", ".join(map(quote, [*columns, *defaults]))}) '
+            f'SELECT {", ".join(values.values())}'
+            f'{"".join(", %s" for _ in defaults)} '
+            f'FROM load_staging s WHERE {" AND ".join(conditions)} '
+            f'ON CONFLICT DO NOTHING'
+        )
+        return (
+            f'CREATE TEMP TABLE load_staging ON COMMIT DROP AS '
+            f'SELECT {names} FROM {db_table} WITH NO DATA',
+            f'COPY load_staging ({names}) FROM STDIN WITH (FORMAT csv)',
+            insert,
+            list(defaults.values()),
+        )
+
+    def _load_copy(self, table, path):
+        with open(path, 'rb') as csvfile:
+            header = next(csv.reader(
+                [csvfile.readline().decode('utf-8-sig')]))
+            columns = [
+                table.model._meta.get_field(
+                    table.renames.get(name, name)).column
+                for name in header
+            ]
+            create, copy, insert, params = self._copy_sql(table, columns)
+            reader = ProgressReader(
+                csvfile, os.path.getsize(path),
+                lambda percent: self.stdout.write(
+                    f'{table.model.__name__}: {percent}% copied')
+            )
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(create)
+                cursor.copy_expert(copy, reader)
+                cursor.execute('SELECT count(*) FROM load_staging')
+                staged = cursor.fetchone()[0]
+                cursor.execute(insert, params)
+                loaded = cursor.rowcount
+        return loaded, staged - loaded
 
     def handle(self, *args, **options):
-        self._load_user()
-        self._load_category()
-        self._load_genre()
-        self._load_title()
-        self._load_genretitle()
-        self._load_review()
-        self._load_comment()
+        use_copy = options['copy']
+        if use_copy and connection.vendor != 'postgresql':
+            self.stderr.write('COPY is available only on PostgreSQL, '
+                              'falling back to bulk_create.')
+            use_copy = False
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        for table in TABLES:
+            path = os.path.join(options['data_dir'], table.filename)
+            if use_copy:
+                loaded, skipped = self._load_copy(table, path)
+            else:
+                loaded, skipped = self._load_bulk(
+                    table, path, options['batch_size'])
+            self.stdout.write(
+                f'Data for the {table.model.__name__} table is loaded! '
+                f'({loaded} rows, {skipped} skipped)'
+            )
+        reset_sequences(*(table.model for table in TABLES))
+        recount_titles()
+        recount_reviews()
+        self.stdout.write('Title and review counters are recalculated!')
+        # Строки вставлены в обход моделей: сбрасываем кэш API целиком.
+        bump_all_versions()
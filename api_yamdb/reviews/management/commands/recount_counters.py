@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import bump_all_versions
+from reviews.counters import (recount_reviews, recount_titles,
+                              reviews_with_drift, titles_with_drift)
+from reviews.management.bulk import batched
+from reviews.models import Review, Title
+
+RECOUNT = {
+    'titles': (Title, recount_titles),
+    'reviews': (Review, recount_reviews),
+}
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт (или проверка) счётчиков произведений '
+            'и числа комментариев отзывов: пересчитываются только '
+            'разошедшиеся записи, пачками в отдельных транзакциях')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, ничего не изменяя.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help='Сколько записей пересчитывать в одной транзакции.',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        drifted = {
+            'titles': list(titles_with_drift().values_list('pk', flat=True)),
+            'reviews': list(reviews_with_drift().values_list('pk', flat=True)),
+        }
+        if options['check']:
+            errors = [
+                f'Counters are out of sync for {len(ids)} {name}: '
+                f'{", ".join(map(str, ids[:20]))}'
+                for name, ids in drifted.items() if ids
+            ]
+            if errors:
+                raise CommandError('\n'.join(errors))
+            self.stdout.write('Title and review counters are in sync!')
+            return
+        for name, ids in drifted.items():
+            model, recount = RECOUNT[name]
+            for batch in batched(ids, options['batch_size']):
+                with transaction.atomic():
+                    recount(model.objects.filter(pk__in=batch))
+            self.stdout.write(
+                f'Counters for {len(ids)} {name} are recalculated!')
+        if any(drifted.values()):
+            bump_all_versions()
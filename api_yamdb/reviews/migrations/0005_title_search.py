@@ -0,0 +1,50 @@
+from django.db import migrations
+
+from reviews.search import SQLITE_FTS_INSTALL, SQLITE_FTS_UNINSTALL
+
+POSTGRESQL_FORWARD = (
+    """
+    ALTER TABLE reviews_title ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian'::regconfig,
+                              coalesce(name, '')), 'A')
+        || setweight(to_tsvector('russian'::regconfig,
+                                 coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX title_search_vector_idx ON reviews_title '
+    'USING gin (search_vector)',
+)
+POSTGRESQL_BACKWARD = (
+    'ALTER TABLE reviews_title DROP COLUMN search_vector',
+)
+
+STATEMENTS = {
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+    'sqlite': (SQLITE_FTS_INSTALL, SQLITE_FTS_UNINSTALL),
+}
+
+
+def run(direction):
+    def operation(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        for statement in STATEMENTS.get(vendor, ((), ()))[direction]:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+    """
+    Поисковый индекс произведений вне моделей Django.
+
+    PostgreSQL: хранимый генерируемый столбец search_vector с GIN-индексом.
+    SQLite: внешняя таблица FTS5, которую поддерживают триггеры.
+    """
+
+    dependencies = [
+        ('reviews', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(0), run(1)),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from api_yamdb.db.migrations import run_sql
+
+# Поиск произведений в админке по началу названия,
+# см. users/migrations/0003_prefix_search_indexes.py.
+FORWARD = (
+    'CREATE INDEX title_name_prefix_idx ON reviews_title '
+    '(UPPER(name::text) text_pattern_ops)',
+)
+BACKWARD = (
+    'DROP INDEX title_name_prefix_idx',
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_access_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql('postgresql', FORWARD),
+                             run_sql('postgresql', BACKWARD)),
+    ]
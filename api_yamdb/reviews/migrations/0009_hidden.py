@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_prefix_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='hidden',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Скрыто'),
+        ),
+    ]
@@ -14,15 +14,22 @@ class ReviewCommentBaseModel(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    # Индекс - составной (родитель, updated_at, id) в Meta наследников.
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
+    # Индекс по автору - составной (author, pub_date) в Meta наследников.
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False,
     )
 
     class Meta:
         abstract = True
-        ordering = ('pub_date',)
+        ordering = ('pub_date', 'id')
 
     def __str__(self):
         return self.text[:30]
@@ -33,6 +40,11 @@ class CategoryGenreBaseModel(models.Model):
         'Наименование', max_length=settings.NAME_MAX_LENGTH
     )
     slug = models.SlugField(unique=True, max_length=settings.SLUG_MAX_LENGTH)
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
 
     class Meta:
         abstract = True
@@ -75,39 +87,89 @@ class Title(models.Model):
         related_name='categories',
         null=True,
         blank=True,
+        db_index=False,
     )
     genre = models.ManyToManyField(Genre, through='GenreTitle')
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    reviews_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False,
+        db_index=True,
+    )
+    rating = models.FloatField(
+        'Рейтинг',
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+    )
+    # Удалено через API и ждёт удаления отзывов, см. api/purge.py.
+    hidden = models.BooleanField(
+        'Скрыто',
+        default=False,
+        editable=False,
+    )
+    # Меняется и при пересчёте рейтинга, см. reviews/counters.py.
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
-        ordering = ('name',)
+        ordering = ('name', 'id')
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+            # Фильтр по категории с сортировкой по умолчанию.
+            models.Index(fields=('category', 'name', 'id'),
+                         name='title_category_name_idx'),
+            # Лента изменений ?updated_since=.
+            models.Index(fields=('updated_at', 'id'),
+                         name='title_updated_at_idx'),
+        ]
 
     def __str__(self):
         return self.name[:30]
 
 
 class GenreTitle(models.Model):
+    # Отдельные индексы не нужны: их заменяют unique_genre_title
+    # (title, genre) и genre_title_idx (genre, title).
     title = models.ForeignKey(
         Title,
         verbose_name='Произведение',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     genre = models.ForeignKey(
         Genre,
         verbose_name='Жанр',
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
     class Meta:
         verbose_name = 'Произведение и жанр'
         verbose_name_plural = 'Произведения и жанры'
         ordering = ('id',)
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'genre'],
+                                    name='unique_genre_title')
+        ]
+        indexes = [
+            models.Index(fields=('genre', 'title'), name='genre_title_idx'),
+        ]
 
     def __str__(self):
         return (
-            f'Произведение:{self.title[:30]},'
-            f'\nЖанр:{self.genre[:30]}'
+            f'Произведение:{str(self.title)[:30]},'
+            f'\nЖанр:{str(self.genre)[:30]}'
         )
 
 
@@ -124,6 +186,12 @@ class Review(ReviewCommentBaseModel):
         Title,
         verbose_name='Произведение',
         on_delete=models.CASCADE,
+        db_index=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
     )
 
     class Meta(ReviewCommentBaseModel.Meta):
@@ -134,6 +202,14 @@ class Review(ReviewCommentBaseModel):
             models.UniqueConstraint(fields=['title', 'author'],
                                     name='unique_review')
         ]
+        indexes = [
+            models.Index(fields=('title', 'pub_date', 'id'),
+                         name='review_title_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='review_author_pub_date_idx'),
+            models.Index(fields=('title', 'updated_at', 'id'),
+                         name='review_title_updated_at_idx'),
+        ]
 
 
 class Comment(ReviewCommentBaseModel):
@@ -141,9 +217,46 @@ class Comment(ReviewCommentBaseModel):
         Review,
         verbose_name='Отзыв',
         on_delete=models.CASCADE,
+        db_index=False,
     )
 
     class Meta(ReviewCommentBaseModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        indexes = [
+            models.Index(fields=('review', 'pub_date', 'id'),
+                         name='comment_review_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='comment_author_pub_date_idx'),
+            models.Index(fields=('review', 'updated_at', 'id'),
+                         name='comment_review_updated_at_idx'),
+        ]
+
+
+class Tombstone(models.Model):
+    """
+    Запись об удалении для ленты изменений: <ресурс>/deleted/.
+
+    parent_id - произведение удалённого отзыва или отзыв удалённого
+    комментария, у произведений - NULL. Записи старше
+    TOMBSTONE_RETENTION_DAYS удаляет purge_hidden.
+    """
+    resource = models.CharField('Ресурс', max_length=16)
+    parent_id = models.PositiveIntegerField('Родитель', null=True)
+    object_id = models.PositiveIntegerField('Объект')
+    deleted_at = models.DateTimeField('Дата удаления', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Удалённый объект'
+        verbose_name_plural = 'Удалённые объекты'
+        ordering = ('deleted_at', 'id')
+        indexes = [
+            models.Index(fields=('resource', 'parent_id', 'deleted_at', 'id'),
+                         name='tombstone_feed_idx'),
+            models.Index(fields=('deleted_at',),
+                         name='tombstone_deleted_at_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.resource}:{self.object_id}'
@@ -0,0 +1,161 @@
+from django.db import connection, connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import Expression, RawSQL
+
+from reviews.models import Title
+
+# Конфигурация должна совпадать с выражением столбца search_vector
+# в миграции 0005_title_search.
+SEARCH_CONFIG = 'russian'
+FTS_TABLE = 'reviews_title_fts'
+
+SQLITE_FTS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_insert
+    AFTER INSERT ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts (rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_delete
+    AFTER DELETE ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts
+            (reviews_title_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS reviews_title_fts_update
+    AFTER UPDATE OF name, description ON reviews_title
+    BEGIN
+        INSERT INTO reviews_title_fts
+            (reviews_title_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO reviews_title_fts (rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+)
+SQLITE_FTS_REBUILD = (
+    "INSERT INTO reviews_title_fts (reviews_title_fts) VALUES ('rebuild')"
+)
+SQLITE_FTS_INSTALL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS reviews_title_fts USING fts5("
+    "name, description, content='reviews_title', content_rowid='id')",
+    *SQLITE_FTS_TRIGGERS,
+    SQLITE_FTS_REBUILD,
+)
+SQLITE_FTS_UNINSTALL = (
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+
+
+def restore_sqlite_fts(using, **kwargs):
+    """
+    Возвращает триггеры FTS5 после миграций.
+
+    SQLite пересоздаёт таблицу при изменении её схемы, и триггеры
+    reviews_title при этом теряются. Обработчик post_migrate создаёт их
+    заново и перестраивает индекс, если их не оказалось.
+    """
+    database = connections[using]
+    if database.vendor != 'sqlite':
+        return
+    with database.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' "
+            "AND name LIKE 'reviews_title_fts_%'"
+        )
+        if cursor.fetchone()[0] == len(SQLITE_FTS_TRIGGERS):
+            return
+        for statement in SQLITE_FTS_INSTALL:
+            cursor.execute(statement)
+
+
+class SearchVectorSQL(Expression):
+    """
+    SQL со столбцом search_vector, которого нет среди полей модели.
+
+    Таблица берётся по псевдониму из самого запроса, а не по имени, поэтому
+    выборку с поиском можно использовать и как подзапрос
+    (title__in=titles.values('pk')), где таблица называется U0.
+    """
+
+    def __init__(self, template, params, output_field):
+        super().__init__(output_field=output_field)
+        self.template = template
+        self.params = params
+
+    def as_sql(self, compiler, connection):
+        alias = compiler.quote_name_unless_alias(
+            compiler.query.get_initial_alias())
+        return (self.template.format(column=f'{alias}.search_vector'),
+                self.params)
+
+
+def _postgresql_search(queryset, query):
+    tsquery = 'websearch_to_tsquery(%s::regconfig, %s)'
+    params = (SEARCH_CONFIG, query)
+    return queryset.filter(
+        SearchVectorSQL(f'{{column}} @@ {tsquery}', params,
+                        output_field=BooleanField())
+    ).annotate(
+        search_rank=SearchVectorSQL(f'ts_rank({{column}}, {tsquery})', params,
+                                    output_field=FloatField())
+    )
+
+
+def _fts5_query(query):
+    """
+    Каждое слово запроса - отдельный префиксный терм FTS5.
+
+    Слова экранируются как фразы, поэтому операторы FTS5 из запроса
+    не интерпретируются; префикс заменяет отсутствующий в SQLite стемминг.
+    """
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""')) for word in query.split()
+    )
+
+
+def _sqlite_search(queryset, query):
+    match = _fts5_query(query)
+    table = connection.ops.quote_name(Title._meta.db_table)
+    return queryset.filter(
+        pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        )
+    ).annotate(
+        # bm25 тем меньше, чем лучше совпадение.
+        search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+            (match,), output_field=FloatField()
+        )
+    )
+
+
+def search_titles(queryset, query):
+    """
+    Полнотекстовый поиск произведений по названию и описанию.
+
+    Добавляет к выборке аннотацию search_rank (больше - релевантнее).
+    В PostgreSQL используется хранимый tsvector с GIN-индексом,
+    в SQLite - виртуальная таблица FTS5.
+    """
+    no_rank = Value(0.0, output_field=FloatField())
+    if not query.split():
+        return queryset.annotate(search_rank=no_rank)
+    if connection.vendor == 'postgresql':
+        return _postgresql_search(queryset, query)
+    if connection.vendor == 'sqlite':
+        return _sqlite_search(queryset, query)
+    return queryset.filter(
+        Q(name__icontains=query) | Q(description__icontains=query)
+    ).annotate(search_rank=no_rank)
@@ -1,12 +1,25 @@
 from django.contrib import admin
 
-from .models import User
+from api_yamdb.admin import LargeTableAdmin
+
+from .models import OutgoingEmail, User
 
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = ('pk', 'username', 'email', 'role')
     list_filter = ('role',)
     list_editable = ('role',)
-    search_fields = ('username',)
+    search_fields = ('^username', '^email')
     empty_value_display = '-пусто-'
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'subject', 'status', 'attempts',
+                    'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('recipient',)
+    # В тексте письма - код подтверждения.
+    exclude = ('body',)
+    readonly_fields = ('created', 'sent_at', 'last_error')
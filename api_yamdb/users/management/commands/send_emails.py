@@ -0,0 +1,96 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from users.outbox import claim_batch, deliver, prune_emails, record_results
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправка писем из очереди. Письма забираются пачками и '
+        'рассылаются пулом потоков, каждый поток использует одно '
+        'соединение с почтовым сервером на пачку. Когда очередь пуста, '
+        'удаляются старые отправленные и недоставленные письма.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков отправки.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Количество писем, забираемых из очереди за раз.',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+            help='После стольких неудачных попыток письмо не отправляется.',
+        )
+        parser.add_argument(
+            '--lease',
+            type=int,
+            default=300,
+            help='Через сколько секунд незавершённая пачка вернётся '
+                 'в очередь.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и завершиться.',
+        )
+
+    def send_batch(self, executor, emails, workers, max_attempts):
+        chunks = [emails[index::workers] for index in range(workers)]
+        results = {}
+        for chunk_results in executor.map(deliver, filter(None, chunks)):
+            results.update(chunk_results)
+        return record_results(emails, results, max_attempts)
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers and --batch-size must be positive.')
+        lease = timedelta(seconds=options['lease'])
+        totals = [0, 0, 0]
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                emails = claim_batch(options['batch_size'], lease)
+                if not emails:
+                    prune_emails(options['batch_size'])
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                batch_started = time.monotonic()
+                counts = self.send_batch(
+                    executor, emails, workers, options['max_attempts'])
+                totals = [total + count
+                          for total, count in zip(totals, counts)]
+                self.stdout.write(self.report(
+                    'Batch', counts, time.monotonic() - batch_started))
+        self.stdout.write(self.report(
+            'Total', totals, time.monotonic() - started))
+
+    def report(self, label, counts, elapsed):
+        sent, retried, dead = counts
+        rate = sent / elapsed if elapsed else 0
+        return (
+            f'{label}: {sent} sent, {retried} to retry, {dead} dead '
+            f'in {elapsed:.2f}s ({rate:.1f} emails/s)'
+        )
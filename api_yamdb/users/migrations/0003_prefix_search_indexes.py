@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from api_yamdb.db.migrations import run_sql
+
+# Поиск админки по префиксу: istartswith в PostgreSQL - это
+# UPPER(поле::text) LIKE 'ПРЕФИКС%', а LIKE использует индекс
+# только с классом операторов text_pattern_ops.
+FORWARD = (
+    'CREATE INDEX user_username_prefix_idx ON users_user '
+    '(UPPER(username::text) text_pattern_ops)',
+    'CREATE INDEX user_email_prefix_idx ON users_user '
+    '(UPPER(email::text) text_pattern_ops)',
+)
+BACKWARD = (
+    'DROP INDEX user_username_prefix_idx',
+    'DROP INDEX user_email_prefix_idx',
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outgoing_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_sql('postgresql', FORWARD),
+                             run_sql('postgresql', BACKWARD)),
+    ]
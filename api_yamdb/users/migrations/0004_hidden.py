@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 05:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_prefix_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='hidden',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Скрыт'),
+        ),
+    ]
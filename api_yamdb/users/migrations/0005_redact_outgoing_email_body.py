@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def redact_bodies(apps, schema_editor):
+    OutgoingEmail = apps.get_model('users', 'OutgoingEmail')
+    OutgoingEmail.objects.filter(status__in=('sent', 'dead')).exclude(
+        body='').update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_hidden'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_bodies, migrations.RunPython.noop),
+    ]
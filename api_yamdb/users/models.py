@@ -3,6 +3,7 @@ import re
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
 
 
@@ -63,6 +64,12 @@ class User(AbstractUser):
         null=True,
         blank=True
     )
+    # Удалён через API и ждёт удаления отзывов, см. api/purge.py.
+    hidden = models.BooleanField(
+        'Скрыт',
+        default=False,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -83,3 +90,41 @@ class User(AbstractUser):
             or self.is_superuser
             or self.is_staff
         )
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (outbox)."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (DEAD, 'Не доставлено'),
+    )
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    recipient = models.EmailField(
+        'Получатель', max_length=settings.EMAIL_MAX_LENGTH)
+    status = models.CharField(
+        'Статус', max_length=max([len(value) for value, name in STATUSES]),
+        choices=STATUSES, default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('next_attempt_at', 'id')
+        indexes = [
+            models.Index(fields=('status', 'next_attempt_at', 'id'),
+                         name='outgoing_email_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_email(subject, body, recipient):
+    """Ставит письмо в очередь; отправит его команда send_emails."""
+    return OutgoingEmail.objects.create(
+        subject=subject, body=body, recipient=recipient)
+
+
+def claim_batch(size, lease):
+    """
+    Забирает из очереди до size писем, готовых к отправке.
+
+    Строки блокируются с SKIP LOCKED, поэтому параллельные обработчики
+    получают разные письма. Следующая попытка сдвигается на время lease:
+    если обработчик упадёт, не записав результат, письма вернутся
+    в очередь по его истечении.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                status=OutgoingEmail.PENDING, next_attempt_at__lte=now,
+            ).order_by('next_attempt_at', 'id')[:size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(next_attempt_at=now + lease)
+    return emails
+
+
+def deliver(emails):
+    """
+    Отправляет письма через одно соединение с почтовым сервером.
+
+    Возвращает словарь {pk: текст ошибки или None}. Функция не обращается
+    к базе данных и может выполняться в отдельном потоке.
+    """
+    results = {}
+    try:
+        with get_connection() as connection:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, settings.FROM_EMAIL,
+                    [email.recipient], connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    results[email.pk] = repr(error)
+                else:
+                    results[email.pk] = None
+    except Exception as error:
+        # Соединение не открылось или оборвалось при закрытии.
+        for email in emails:
+            results.setdefault(email.pk, repr(error))
+    return results
+
+
+def retry_delay(attempts):
+    """Экспоненциальная пауза перед следующей попыткой."""
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def record_results(emails, results, max_attempts):
+    """
+    Сохраняет результаты отправки и возвращает число отправленных,
+    отложенных и окончательно недоставленных писем. Текст отправленных
+    и недоставленных писем (в нём код подтверждения) стирается.
+    """
+    now = timezone.now()
+    sent = [pk for pk, error in results.items() if error is None]
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT, sent_at=now, last_error='', body='',
+        attempts=F('attempts') + 1,
+    )
+    failed = [email for email in emails if results.get(email.pk)]
+    dead = 0
+    for email in failed:
+        email.attempts += 1
+        email.last_error = results[email.pk]
+        if email.attempts >= max_attempts:
+            email.status = OutgoingEmail.DEAD
+            email.body = ''
+            dead += 1
+        else:
+            email.next_attempt_at = now + retry_delay(email.attempts)
+    OutgoingEmail.objects.bulk_update(
+        failed,
+        ('attempts', 'last_error', 'status', 'next_attempt_at', 'body'),
+    )
+    return len(sent), len(failed) - dead, dead
+
+
+def prune_emails(batch_size):
+    """
+    Удаляет отправленные и недоставленные письма, последняя попытка
+    которых была раньше EMAIL_OUTBOX_RETENTION_DAYS дней назад, пачками
+    по batch_size строк. Возвращает число удалённых писем.
+    """
+    queryset = OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.SENT, OutgoingEmail.DEAD),
+        next_attempt_at__lt=timezone.now() - timedelta(
+            days=settings.EMAIL_OUTBOX_RETENTION_DAYS),
+    )
+    pruned = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if ids:
+            OutgoingEmail.objects.filter(pk__in=ids).delete()
+        pruned += len(ids)
+        if len(ids) < batch_size:
+            return pruned
@@ -0,0 +1,102 @@
+"""
+Нагрузочный тест HTTP API без внешних зависимостей.
+
+N потоков в течение заданного времени отправляют GET-запросы по списку
+адресов (каждый поток держит своё keep-alive соединение) и считают
+запросы в секунду и перцентили задержки.
+
+    python benchmarks/http_load.py http://127.0.0.1:8000/api/v1/titles/ \
+        --concurrency 32 --duration 20
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * fraction))
+    return values[index]
+
+
+def worker(urls, headers, deadline, latencies, errors, offset):
+    parts = urlsplit(urls[0])
+    connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+    index = offset
+    while time.monotonic() < deadline:
+        parts = urlsplit(urls[index % len(urls)])
+        index += 1
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        started = time.monotonic()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(type(error).__name__)
+            connection.close()
+            connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+            continue
+        latencies.append(time.monotonic() - started)
+    connection.close()
+
+
+def run(urls, concurrency, duration, headers):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    threads = [
+        threading.Thread(target=worker, args=(
+            urls, headers, deadline, latencies, errors, offset))
+        for offset in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('urls', nargs='+', help='Адреса для GET-запросов.')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--token', help='JWT для заголовка Authorization.')
+    parser.add_argument('--json', action='store_true',
+                        help='Вывести результат одной строкой JSON.')
+    args = parser.parse_args()
+    headers = {'Accept': 'application/json'}
+    if args.token:
+        headers['Authorization'] = f'Bearer {args.token}'
+    if args.warmup:
+        run(args.urls, args.concurrency, args.warmup, headers)
+    result = run(args.urls, args.concurrency, args.duration, headers)
+    if args.json:
+        print(json.dumps(result))
+        return
+    print(
+        f'{result["requests"]} requests, {result["errors"]} errors, '
+        f'{result["rps"]} req/s, p50 {result["p50_ms"]} ms, '
+        f'p99 {result["p99_ms"]} ms'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+TCP-прокси, добавляющий задержку к каждому пакету в обе стороны.
+
+Эмулирует базу данных в другой зоне доступности: приложение подключается
+к прокси (DB_PORT), прокси - к настоящей базе.
+
+    python benchmarks/latency_proxy.py --listen 6432 --target localhost:5432 \
+        --delay-ms 2
+"""
+import argparse
+import asyncio
+
+
+async def pipe(reader, writer, delay):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            await asyncio.sleep(delay)
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def handler(host, port, delay):
+    async def handle(client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(
+                host, port)
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(
+            pipe(client_reader, server_writer, delay),
+            pipe(server_reader, client_writer, delay),
+        )
+    return handle
+
+
+async def serve(args):
+    host, port = args.target.rsplit(':', 1)
+    server = await asyncio.start_server(
+        handler(host, int(port), args.delay_ms / 1000),
+        '127.0.0.1', args.listen,
+    )
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--listen', type=int, default=6432)
+    parser.add_argument('--target', default='localhost:5432')
+    parser.add_argument('--delay-ms', type=float, default=2)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Сценарии нагрузки на API.
+
+Сценарий - генератор, который отдаёт запросы Request и получает в ответ
+пару (статус, тело JSON или None), поэтому может идти по ссылкам next
+и использовать результаты предыдущих запросов. Модели импортируются
+внутри функций: модуль загружается до django.setup().
+"""
+import itertools
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+Request = namedtuple('Request', 'method path data token',
+                     defaults=(None, None))
+
+API = '/api/v1'
+REVIEW_PAGES = 5
+
+
+class Dataset:
+    """Объекты базы, к которым обращаются сценарии."""
+
+    def __init__(self, hot_titles=10, values=5):
+        from reviews.models import Category, Genre, Title
+
+        titles = Title.objects.order_by('id')
+        self.titles = list(titles.values_list('id', flat=True))
+        self.hot_titles = list(titles.order_by('-reviews_count', 'id')
+                               .values_list('id', flat=True)[:hot_titles])
+        self.genres = list(Genre.objects.values_list('slug', flat=True)
+                           [:values])
+        self.categories = list(Category.objects.values_list('slug', flat=True)
+                               [:values])
+        self.years = list(titles.order_by('year').values_list(
+            'year', flat=True).distinct()[:values])
+        if not self.titles:
+            raise ValueError('Нет произведений: сгенерируйте данные.')
+        # Имена новых пользователей не повторяются между запусками.
+        self.run_id = f'{time.time_ns():x}'
+        self.counter = itertools.count()
+
+    def name(self, prefix):
+        return f'{prefix}{self.run_id}x{next(self.counter)}'
+
+    def create_user(self, prefix):
+        from api.authentication import RoleAccessToken
+        from users.models import User
+
+        name = self.name(prefix)
+        user = User.objects.create(username=name, email=f'{name}@bench.fake')
+        return str(RoleAccessToken.for_user(user))
+
+
+def relative(url):
+    parts = urlsplit(url)
+    return parts.path + (f'?{parts.query}' if parts.query else '')
+
+
+def browse_titles(dataset):
+    """Аноним листает произведения с фильтрами и сортировкой."""
+    queries = ['', '?page=2', '?ordering=-rating', '?name=1']
+    queries += [f'?genre={slug}' for slug in dataset.genres]
+    queries += [f'?category={slug}&ordering=-year'
+                for slug in dataset.categories]
+    queries += [f'?year={year}' for year in dataset.years]
+    for query in itertools.cycle(queries):
+        yield Request('GET', f'{API}/titles/{query}')
+
+
+def hot_reviews(dataset):
+    """Первые страницы отзывов самых обсуждаемых произведений (курсор)."""
+    for title in itertools.cycle(dataset.hot_titles):
+        path = f'{API}/titles/{title}/reviews/?pagination=cursor'
+        for _ in range(REVIEW_PAGES):
+            _, body = yield Request('GET', path)
+            if not body or not body.get('next'):
+                break
+            path = relative(body['next'])
+
+
+def signup_token(dataset):
+    """Регистрация и получение токена по коду подтверждения."""
+    from django.contrib.auth.tokens import default_token_generator
+
+    from users.models import User
+
+    while True:
+        name = dataset.name('signup')
+        yield Request('POST', f'{API}/auth/signup/',
+                      {'username': name, 'email': f'{name}@bench.fake'})
+        user = User.objects.get(username=name)
+        yield Request('POST', f'{API}/auth/token/', {
+            'username': name,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+
+
+def post_review(dataset):
+    """Новый пользователь пишет отзывы на произведения по очереди."""
+    while True:
+        token = dataset.create_user('writer')
+        for title in dataset.titles:
+            yield Request('POST', f'{API}/titles/{title}/reviews/',
+                          {'text': 'Отзыв из бенчмарка', 'score': 7}, token)
+
+
+SCENARIOS = {
+    'browse_titles': browse_titles,
+    'hot_reviews': hot_reviews,
+    'signup_token': signup_token,
+    'post_review': post_review,
+}
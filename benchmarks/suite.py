@@ -0,0 +1,296 @@
+"""
+Бенчмарк сценариев API с проверкой по сохранённому базовому уровню.
+
+По умолчанию создаёт тестовую базу, заполняет её generate_dataset
+и выполняет сценарии (benchmarks/scenarios.py) в процессе через тестовый
+клиент Django, считая запросы к базе. С --url сценарии идут к запущенному
+серверу: настройки Django (DB_*, SECRET_KEY) должны указывать на его базу,
+в ней создаются пользователи и коды подтверждения.
+
+    python -m benchmarks.suite
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite --url http://127.0.0.1:8000 --concurrency 8
+
+Результат сравнивается с benchmarks/baseline.json: больше запросов к базе
+на HTTP-запрос, ошибки, падение req/s или рост p50 больше --tolerance
+завершают команду с кодом 1.
+"""
+import argparse
+import http.client
+import io
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .scenarios import SCENARIOS, Dataset
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).with_name('baseline.json')
+DATASET = ('--users', '300', '--categories', '5', '--genres', '10',
+           '--titles', '500', '--reviews', '5000', '--comments', '10000')
+
+
+def setup_django():
+    sys.path.insert(0, str(ROOT / 'api_yamdb'))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+    import django
+
+    django.setup()
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def decode(content):
+    try:
+        return json.loads(content)
+    except ValueError:
+        return None
+
+
+class InProcessClient:
+    """Запросы через тестовый клиент Django с подсчётом запросов к базе."""
+    counts_queries = True
+
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client(raise_request_exception=False)
+        self.queries = 0
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def __call__(self, request):
+        from django.db import connections
+
+        extra = {}
+        if request.token:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {request.token}'
+        if request.data is not None:
+            extra.update(data=json.dumps(request.data),
+                         content_type='application/json')
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(self.count_query))
+            response = self.client.generic(
+                request.method, request.path, **extra)
+        return response.status_code, decode(response.content)
+
+
+class HTTPClient:
+    """Запросы к запущенному серверу через keep-alive соединение."""
+    counts_queries = False
+
+    def __init__(self, url):
+        self.netloc = urlsplit(url).netloc
+        self.connection = http.client.HTTPConnection(self.netloc, timeout=30)
+        self.queries = 0
+
+    def __call__(self, request):
+        headers = {'Accept': 'application/json'}
+        body = None
+        if request.token:
+            headers['Authorization'] = f'Bearer {request.token}'
+        if request.data is not None:
+            body = json.dumps(request.data)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(request.method, request.path, body,
+                                    headers)
+            response = self.connection.getresponse()
+            return response.status, decode(response.read())
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(
+                self.netloc, timeout=30)
+            return 0, None
+
+
+def drive(scenario, dataset, client, requests, latencies, errors):
+    """Выполняет requests запросов сценария одним клиентом."""
+    from django.db import connections
+
+    steps = scenario(dataset)
+    try:
+        request = next(steps)
+        for _ in range(requests):
+            started = time.perf_counter()
+            status, body = client(request)
+            latencies.append(time.perf_counter() - started)
+            if not 200 <= status < 400:
+                errors.append(status)
+            request = steps.send((status, body))
+    finally:
+        # Соединения потока иначе остаются открытыми до конца процесса.
+        connections.close_all()
+
+
+def run_scenario(scenario, dataset, make_client, requests, concurrency=1):
+    latencies, errors = [], []
+    clients = [make_client() for _ in range(concurrency)]
+    threads = [
+        threading.Thread(target=drive, args=(
+            scenario, dataset, client, requests // concurrency,
+            latencies, errors))
+        for client in clients
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    queries = None
+    if clients[0].counts_queries and latencies:
+        queries = round(sum(client.queries for client in clients)
+                        / len(latencies), 2)
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries': queries,
+    }
+
+
+def run_scenarios(make_client, names=None, requests=200, warmup=20,
+                  concurrency=1):
+    """Результаты сценариев names (по умолчанию всех) по именам."""
+    dataset = Dataset()
+    results = {}
+    for name in names or SCENARIOS:
+        scenario = SCENARIOS[name]
+        if warmup:
+            run_scenario(scenario, dataset, make_client, warmup)
+        results[name] = run_scenario(
+            scenario, dataset, make_client, requests, concurrency)
+    return results
+
+
+def compare(results, baseline, tolerance=0.3, queries_only=False):
+    """Список регрессий относительно baseline."""
+    problems = []
+    for name, result in results.items():
+        if result['errors']:
+            problems.append(f'{name}: {result["errors"]} failed requests')
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        if (result['queries'] is not None
+                and expected.get('queries') is not None
+                and result['queries'] > expected['queries'] + 0.01):
+            problems.append(f'{name}: {result["queries"]} queries per '
+                            f'request, baseline {expected["queries"]}')
+        if queries_only:
+            continue
+        # p95 и p99 от прогона к прогону меняются сильнее медианы,
+        # поэтому задержка сравнивается по p50.
+        if result['p50_ms'] > expected['p50_ms'] * (1 + tolerance):
+            problems.append(f'{name}: p50 {result["p50_ms"]} ms, '
+                            f'baseline {expected["p50_ms"]} ms')
+        if result['rps'] < expected['rps'] * (1 - tolerance):
+            problems.append(f'{name}: {result["rps"]} req/s, '
+                            f'baseline {expected["rps"]} req/s')
+    return problems
+
+
+def report(results, baseline):
+    print(f'{"scenario":<15} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} '
+          f'{"p99 ms":>8} {"queries":>8} {"errors":>6}  baseline')
+    for name, result in results.items():
+        expected = baseline.get(name, {})
+        base = (f'{expected["rps"]} req/s, p50 {expected["p50_ms"]} ms, '
+                f'{expected.get("queries")} q' if expected else '-')
+        queries = result['queries'] if result['queries'] is not None else '-'
+        print(f'{name:<15} {result["rps"]:>8} {result["p50_ms"]:>8} '
+              f'{result["p95_ms"]:>8} {result["p99_ms"]:>8} {queries:>8} '
+              f'{result["errors"]:>6}  {base}')
+
+
+def load_baseline(path):
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def run_in_process(args):
+    from django.core.management import call_command
+    from django.test.utils import (setup_databases, setup_test_environment,
+                                   teardown_databases)
+
+    setup_test_environment()
+    databases = setup_databases(verbosity=0, interactive=False)
+    try:
+        call_command('generate_dataset', *DATASET, '--seed', str(args.seed),
+                     stdout=io.StringIO())
+        return run_scenarios(InProcessClient, args.scenario, args.requests,
+                             args.warmup)
+    finally:
+        teardown_databases(databases, verbosity=0)
+
+
+def run_against_server(args):
+    from django.core.management import call_command
+
+    if args.seed_dataset:
+        call_command('generate_dataset', *DATASET, '--seed', str(args.seed))
+    return run_scenarios(lambda: HTTPClient(args.url), args.scenario,
+                         args.requests, args.warmup, args.concurrency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='Сценарий (можно несколько), по умолчанию все.')
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help='Адрес запущенного сервера.')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Потоков при --url.')
+    parser.add_argument('--seed-dataset', action='store_true',
+                        help='При --url сначала заполнить базу сервера.')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Допустимое ухудшение req/s и p50, доля.')
+    parser.add_argument('--queries-only', action='store_true',
+                        help='Сравнивать с базовым уровнем только '
+                             'число запросов к базе.')
+    args = parser.parse_args()
+    setup_django()
+    mode = 'server' if args.url else 'in-process'
+    results = (run_against_server if args.url else run_in_process)(args)
+    saved = load_baseline(args.baseline)
+    baseline = saved.get(mode, {})
+    report(results, baseline)
+    if args.save_baseline:
+        saved[mode] = {**baseline, **results}
+        args.baseline.write_text(
+            json.dumps(saved, indent=2, ensure_ascii=False) + '\n',
+            encoding='utf-8')
+        print(f'Baseline saved to {args.baseline}')
+        return
+    problems = compare(results, baseline, args.tolerance, args.queries_only)
+    for problem in problems:
+        print(f'REGRESSION {problem}')
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
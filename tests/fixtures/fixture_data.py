@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    from reviews.models import Genre
+    return [
+        Genre.objects.create(name=f'Жанр {index}', slug=f'genre-{index}')
+        for index in range(3)
+    ]
+
+
+@pytest.fixture
+def title(category, genres):
+    from reviews.models import Title
+    title = Title.objects.create(name='Побег из Шоушенка', year=1994,
+                                 category=category)
+    title.genre.set(genres)
+    return title
+
+
+@pytest.fixture
+def another_title(category, genres):
+    from reviews.models import Title
+    title = Title.objects.create(name='Крестный отец', year=1972,
+                                 category=category)
+    title.genre.set(genres[:1])
+    return title
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUser', email='testuser@yamdb.fake', role='user'
+    )
+
+
+@pytest.fixture
+def another_user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestUserAnother', email='testanother@yamdb.fake',
+        role='user'
+    )
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='TestAdmin', email='testadmin@yamdb.fake', role='admin'
+    )
+
+
+def get_client(user):
+    from rest_framework.test import APIClient
+    from api.authentication import RoleAccessToken
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}')
+    return client
+
+
+@pytest.fixture
+def user_client(user):
+    return get_client(user)
+
+
+@pytest.fixture
+def another_user_client(another_user):
+    return get_client(another_user)
+
+
+@pytest.fixture
+def admin_client(admin):
+    return get_client(admin)
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from rest_framework.test import APIRequestFactory
+
+
+def sleepy_view(request):
+    time.sleep(0.2)
+    return HttpResponse(str(threading.get_ident()))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsyncReadViews:
+
+    def test_title_list(self, title):
+        from api.async_views import async_read_view
+        from api.views import TitleViewSet
+
+        view = async_read_view(TitleViewSet.as_view({'get': 'list'}))
+        assert asyncio.iscoroutinefunction(view)
+        response = async_to_sync(view)(APIRequestFactory().get('/api/v1/titles/'))
+        assert response.status_code == 200
+        assert response.is_rendered, 'Проверьте, что ответ рендерится в потоке пула'
+        assert b'"count":1' in response.content
+
+    def test_reads_run_concurrently(self):
+        from api.async_views import async_read_view
+
+        view = async_read_view(sleepy_view)
+        factory = APIRequestFactory()
+
+        async def run():
+            return await asyncio.gather(*(view(factory.get('/')) for _ in range(3)))
+
+        started = time.monotonic()
+        responses = async_to_sync(run)()
+        assert time.monotonic() - started < 0.5, (
+            'Проверьте, что запросы на чтение выполняются параллельно'
+        )
+        assert len({response.content for response in responses}) == 3
+
+    def test_writes_stay_sync(self, admin):
+        from api.async_views import async_read_view
+        from api.views import GenreViewSet
+        from rest_framework.test import force_authenticate
+        from reviews.models import Genre
+
+        view = async_read_view(GenreViewSet.as_view({'post': 'create'}))
+        request = APIRequestFactory().post('/api/v1/genres/', {'name': 'Драма', 'slug': 'drama'})
+        force_authenticate(request, admin)
+        response = async_to_sync(view)(request)
+        assert response.status_code == 201
+        assert Genre.objects.filter(slug='drama').exists()
+
+    def test_router(self):
+        from api.async_views import AsyncReadRouter
+        from api.views import TitleViewSet
+
+        router = AsyncReadRouter(async_reads=True)
+        router.register('titles', TitleViewSet, basename='titles')
+        assert all(asyncio.iscoroutinefunction(url.callback) for url in router.urls)
+        router = AsyncReadRouter()
+        router.register('titles', TitleViewSet, basename='titles')
+        assert not any(asyncio.iscoroutinefunction(url.callback) for url in router.urls)
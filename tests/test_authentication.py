@@ -0,0 +1,78 @@
+import pytest
+
+from .fixtures.fixture_user import get_client
+
+
+@pytest.mark.django_db
+class TestRoleJWTAuthentication:
+
+    def test_token_contains_role(self, client, user):
+        from django.contrib.auth.tokens import default_token_generator
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        response = client.post('/api/v1/auth/token/', {
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == 200
+        token = AccessToken(response.json()['token'])
+        assert token['role'] == 'user'
+        assert token['username'] == user.username
+        assert token['is_staff'] is False
+
+    def test_no_user_query(self, admin_client, user_client, title, django_assert_num_queries):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        admin_client.get('/api/v1/users/')
+        # Только произведения и жанры: пользователь берётся из токена.
+        with django_assert_num_queries(2):
+            response = admin_client.get(f'/api/v1/titles/{title.id}/')
+        assert response.status_code == 200
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.get(url)
+        response = user_client.post(url, {'text': 'Текст', 'score': 7})
+        assert response.status_code == 201
+        assert response.json()['author'] == 'TestUser'
+        review_url = f'{url}{response.json()["id"]}/'
+        with CaptureQueriesContext(connection) as context:
+            assert user_client.patch(review_url, {'text': 'Новый'}).status_code == 200
+        assert not any('FROM "users_user"' in query['sql'] for query in context.captured_queries), (
+            'Проверьте, что запросы с токеном не читают пользователя из базы'
+        )
+
+    def test_role_change_revokes_token(self, user, user_client, category):
+        data = {'name': 'Произведение', 'year': 2000, 'category': category.slug, 'genre': []}
+        assert user_client.post('/api/v1/titles/', data, format='json').status_code == 403
+
+        user.role = 'admin'
+        user.save()
+        assert user_client.get('/api/v1/titles/').status_code == 401, (
+            'Проверьте, что после смены роли старый токен отклоняется'
+        )
+        assert get_client(user).post('/api/v1/titles/', data, format='json').status_code == 201
+
+    def test_deleted_user(self, admin_client, user, user_client):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert user_client.get('/api/v1/users/me/').status_code == 401
+
+    def test_me_reads_profile(self, user, user_client):
+        user.bio = 'Биография'
+        user.save()
+        user_client = get_client(user)
+        response = user_client.patch('/api/v1/users/me/', {'first_name': 'Имя'})
+        assert response.status_code == 200
+        assert response.json()['bio'] == 'Биография', (
+            'Проверьте, что /me/ не затирает профиль данными из токена'
+        )
+        assert response.json()['email'] == user.email
+
+    def test_legacy_token(self, user):
+        from rest_framework.test import APIClient
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        assert client.get('/api/v1/users/me/').json()['username'] == user.username
@@ -0,0 +1,39 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBenchmarkSuite:
+
+    def test_scenarios_in_process(self):
+        from benchmarks.scenarios import SCENARIOS
+        from benchmarks.suite import InProcessClient, compare, run_scenarios
+
+        call_command('generate_dataset', '--users', '20', '--categories', '2',
+                     '--genres', '3', '--titles', '10', '--reviews', '100',
+                     '--comments', '100')
+        results = run_scenarios(InProcessClient, requests=12, warmup=0)
+        assert set(results) == set(SCENARIOS)
+        for name, result in results.items():
+            assert result['requests'] == 12, name
+            assert result['errors'] == 0, (
+                f'Проверьте, что запросы сценария {name} выполняются успешно'
+            )
+            assert result['queries'] is not None
+        assert results['post_review']['queries'] > 0
+        assert compare(results, results) == []
+
+    def test_compare_reports_regressions(self):
+        from benchmarks.suite import compare
+
+        result = {'requests': 10, 'errors': 0, 'rps': 100.0, 'p50_ms': 10.0,
+                  'p95_ms': 20.0, 'p99_ms': 30.0, 'queries': 3.0}
+        baseline = {'scenario': {**result, 'queries': 2.0, 'p50_ms': 5.0,
+                                 'rps': 200.0}}
+        problems = compare({'scenario': result}, baseline, tolerance=0.3)
+        assert len(problems) == 3
+        assert compare({'scenario': result}, baseline, queries_only=True) == [
+            'scenario: 3.0 queries per request, baseline 2.0'
+        ]
+        failed = {'scenario': {**result, 'errors': 1}}
+        assert compare(failed, {}) == ['scenario: 1 failed requests']
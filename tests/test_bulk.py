@@ -0,0 +1,113 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestBulkCreate:
+    url = '/api/v1/titles/bulk/'
+
+    def titles(self, category, genres, count):
+        return [
+            {
+                'name': f'Произведение {index}', 'year': 2000,
+                'category': category.slug,
+                'genre': [genre.slug for genre in genres[:index % 3 + 1]],
+            }
+            for index in range(count)
+        ]
+
+    def test_admin_only(self, client, user_client, category, genres):
+        data = self.titles(category, genres, 1)
+        assert client.post(self.url, data, content_type='application/json').status_code == 401
+        assert user_client.post(self.url, data, format='json').status_code == 403
+
+    @pytest.mark.parametrize('count', (10, 200))
+    def test_titles(self, admin_client, category, genres, count, django_assert_max_num_queries):
+        from django.db import connection
+        from reviews.models import GenreTitle, Title
+
+        data = self.titles(category, genres, count)
+        # Без RETURNING для bulk_create (SQLite) произведения вставляются по одному.
+        queries = 10 if connection.features.can_return_rows_from_bulk_insert else 10 + count
+        with django_assert_max_num_queries(queries):
+            response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 201, response.json()
+        results = response.json()
+        assert [result['index'] for result in results] == list(range(count))
+        assert Title.objects.count() == count
+        title = Title.objects.get(pk=results[4]['id'])
+        assert title.name == 'Произведение 4'
+        assert list(title.genre.values_list('slug', flat=True)) == ['genre-0', 'genre-1']
+        assert GenreTitle.objects.count() == sum(len(item['genre']) for item in data)
+
+    def test_atomic_mode(self, admin_client, category, genres):
+        from reviews.models import Title
+
+        data = self.titles(category, genres, 3)
+        data[1]['category'] = 'missing'
+        data[2]['year'] = 3000
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 400
+        results = response.json()
+        assert [result['index'] for result in results] == [0, 1, 2]
+        assert results[0] == {'index': 0, 'valid': True}, (
+            'Проверьте, что ответ atomic перечисляет и корректные элементы'
+        )
+        assert 'category' in results[1]['errors']
+        assert 'year' in results[2]['errors']
+        assert Title.objects.count() == 0, (
+            'Проверьте, что в режиме atomic ошибка отменяет всю загрузку'
+        )
+
+    def test_partial_mode(self, admin_client, category, genres):
+        from reviews.models import Title
+
+        data = self.titles(category, genres, 3)
+        data[1]['genre'] = ['missing']
+        response = admin_client.post(f'{self.url}?mode=partial', data, format='json')
+        assert response.status_code == 207
+        results = response.json()
+        assert 'genre' in results[1]['errors']
+        assert Title.objects.filter(pk__in=[results[0]['id'], results[2]['id']]).count() == 2
+        assert Title.objects.count() == 2
+
+    def test_invalid_request(self, admin_client, category, genres):
+        assert admin_client.post(self.url, {'name': 'Не список'}, format='json').status_code == 400
+        data = self.titles(category, genres, 1)
+        assert admin_client.post(f'{self.url}?mode=unknown', data, format='json').status_code == 400
+
+    def test_genres_unique_slugs(self, admin_client, genres):
+        from reviews.models import Genre
+
+        data = [
+            {'name': 'Новый', 'slug': 'new'},
+            {'name': 'Существующий', 'slug': genres[0].slug},
+            {'name': 'Повтор', 'slug': 'new'},
+        ]
+        response = admin_client.post('/api/v1/genres/bulk/?mode=partial', data, format='json')
+        assert response.status_code == 207
+        results = response.json()
+        assert results[0] == {'index': 0, 'slug': 'new'}
+        assert 'slug' in results[1]['errors']
+        assert 'slug' in results[2]['errors'], 'Проверьте, что повтор слага внутри пачки отклоняется'
+        assert Genre.objects.filter(slug='new').count() == 1
+
+    @pytest.mark.parametrize('url', ('/api/v1/categories/', '/api/v1/genres/'))
+    def test_reserved_slug(self, admin_client, url):
+        data = {'name': 'Массовая', 'slug': 'bulk'}
+        response = admin_client.post(url, data, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что слаг bulk не перекрывается маршрутом bulk/'
+        )
+        assert 'slug' in response.json()
+        response = admin_client.post(f'{url}bulk/', [data], format='json')
+        assert 'slug' in response.json()[0]['errors']
+
+    def test_categories(self, admin_client, client, django_capture_on_commit_callbacks):
+        data = [{'name': f'Категория {index}', 'slug': f'category-{index}'} for index in range(5)]
+        client.get('/api/v1/categories/')
+        with django_capture_on_commit_callbacks(execute=True):
+            response = admin_client.post('/api/v1/categories/bulk/', data, format='json')
+        assert response.status_code == 201
+        assert client.get('/api/v1/categories/').json()['count'] == 5, (
+            'Проверьте, что массовое создание сбрасывает кэш списка'
+        )
@@ -0,0 +1,133 @@
+import io
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def test_anonymous_list_is_cached(self, client, title, django_assert_num_queries):
+        from api.cache import get_stats
+
+        response = client.get('/api/v1/titles/?year=1994&name=Побег')
+        assert response['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            cached = client.get('/api/v1/titles/?name=Побег&year=1994')
+        assert cached['X-Cache'] == 'HIT', (
+            'Проверьте, что ключ кэша не зависит от порядка параметров'
+        )
+        assert cached.json() == response.json()
+        assert get_stats() == {'hits': 1, 'misses': 1}
+
+    def test_authenticated_requests_bypass_cache(self, user_client, title):
+        user_client.get('/api/v1/titles/')
+        response = user_client.get('/api/v1/titles/')
+        assert 'X-Cache' not in response
+
+    def test_title_write_invalidates(self, client, admin_client, title):
+        client.get(f'/api/v1/titles/{title.id}/')
+        admin_client.patch(f'/api/v1/titles/{title.id}/', {'name': 'Новое имя'}, format='json')
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['name'] == 'Новое имя'
+
+    def test_review_write_invalidates_rating(self, client, user_client, title):
+        assert client.get('/api/v1/titles/').json()['results'][0]['rating'] is None
+        user_client.post(f'/api/v1/titles/{title.id}/reviews/', {'text': 'Текст', 'score': 7})
+        response = client.get('/api/v1/titles/')
+        assert response.json()['results'][0]['rating'] == 7, (
+            'Проверьте, что новый отзыв сбрасывает кэш списка произведений'
+        )
+
+    def test_genre_write_invalidates_titles_only_by_version(self, client, admin_client, title):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/categories/')
+        admin_client.post('/api/v1/genres/', {'name': 'Новый', 'slug': 'new'})
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/categories/')['X-Cache'] == 'HIT', (
+            'Проверьте, что запись в жанры не сбрасывает кэш категорий'
+        )
+
+    def test_save_outside_api_invalidates(self, client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        title.name = 'Из админки'
+        title.save()
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что save() модели в обход API сбрасывает кэш'
+        )
+        assert response['ETag'] != etag
+        assert response.json()['name'] == 'Из админки'
+
+    def test_api_write_invalidates_once(self, user_client, title,
+                                        monkeypatch):
+        from django.db import transaction
+
+        callbacks = []
+        on_commit = transaction.on_commit
+
+        def record(func, using=None):
+            callbacks.append(func)
+            on_commit(func, using=using)
+
+        monkeypatch.setattr(transaction, 'on_commit', record)
+        user_client.post(f'/api/v1/titles/{title.id}/reviews/',
+                         {'text': 'Текст', 'score': 7})
+        assert len(callbacks) == 1, (
+            'Проверьте, что при записи через API версии сдвигает view, '
+            'без повторного сдвига из обработчика сигнала'
+        )
+
+    def test_commands_invalidate_all_resources(self, client, title):
+        from django.core.management import call_command
+
+        from reviews.models import Title
+
+        urls = ('/api/v1/titles/', f'/api/v1/titles/{title.id}/reviews/')
+        etags = [client.get(url)['ETag'] for url in urls]
+        Title.objects.filter(pk=title.pk).update(reviews_count=5)
+        call_command('recount_counters', stdout=io.StringIO())
+        for url, etag in zip(urls, etags):
+            assert client.get(url)['ETag'] != etag, (
+                'Проверьте, что команды, пишущие в обход моделей, '
+                'сдвигают версии всех ресурсов'
+            )
+
+    def test_versions_expire(self, client, title, settings):
+        settings.API_CACHE_TIMEOUT = 0
+        url = f'/api/v1/titles/{title.id}/'
+        assert client.get(url)['ETag'] != client.get(url)['ETag'], (
+            'Проверьте, что версии ресурсов живут не дольше '
+            'API_CACHE_TIMEOUT'
+        )
+
+
+class TestSharedCache:
+
+    def check_cache(self, workers):
+        import runpy
+
+        from django.conf import settings
+
+        config = runpy.run_path(
+            str(settings.BASE_DIR / 'gunicorn.conf.py'))
+        config['check_cache'](workers)
+
+    def test_local_cache_is_single_process(self, settings):
+        from api.cache import is_shared
+
+        assert not is_shared()
+        self.check_cache(1)
+        with pytest.raises(RuntimeError, match='shared cache'):
+            self.check_cache(2)
+
+    def test_file_cache_is_shared(self, settings, tmp_path):
+        from api.cache import is_shared
+
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        assert is_shared()
+        self.check_cache(2)
@@ -0,0 +1,198 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+
+def since(moment):
+    return moment.isoformat().replace('+00:00', 'Z')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestChangeFeed:
+
+    def test_titles_updated_since(self, admin_client, client, title,
+                                  another_title, user_client, settings):
+        settings.CHANGE_FEED_OVERLAP_SECONDS = 0
+        start = timezone.now()
+        url = f'/api/v1/titles/?updated_since={since(start)}'
+        assert client.get(url).json()['results'] == [], (
+            'Проверьте, что ?updated_since= отдаёт только изменённые записи'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{another_title.id}/',
+                           {'name': 'Новое название'})
+        user_client.post(f'/api/v1/titles/{title.id}/reviews/',
+                         {'text': 'Отзыв', 'score': 7})
+        results = client.get(url).json()['results']
+        assert [item['id'] for item in results] == [
+            another_title.id, title.id], (
+            'Проверьте, что изменения идут по updated_at и что новый '
+            'рейтинг сдвигает updated_at произведения'
+        )
+        assert results[1]['rating'] == 7
+        response = client.get(
+            f'/api/v1/titles/?updated_since={results[1]["updated_at"]}')
+        assert [item['id'] for item in response.json()['results']] == [
+            title.id], 'Граница updated_since должна включаться'
+
+    def test_feed_overlaps_late_commits(self, user_client, title, settings):
+        from reviews.models import Title
+
+        # Транзакция получила updated_at раньше, а зафиксировалась позже
+        # границы, которую клиент передал в следующем опросе.
+        boundary = timezone.now()
+        Title.objects.filter(pk=title.pk).update(
+            updated_at=boundary - timedelta(seconds=10))
+        url = f'/api/v1/titles/?updated_since={since(boundary)}'
+        assert [item['id'] for item in user_client.get(url).json()['results']] == [
+            title.id], (
+            'Проверьте, что лента начинается на CHANGE_FEED_OVERLAP_SECONDS '
+            'раньше updated_since'
+        )
+        settings.CHANGE_FEED_OVERLAP_SECONDS = 5
+        assert user_client.get(url).json()['results'] == []
+
+    def test_feed_cursor(self, client, title, another_title):
+        start = timezone.now() - timedelta(minutes=1)
+        url = (f'/api/v1/titles/?updated_since={since(start)}'
+               '&pagination=cursor&page_size=1')
+        ids = []
+        while url:
+            data = client.get(url).json()
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        assert ids == [title.id, another_title.id]
+
+    def test_deleted_reviews_and_comments(self, client, user_client, title):
+        start = since(timezone.now())
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = user_client.post(
+            reviews_url, {'text': 'Отзыв', 'score': 7}).json()['id']
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        comment_id = user_client.post(
+            comments_url, {'text': 'Ответ'}).json()['id']
+
+        user_client.delete(f'{comments_url}{comment_id}/')
+        response = client.get(f'{comments_url}deleted/?updated_since={start}')
+        assert response.status_code == 200
+        assert [item['id'] for item in response.json()['results']] == [
+            comment_id], 'Проверьте, что удаление комментария попадает в ленту'
+        review = client.get(
+            f'{reviews_url}?updated_since={start}').json()['results'][0]
+        assert review['comments_count'] == 0
+
+        user_client.delete(f'{reviews_url}{review_id}/')
+        response = client.get(f'{reviews_url}deleted/?updated_since={start}')
+        assert [item['id'] for item in response.json()['results']] == [
+            review_id]
+
+    def test_deleted_checks_parent_chain(self, client, user_client, title,
+                                         another_title):
+        start = since(timezone.now())
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        review_id = user_client.post(
+            reviews_url, {'text': 'Отзыв', 'score': 7}).json()['id']
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        comment_id = user_client.post(
+            comments_url, {'text': 'Ответ'}).json()['id']
+        user_client.delete(f'{comments_url}{comment_id}/')
+
+        response = client.get(
+            f'/api/v1/titles/{another_title.id}/reviews/{review_id}/'
+            f'comments/deleted/?updated_since={start}')
+        assert response.status_code == 404, (
+            'Проверьте, что удаления комментариев отзыва другого '
+            'произведения не отдаются'
+        )
+        assert client.get(
+            f'/api/v1/titles/0/reviews/deleted/?updated_since={start}'
+        ).status_code == 404
+
+        user_client.delete(f'{reviews_url}{review_id}/')
+        response = client.get(f'{comments_url}deleted/?updated_since={start}')
+        assert [item['id'] for item in response.json()['results']] == [
+            comment_id], (
+            'Проверьте, что удаления комментариев удалённого отзыва '
+            'по-прежнему отдаются'
+        )
+        response = client.get(
+            f'/api/v1/titles/{another_title.id}/reviews/{review_id}/'
+            f'comments/deleted/?updated_since={start}')
+        assert response.status_code == 404
+
+    def test_deleted_titles(self, admin_client, client, title, genres):
+        start = since(timezone.now())
+        admin_client.delete(f'/api/v1/titles/{title.id}/')
+        response = client.get(f'/api/v1/titles/deleted/?updated_since={start}')
+        assert [item['id'] for item in response.json()['results']] == [
+            title.id]
+
+    def test_deletions_outside_api_recorded(self, client, title, user):
+        from api.purge import hide, purge
+        from reviews.models import Comment, Review, Title, Tombstone
+
+        start = since(timezone.now())
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=5)
+        comment = Comment.objects.create(review=review, author=user,
+                                         text='Ответ')
+        Review.objects.filter(pk=review.pk).delete()
+        reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+        assert [item['id'] for item in client.get(
+            f'{reviews_url}deleted/?updated_since={start}'
+        ).json()['results']] == [review.id], (
+            'Проверьте, что удаления в обход API попадают в ленту'
+        )
+        assert [item['id'] for item in client.get(
+            f'{reviews_url}{review.id}/comments/deleted/'
+            f'?updated_since={start}').json()['results']] == [comment.id]
+
+        hide(title)
+        purge(Title.objects.get(pk=title.pk))
+        assert Tombstone.objects.filter(
+            resource='titles', object_id=title.id).count() == 1, (
+            'Проверьте, что скрытое произведение записывается один раз'
+        )
+
+    def test_genre_deletion_touches_titles(self, admin_client, client,
+                                           title, genres):
+        start = since(timezone.now())
+        admin_client.delete(f'/api/v1/genres/{genres[0].slug}/')
+        results = client.get(
+            f'/api/v1/titles/?updated_since={start}').json()['results']
+        assert [item['id'] for item in results] == [title.id], (
+            'Проверьте, что удаление жанра сдвигает updated_at произведений'
+        )
+        assert len(results[0]['genre']) == 2
+        assert set(results[0]['category']) == {'name', 'slug'}, (
+            'Проверьте, что updated_at категорий и жанров не отдаётся в API'
+        )
+        genres = client.get('/api/v1/genres/').json()['results']
+        assert set(genres[0]) == {'name', 'slug'}
+
+    def test_invalid_updated_since(self, client, title, settings):
+        assert client.get(
+            '/api/v1/titles/?updated_since=вчера').status_code == 400
+        assert client.get('/api/v1/titles/deleted/').status_code == 400
+        too_old = since(timezone.now() - timedelta(
+            days=settings.TOMBSTONE_RETENTION_DAYS + 1))
+        assert client.get(
+            f'/api/v1/titles/deleted/?updated_since={too_old}'
+        ).status_code == 400, (
+            'Проверьте, что при отставании больше срока хранения удалений '
+            'клиент получает ошибку'
+        )
+
+    def test_prune_tombstones(self, settings):
+        from api.purge import prune_tombstones
+        from reviews.changes import record_deleted
+        from reviews.models import Title, Tombstone
+
+        record_deleted(Title, [(1, None), (2, None)])
+        Tombstone.objects.filter(object_id=1).update(
+            deleted_at=timezone.now() - timedelta(
+                days=settings.TOMBSTONE_RETENTION_DAYS + 1))
+        assert prune_tombstones() == 1
+        assert list(Tombstone.objects.values_list(
+            'object_id', flat=True)) == [2]
@@ -0,0 +1,48 @@
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_title_etag(self, client, title, django_assert_num_queries):
+        url = f'/api/v1/titles/{title.id}/'
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response['ETag']
+        assert etag.startswith('"'), 'Проверьте, что ETag сильный'
+        assert 'Last-Modified' in response
+
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_reviews_etag_changes_after_write(self, client, user_client, title, django_assert_num_queries):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        with django_assert_num_queries(0):
+            assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        user_client.post(url, {'text': 'Текст', 'score': 6})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag списка отзывов'
+        )
+        assert len(response.json()['results']) == 1
+
+    def test_reviews_of_other_title_keep_etag(self, client, user_client, title, another_title):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        user_client.post(f'/api/v1/titles/{another_title.id}/reviews/', {'text': 'Текст', 'score': 6})
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_comments_if_modified_since(self, client, user_client, user, title):
+        from reviews.models import Review
+
+        review = Review.objects.create(title=title, author=user, text='Текст')
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        last_modified = client.get(url)['Last-Modified']
+        assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+        etag = client.get(url)['ETag']
+        user_client.post(url, {'text': 'Комментарий'})
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
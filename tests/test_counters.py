@@ -0,0 +1,104 @@
+import io
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestDiscussionCounters:
+
+    def reviews_url(self, title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def comments_url(self, title, review_id):
+        return f'{self.reviews_url(title)}{review_id}/comments/'
+
+    def test_comments_count_follows_comment_writes(self, user_client,
+                                                   another_user_client,
+                                                   title):
+        review_id = user_client.post(
+            self.reviews_url(title), {'text': 'Отзыв', 'score': 7}
+        ).json()['id']
+        assert user_client.get(self.reviews_url(title)).json()[
+            'results'][0]['comments_count'] == 0
+
+        response = user_client.post(self.comments_url(title, review_id),
+                                    {'text': 'Первый'})
+        assert response.status_code == 201
+        another_user_client.post(self.comments_url(title, review_id),
+                                 {'text': 'Второй'})
+        results = user_client.get(self.reviews_url(title)).json()['results']
+        assert results[0]['comments_count'] == 2, (
+            'Проверьте, что при создании комментария обновляется '
+            'comments_count отзыва и кэш списка отзывов'
+        )
+
+        user_client.delete(
+            f'{self.comments_url(title, review_id)}{response.json()["id"]}/')
+        review = user_client.get(
+            f'{self.reviews_url(title)}{review_id}/').json()
+        assert review['comments_count'] == 1, (
+            'Проверьте, что при удалении комментария уменьшается '
+            'comments_count отзыва'
+        )
+
+    def test_counters_are_read_only(self, user_client, title):
+        response = user_client.post(
+            self.reviews_url(title),
+            {'text': 'Отзыв', 'score': 7, 'comments_count': 100},
+        )
+        assert response.json()['comments_count'] == 0
+
+    def test_ordering_by_counters(self, user_client, another_user_client,
+                                  title, another_title):
+        first = user_client.post(
+            self.reviews_url(title), {'text': 'Отзыв', 'score': 7}
+        ).json()['id']
+        second = another_user_client.post(
+            self.reviews_url(title), {'text': 'Отзыв', 'score': 3}
+        ).json()['id']
+        user_client.post(self.comments_url(title, second), {'text': 'Ответ'})
+
+        response = user_client.get(
+            f'{self.reviews_url(title)}?ordering=-comments_count')
+        assert [item['id'] for item in response.json()['results']] == [
+            second, first], (
+            'Проверьте сортировку отзывов по числу комментариев'
+        )
+
+        response = user_client.get('/api/v1/titles/?ordering=-reviews_count')
+        results = response.json()['results']
+        assert [item['id'] for item in results] == [
+            title.id, another_title.id], (
+            'Проверьте сортировку произведений по числу отзывов'
+        )
+        assert [item['reviews_count'] for item in results] == [2, 0]
+
+    def test_recount_command_fixes_comments_count(self, user, title):
+        from reviews.models import Comment, Review
+
+        review = Review.objects.create(title=title, author=user,
+                                       text='Отзыв', score=5)
+        Comment.objects.create(review=review, author=user, text='Ответ')
+        call_command('recount_counters')
+        call_command('recount_counters', '--check')
+
+        Review.objects.filter(pk=review.pk).update(comments_count=10)
+        with pytest.raises(CommandError, match='1 reviews'):
+            call_command('recount_counters', '--check')
+        updated_at = Review.objects.get(pk=review.pk).updated_at
+        with CaptureQueriesContext(connection) as queries:
+            call_command('recount_counters', '--batch-size', '1',
+                         stdout=io.StringIO())
+        review.refresh_from_db()
+        assert review.comments_count == 1
+        assert review.updated_at > updated_at, (
+            'Проверьте, что пересчёт сдвигает updated_at изменённых записей'
+        )
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1 and 'IN (' in updates[0], (
+            'Проверьте, что пересчитываются только разошедшиеся записи'
+        )
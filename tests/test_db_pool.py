@@ -0,0 +1,232 @@
+import threading
+import time
+
+import pytest
+from django.db import connection
+
+
+def make_wrapper(alias, **settings):
+    from api_yamdb.db.base import DatabaseWrapper
+
+    settings_dict = {**connection.settings_dict, 'OPTIONS': {}, **settings}
+    return DatabaseWrapper(settings_dict, alias=alias)
+
+
+@pytest.fixture
+def postgresql_only():
+    if connection.vendor != 'postgresql':
+        pytest.skip('Бэкенд api_yamdb.db работает только с PostgreSQL')
+
+
+class FakeConnection:
+    """Соединение для проверки ConnectionPool без базы."""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def lock_is_free(pool):
+    """Может ли другой поток сейчас взять блокировку пула."""
+    acquired = []
+
+    def acquire():
+        if pool._condition.acquire(timeout=0.1):
+            acquired.append(True)
+            pool._condition.release()
+
+    thread = threading.Thread(target=acquire)
+    thread.start()
+    thread.join()
+    return bool(acquired)
+
+
+class TestPoolWithFakeConnections:
+
+    def make_pool(self, **options):
+        from api_yamdb.db.pool import ConnectionPool
+
+        return ConnectionPool(**{'max_size': 2, 'timeout': 0.1, **options})
+
+    def test_idle_connection_reused(self):
+        pool = self.make_pool()
+        connection = pool.getconn(FakeConnection)
+        pool.putconn(connection)
+        assert pool.getconn(FakeConnection) is connection
+        assert pool.stats()['connects'] == 1
+        assert pool.stats()['in_use'] == 1
+
+    def test_timeout_when_exhausted(self):
+        from api_yamdb.db.pool import PoolTimeoutError
+
+        pool = self.make_pool(max_size=1)
+        connection = pool.getconn(FakeConnection)
+        with pytest.raises(PoolTimeoutError):
+            pool.getconn(FakeConnection)
+        releaser = threading.Timer(0.02, pool.putconn, (connection,))
+        releaser.start()
+        assert pool.getconn(FakeConnection) is connection
+        releaser.join()
+        stats = pool.stats()
+        assert (stats['waits'], stats['timeouts']) == (2, 1)
+
+    def test_check_runs_without_lock(self):
+        pool = self.make_pool()
+        broken = pool.getconn(FakeConnection)
+        pool.putconn(broken)
+        checked = []
+
+        def check(connection):
+            checked.append(lock_is_free(pool))
+            return connection is not broken
+
+        connection = pool.getconn(FakeConnection, check)
+        assert checked == [True], (
+            'Проверьте, что проверка соединения идёт без блокировки пула'
+        )
+        assert connection is not broken and broken.closed
+        stats = pool.stats()
+        assert (stats['size'], stats['discarded']) == (1, 1)
+
+    def test_failed_connect_frees_slot(self):
+        pool = self.make_pool(max_size=1)
+
+        def fail():
+            raise OSError('connection refused')
+
+        with pytest.raises(OSError):
+            pool.getconn(fail)
+        assert pool.stats()['size'] == 0
+        assert pool.getconn(FakeConnection)
+
+    def test_discarded_on_return(self):
+        pool = self.make_pool(max_lifetime=0)
+        expired = pool.getconn(FakeConnection)
+        pool.putconn(expired)
+        assert expired.closed
+        dropped = pool.getconn(FakeConnection)
+        pool.putconn(dropped, discard=True)
+        assert dropped.closed
+        assert pool.stats()['size'] == 0
+
+    def test_close(self):
+        pool = self.make_pool()
+        connections = [pool.getconn(FakeConnection) for _ in range(2)]
+        for connection in connections:
+            pool.putconn(connection)
+        pool.close()
+        assert all(connection.closed for connection in connections)
+        assert pool.stats()['size'] == 0
+
+
+def request_cycle(wrapper):
+    """Один HTTP-запрос: close_old_connections до и после запроса."""
+    wrapper.close_if_unusable_or_obsolete()
+    with wrapper.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        backend_pid = cursor.fetchone()[0]
+    wrapper.close_if_unusable_or_obsolete()
+    return backend_pid
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('postgresql_only')
+class TestPersistentConnections:
+
+    def test_reused_across_requests(self):
+        wrapper = make_wrapper('persistent', CONN_MAX_AGE=60)
+        try:
+            assert request_cycle(wrapper) == request_cycle(wrapper), (
+                'Проверьте, что при CONN_MAX_AGE соединение переиспользуется'
+            )
+        finally:
+            wrapper.close()
+
+    def test_closed_without_max_age(self):
+        wrapper = make_wrapper('short', CONN_MAX_AGE=0)
+        assert request_cycle(wrapper) != request_cycle(wrapper)
+
+    def test_health_check_reconnects(self):
+        wrapper = make_wrapper('checked', CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+        try:
+            request_cycle(wrapper)
+            # Соединение оборвалось между запросами.
+            wrapper.connection.close()
+            assert request_cycle(wrapper), (
+                'Проверьте, что оборванное соединение переоткрывается'
+            )
+        finally:
+            wrapper.close()
+
+    def test_settings(self, settings):
+        assert settings.DATABASES['default']['CONN_MAX_AGE'] == 60
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('postgresql_only')
+class TestConnectionPool:
+
+    def pool_settings(self, **pool):
+        return {'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'max_size': 1, 'timeout': 0.2, **pool}}}
+
+    def test_reused_across_requests(self):
+        from api_yamdb.db.base import pool_stats
+
+        first = make_wrapper('pooled', **self.pool_settings())
+        second = make_wrapper('pooled', **self.pool_settings())
+        try:
+            pids = {request_cycle(first), request_cycle(second), request_cycle(first)}
+            assert len(pids) == 1, 'Проверьте, что соединение берётся из пула'
+            stats = pool_stats()['pooled']
+            assert stats['connects'] == 1
+            assert stats['checkouts'] == 3
+            assert stats['size'] == stats['idle'] == 1
+            assert stats['checkout_seconds'] >= 0
+        finally:
+            first.pool.close()
+
+    def test_wait_and_timeout(self):
+        from django.db.utils import OperationalError
+        from api_yamdb.db.base import pool_stats
+
+        first = make_wrapper('busy', **self.pool_settings())
+        second = make_wrapper('busy', **self.pool_settings())
+        try:
+            first.ensure_connection()
+            with pytest.raises(OperationalError):
+                second.ensure_connection()
+            stats = pool_stats()['busy']
+            assert stats['timeouts'] == 1
+            assert stats['in_use'] == 1
+
+            first.inc_thread_sharing()
+            releaser = threading.Timer(0.05, first.close)
+            releaser.start()
+            started = time.monotonic()
+            second.ensure_connection()
+            assert time.monotonic() - started < 0.2
+            releaser.join()
+            stats = pool_stats()['busy']
+            assert stats['waits'] == 2
+            assert stats['wait_seconds'] > 0
+        finally:
+            second.close()
+            first.pool.close()
+
+    def test_transaction_rolled_back_on_return(self):
+        wrapper = make_wrapper('dirty', **self.pool_settings())
+        try:
+            wrapper.ensure_connection()
+            wrapper.set_autocommit(False)
+            with wrapper.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            wrapper.close()
+            wrapper.ensure_connection()
+            from psycopg2 import extensions
+
+            assert wrapper.connection.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+        finally:
+            wrapper.close()
+            wrapper.pool.close()
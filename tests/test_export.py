@@ -0,0 +1,151 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def content(response):
+    return b''.join(response.streaming_content)
+
+
+def jsonl(data):
+    return [json.loads(line) for line in data.decode().splitlines()]
+
+
+async def asgi_get(path, headers):
+    """GET через ASGI-обработчик Django: статус и тело ответа."""
+    from asgiref.testing import ApplicationCommunicator
+    from django.core.asgi import get_asgi_application
+
+    path, _, query = path.partition('?')
+    communicator = ApplicationCommunicator(get_asgi_application(), {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path,
+        'query_string': query.encode(), 'headers': headers,
+        'server': ('testserver', 80),
+    })
+    await communicator.send_input({'type': 'http.request'})
+    start = await communicator.receive_output(timeout=5)
+    body = b''
+    while True:
+        message = await communicator.receive_output(timeout=5)
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    await communicator.wait(timeout=5)
+    return start['status'], body
+
+
+@pytest.fixture
+def catalog(title, another_title, user, another_user):
+    from reviews.counters import recount_reviews, recount_titles
+    from reviews.models import Category, Comment, Review, Title
+
+    book = Category.objects.create(name='Книга', slug='book')
+    Title.objects.create(name='Скрытое', year=2000, category=book,
+                         hidden=True)
+    reviews = [
+        Review.objects.create(title=reviewed, author=author, text='Отзыв',
+                              score=score)
+        for reviewed, score in ((title, 8), (another_title, 6))
+        for author in (user, another_user)
+    ]
+    for review in reviews:
+        Comment.objects.create(review=review, author=user, text='Ответ')
+    recount_titles()
+    recount_reviews()
+    return reviews
+
+
+@pytest.mark.django_db
+class TestExport:
+    url = '/api/v1/export/'
+
+    def test_only_admin(self, client, user_client):
+        assert client.get(f'{self.url}titles.jsonl').status_code == 401
+        assert user_client.get(f'{self.url}titles.jsonl').status_code == 403
+
+    def test_titles_jsonl(self, admin_client, title, catalog):
+        response = admin_client.get(f'{self.url}titles.jsonl')
+        assert response.status_code == 200
+        assert response.streaming, 'Проверьте, что выгрузка отдаётся потоком'
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = jsonl(content(response))
+        assert len(rows) == 2, 'Проверьте, что скрытые произведения не выгружаются'
+        row = next(row for row in rows if row['id'] == title.id)
+        assert row == {
+            'id': title.id, 'name': title.name, 'year': 1994,
+            'description': None, 'category': 'movie',
+            'genre': ['genre-0', 'genre-1', 'genre-2'], 'rating': 8.0,
+            'reviews_count': 2,
+        }
+
+    def test_filters_match_titles_list(self, admin_client, title, catalog):
+        rows = jsonl(content(admin_client.get(
+            f'{self.url}reviews.jsonl?year=1994')))
+        assert {row['title'] for row in rows} == {title.id}
+        assert len(rows) == 2
+        rows = jsonl(content(admin_client.get(
+            f'{self.url}comments.jsonl?category=book')))
+        assert rows == []
+        rows = jsonl(content(admin_client.get(
+            f'{self.url}reviews.jsonl?search=шоушенка')))
+        assert {row['title'] for row in rows} == {title.id}, (
+            'Проверьте, что поиск работает и для отзывов'
+        )
+        response = admin_client.get(f'{self.url}titles.jsonl?rating_min=x')
+        assert response.status_code == 400
+
+    def test_csv_gzip(self, admin_client, catalog):
+        response = admin_client.get(f'{self.url}reviews.csv.gz')
+        assert response['Content-Type'] == 'application/gzip'
+        assert 'reviews.csv.gz' in response['Content-Disposition']
+        rows = list(csv.DictReader(io.StringIO(
+            gzip.decompress(content(response)).decode())))
+        assert [int(row['id']) for row in rows] == [
+            review.id for review in catalog]
+        assert rows[0]['author'] == 'TestUser'
+        assert rows[0]['comments_count'] == '1'
+
+    def test_rows_are_read_in_chunks(self, admin_client, catalog, settings):
+        settings.EXPORT_CHUNK_SIZE = 2
+        with CaptureQueriesContext(connection) as queries:
+            rows = jsonl(content(admin_client.get(
+                f'{self.url}comments.jsonl')))
+        assert [row['id'] for row in rows] == sorted(row['id'] for row in rows)
+        assert len(rows) == 4
+        selects = [query['sql'] for query in queries.captured_queries
+                   if 'reviews_comment' in query['sql']]
+        assert len(selects) == 3, (
+            'Проверьте, что строки читаются пачками по EXPORT_CHUNK_SIZE'
+        )
+        assert all('LIMIT 2' in sql for sql in selects)
+
+    def test_command(self, catalog, tmp_path):
+        path = tmp_path / 'titles.jsonl.gz'
+        call_command('export_catalog', 'titles', '--gzip',
+                     '--filter', 'genre=genre-1', '--output', str(path))
+        rows = jsonl(gzip.decompress(path.read_bytes()))
+        assert [row['name'] for row in rows] == ['Побег из Шоушенка']
+
+
+
+@pytest.mark.django_db(transaction=True)
+def test_export_rejected_under_asgi(admin, catalog):
+    from api.authentication import RoleAccessToken
+
+    headers = [(b'authorization',
+                f'Bearer {RoleAccessToken.for_user(admin)}'.encode())]
+    status, body = async_to_sync(asgi_get)(
+        '/api/v1/export/reviews.jsonl?year=1994', headers)
+    assert status == 501, (
+        'Проверьте, что под ASGI выгрузка не запускается: цикл событий '
+        'ждал бы каждую пачку'
+    )
+    assert 'WSGI' in json.loads(body)['detail']
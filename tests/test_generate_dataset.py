@@ -0,0 +1,95 @@
+import pytest
+from django.core.management import call_command
+
+VOLUMES = ('--users', '40', '--categories', '3', '--genres', '5',
+           '--titles', '30', '--reviews', '300', '--comments', '600',
+           '--batch-size', '50')
+
+
+def snapshot():
+    from reviews.models import Comment, GenreTitle, Review, Title
+
+    return (
+        list(Title.objects.values_list('id', 'category_id', 'year')),
+        list(GenreTitle.objects.values_list('title_id', 'genre_id')),
+        list(Review.objects.values_list('id', 'title_id', 'author_id', 'score')),
+        list(Comment.objects.values_list('id', 'review_id', 'author_id')),
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestGenerateDataset:
+
+    def test_volumes_and_counters(self):
+        from django.db.models import Count, F
+
+        from reviews.counters import reviews_with_drift, titles_with_drift
+        from reviews.models import Category, Comment, Genre, Review, Title
+        from users.models import User
+
+        call_command('generate_dataset', *VOLUMES)
+        assert User.objects.count() == 40
+        assert Category.objects.count() == 3
+        assert Genre.objects.count() == 5
+        assert Title.objects.count() == 30
+        assert Review.objects.count() == 300
+        assert Comment.objects.count() == 600
+        assert not titles_with_drift().exists(), (
+            'Проверьте, что после генерации пересчитываются счётчики'
+        )
+        assert not reviews_with_drift().exists()
+        assert not Comment.objects.filter(
+            pub_date__lt=F('review__pub_date')).exists()
+        # Последовательности id сдвинуты: новая запись не конфликтует.
+        Genre.objects.create(name='Новый', slug='new')
+
+        counts = sorted(Title.objects.values_list('reviews_count', flat=True))
+        assert counts[-1] >= 4 * counts[len(counts) // 2], (
+            'Проверьте, что отзывы сосредоточены на популярных произведениях'
+        )
+        threads = sorted(Review.objects.annotate(
+            total=Count('comments')).values_list('total', flat=True))
+        assert threads[-1] >= 10 * max(threads[len(threads) // 2], 1)
+
+    def test_same_seed_same_data(self):
+        from reviews.models import Category, Genre, Title
+        from users.models import User
+
+        call_command('generate_dataset', *VOLUMES, '--seed', '7')
+        first = snapshot()
+        for model in (User, Category, Genre, Title):
+            model.objects.all().delete()
+        call_command('generate_dataset', *VOLUMES, '--seed', '7')
+        assert snapshot() == first
+        for model in (User, Category, Genre, Title):
+            model.objects.all().delete()
+        call_command('generate_dataset', *VOLUMES, '--seed', '8')
+        assert snapshot() != first
+
+    def test_appends_to_existing_data(self, title):
+        from reviews.models import Title
+
+        call_command('generate_dataset', *VOLUMES)
+        assert Title.objects.count() == 31
+        assert Title.objects.filter(pk=title.pk, name=title.name).exists()
+
+    def test_invalid_volumes(self):
+        from django.core.management.base import CommandError
+
+        with pytest.raises(CommandError):
+            call_command('generate_dataset', '--users', '0')
+
+    def test_copy_matches_bulk_create(self):
+        from django.db import connection
+
+        from reviews.models import Category, Genre, Title
+        from users.models import User
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('COPY доступен только в PostgreSQL')
+        call_command('generate_dataset', *VOLUMES)
+        expected = snapshot()
+        for model in (User, Category, Genre, Title):
+            model.objects.all().delete()
+        call_command('generate_dataset', *VOLUMES, '--copy')
+        assert snapshot() == expected
@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+
+
+def plan(queryset):
+    """
+    План запроса. В PostgreSQL последовательное и bitmap-чтение
+    отключаются: в тестовых таблицах несколько строк, и для них
+    планировщику дешевле прочитать всё и отсортировать.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+    return queryset.explain()
+
+
+def sorts(explained):
+    if connection.vendor == 'postgresql':
+        return 'Sort' in explained
+    return 'TEMP B-TREE' in explained
+
+
+@pytest.fixture
+def review(title, user):
+    from reviews.models import Review
+
+    return Review.objects.create(title=title, author=user, text='Отзыв')
+
+
+def reviews_of_title(review):
+    from reviews.models import Review
+
+    return Review.objects.filter(title=review.title_id).order_by(
+        'pub_date', 'id')[:10]
+
+
+def comments_of_review(review):
+    from reviews.models import Comment
+
+    return Comment.objects.filter(review=review).order_by(
+        'pub_date', 'id')[:10]
+
+
+def reviews_of_author(review):
+    from reviews.models import Review
+
+    return Review.objects.filter(author=review.author_id).order_by(
+        'pub_date')[:10]
+
+
+def comments_of_author(review):
+    from reviews.models import Comment
+
+    return Comment.objects.filter(author=review.author_id).order_by(
+        'pub_date')[:10]
+
+
+def titles_of_category(review):
+    from api.filters import TitleFilter
+    from reviews.models import Title
+
+    return TitleFilter(
+        {'category': review.title.category.slug},
+        queryset=Title.objects.select_related('category'),
+    ).qs.order_by('name', 'id')[:10]
+
+
+@pytest.mark.django_db
+class TestAccessPatternIndexes:
+
+    @pytest.mark.parametrize('query, index', [
+        (reviews_of_title, 'review_title_pub_date_idx'),
+        (comments_of_review, 'comment_review_pub_date_idx'),
+        (reviews_of_author, 'review_author_pub_date_idx'),
+        (comments_of_author, 'comment_author_pub_date_idx'),
+        (titles_of_category, 'title_category_name_idx'),
+    ])
+    def test_list_uses_index_without_sort(self, review, query, index):
+        explained = plan(query(review))
+        assert index in explained, (
+            f'Проверьте, что список читается по индексу {index}:\n'
+            f'{explained}'
+        )
+        assert not sorts(explained), (
+            f'Проверьте, что порядок списка даёт индекс:\n{explained}'
+        )
+
+    def test_genre_filter_uses_genre_index(self, title, genres):
+        from api.filters import TitleFilter
+        from reviews.models import Title
+
+        explained = plan(TitleFilter(
+            {'genre': genres[0].slug}, queryset=Title.objects.all()).qs)
+        assert 'genre_title_idx' in explained, explained
@@ -0,0 +1,127 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from prometheus_client.parser import text_string_to_metric_families
+
+API_YAMDB = Path(__file__).resolve().parent.parent / 'api_yamdb'
+
+
+METRICS_TOKEN = 'secret'
+
+
+@pytest.fixture(autouse=True)
+def metrics_token(settings):
+    settings.METRICS_TOKEN = METRICS_TOKEN
+
+
+def scrape(client):
+    response = client.get(
+        '/metrics', HTTP_AUTHORIZATION=f'Bearer {METRICS_TOKEN}')
+    assert response.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(
+            response.content.decode())
+        for sample in family.samples
+    }
+
+
+def requests_total(samples, view, method='GET', status='200'):
+    labels = (('method', method), ('status', status), ('view', view))
+    return samples.get(('yamdb_http_requests_total', labels), 0)
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_requests_counted_by_route(self, client, user_client, title):
+        before = scrape(client)
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{title.id}/')
+        user_client.post(f'/api/v1/titles/{title.id}/reviews/', {})
+        after = scrape(client)
+        assert requests_total(after, 'titles-list') == (
+            requests_total(before, 'titles-list') + 1
+        ), 'Проверьте, что запросы считаются по имени маршрута'
+        assert requests_total(after, 'titles-detail') == (
+            requests_total(before, 'titles-detail') + 1
+        )
+        assert requests_total(after, 'reviews-list', 'POST', '400') == (
+            requests_total(before, 'reviews-list', 'POST', '400') + 1
+        ), 'Проверьте, что ошибки считаются по статусу'
+
+    def test_latency_and_queries(self, client, title):
+        before = scrape(client)
+        client.get('/api/v1/titles/')
+        after = scrape(client)
+        view = (('view', 'titles-list'),)
+        count = ('yamdb_http_request_duration_seconds_count', view)
+        queries = ('yamdb_db_queries_total', view)
+        assert after[count] == before.get(count, 0) + 1
+        assert after[queries] > before.get(queries, 0), (
+            'Проверьте, что считаются запросы к базе'
+        )
+        assert ('yamdb_http_request_duration_seconds_bucket',
+                (('le', '0.1'), ('view', 'titles-list'))) in after
+
+    def test_response_cache_counters(self, client, title):
+        from api.cache import get_stats
+
+        samples = scrape(client)
+        for result, value in get_stats().items():
+            assert samples[('yamdb_response_cache_requests_total',
+                            (('result', result),))] == value
+
+    def test_connection_pools(self, client):
+        from api_yamdb.db import base
+        from tests.test_db_pool import FakeConnection
+
+        pool = base.get_pool('metrics_test', {'max_size': 3})
+        try:
+            pool.putconn(pool.getconn(FakeConnection))
+            pool.getconn(FakeConnection)
+            samples = scrape(client)
+        finally:
+            del base._pools['metrics_test']
+        labels = (('database', 'metrics_test'), ('pid', str(os.getpid())))
+        assert samples[('yamdb_db_pool_max_size', labels)] == 3
+        assert samples[('yamdb_db_pool_in_use', labels)] == 1, (
+            'Проверьте, что /metrics отдаёт состояние пулов соединений'
+        )
+        assert samples[('yamdb_db_pool_checkouts_total', labels)] == 2
+
+    def test_token_required(self, client, settings):
+        assert client.get('/metrics').status_code == 403
+        assert client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+        assert client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer токен').status_code == 403, (
+            'Проверьте, что заголовок не из ASCII не приводит к ошибке 500'
+        )
+        scrape(client)
+        settings.METRICS_TOKEN = ''
+        assert client.get('/metrics').status_code == 403, (
+            'Проверьте, что без METRICS_TOKEN /metrics закрыт'
+        )
+        assert client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer ').status_code == 403
+
+    def test_processes_aggregated(self, client, tmp_path, monkeypatch):
+        record = (
+            'from api import metrics; '
+            "metrics.observe('titles-list', 'GET', 200, 0.01, 3, 0.001)"
+        )
+        env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+        for _ in range(2):
+            subprocess.run([sys.executable, '-c', record], cwd=API_YAMDB,
+                           env=env, check=True)
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+        samples = scrape(client)
+        assert requests_total(samples, 'titles-list') == 2, (
+            'Проверьте, что /metrics суммирует метрики всех процессов'
+        )
+        assert samples[('yamdb_db_queries_total',
+                        (('view', 'titles-list'),))] == 6
@@ -0,0 +1,127 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+
+class FailingBackend(EmailBackend):
+    """Почтовый сервер, который отклоняет письма на адреса fail@..."""
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.to[0].startswith('fail@'):
+                raise OSError('Connection refused')
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_enqueues_email(self, client):
+        from users.models import OutgoingEmail
+
+        response = client.post('/api/v1/auth/signup/', {'username': 'new', 'email': 'new@yamdb.fake'})
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, 'Проверьте, что signup не отправляет письмо во время запроса'
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'new@yamdb.fake'
+        assert email.status == OutgoingEmail.PENDING
+
+        call_command('send_emails', '--once')
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == ['new@yamdb.fake']
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.SENT
+        assert email.attempts == 1
+        assert email.body == '', (
+            'Проверьте, что текст отправленного письма с кодом стирается'
+        )
+
+    def test_batches_and_workers(self, capsys):
+        from users.models import OutgoingEmail
+        from users.outbox import enqueue_email
+
+        for index in range(7):
+            enqueue_email('Тема', 'Текст', f'user{index}@yamdb.fake')
+        call_command('send_emails', '--once', '--batch-size', '3', '--workers', '2')
+        assert sorted(message.to[0] for message in mail.outbox) == sorted(
+            f'user{index}@yamdb.fake' for index in range(7)
+        )
+        assert not OutgoingEmail.objects.exclude(status=OutgoingEmail.SENT).exists()
+        output = capsys.readouterr().out
+        assert output.count('Batch:') == 3
+        assert 'Total: 7 sent' in output
+
+    def test_retry_and_dead_letter(self, settings):
+        from django.utils import timezone
+        from users.models import OutgoingEmail
+        from users.outbox import enqueue_email
+
+        settings.EMAIL_BACKEND = f'{__name__}.FailingBackend'
+        failing = enqueue_email('Тема', 'Текст', 'fail@yamdb.fake')
+        enqueue_email('Тема', 'Текст', 'ok@yamdb.fake')
+
+        call_command('send_emails', '--once', '--max-attempts', '2')
+        assert [message.to[0] for message in mail.outbox] == ['ok@yamdb.fake']
+        failing.refresh_from_db()
+        assert failing.status == OutgoingEmail.PENDING
+        assert failing.attempts == 1
+        assert 'Connection refused' in failing.last_error
+        assert failing.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная попытка откладывается'
+        )
+
+        OutgoingEmail.objects.filter(pk=failing.pk).update(next_attempt_at=timezone.now())
+        call_command('send_emails', '--once', '--max-attempts', '2')
+        failing.refresh_from_db()
+        assert failing.status == OutgoingEmail.DEAD, (
+            'Проверьте, что письмо перестаёт отправляться после max-attempts попыток'
+        )
+        assert failing.body == ''
+        assert len(mail.outbox) == 1
+
+    def test_claimed_emails_are_leased(self):
+        from datetime import timedelta
+
+        from users.outbox import claim_batch, enqueue_email
+
+        enqueue_email('Тема', 'Текст', 'user@yamdb.fake')
+        assert len(claim_batch(10, timedelta(minutes=5))) == 1
+        assert claim_batch(10, timedelta(minutes=5)) == [], (
+            'Проверьте, что забранное письмо не выдаётся повторно до истечения аренды'
+        )
+
+    def test_old_emails_pruned(self, settings):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        from users.models import OutgoingEmail
+        from users.outbox import enqueue_email
+
+        for recipient in ('old@yamdb.fake', 'new@yamdb.fake'):
+            enqueue_email('Тема', 'Текст', recipient)
+        pending = enqueue_email('Тема', 'Текст', 'later@yamdb.fake')
+        call_command('send_emails', '--once')
+        old = timezone.now() - timedelta(
+            days=settings.EMAIL_OUTBOX_RETENTION_DAYS + 1)
+        OutgoingEmail.objects.filter(recipient='old@yamdb.fake').update(
+            next_attempt_at=old)
+        OutgoingEmail.objects.filter(pk=pending.pk).update(
+            status=OutgoingEmail.PENDING, next_attempt_at=old + timedelta(
+                days=settings.EMAIL_OUTBOX_RETENTION_DAYS + 2))
+        call_command('send_emails', '--once')
+        assert sorted(OutgoingEmail.objects.values_list(
+            'recipient', flat=True)) == ['later@yamdb.fake', 'new@yamdb.fake'], (
+            'Проверьте, что старые отправленные письма удаляются'
+        )
+
+    def test_admin_hides_body(self, client, django_user_model):
+        from users.outbox import enqueue_email
+
+        client.force_login(django_user_model.objects.create_superuser(
+            'root', 'root@yamdb.fake', 'password'))
+        email = enqueue_email('Тема', 'Код: 123456', 'user@yamdb.fake')
+        response = client.get(
+            f'/admin/users/outgoingemail/{email.pk}/change/')
+        assert response.status_code == 200
+        assert '123456' not in response.content.decode()
@@ -0,0 +1,96 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def walk(self, client, url):
+        ids, pages = [], 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data, 'В режиме курсора не должно быть COUNT(*)'
+            ids += [item['id'] for item in data['results']]
+            url, pages = data['next'], pages + 1
+        return ids, pages
+
+    def test_reviews_cursor_walk(self, client, django_user_model, title):
+        from django.utils import timezone
+        from reviews.models import Review
+
+        users = [
+            django_user_model.objects.create(username=f'user{index}', email=f'user{index}@yamdb.fake')
+            for index in range(7)
+        ]
+        reviews = [Review.objects.create(title=title, author=user, text='Текст') for user in users]
+        # Одинаковая дата публикации у части отзывов: порядок держится на id.
+        Review.objects.filter(pk__in=[review.pk for review in reviews[2:5]]).update(
+            pub_date=timezone.now()
+        )
+        expected = list(Review.objects.order_by('pub_date', 'id').values_list('id', flat=True))
+
+        ids, pages = self.walk(client, f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&page_size=3')
+        assert ids == expected, 'Проверьте, что курсор обходит все отзывы по порядку без повторов'
+        assert pages == 3
+
+    def test_comments_cursor_walk(self, client, user, title):
+        from reviews.models import Comment, Review
+
+        review = Review.objects.create(title=title, author=user, text='Текст')
+        comments = [Comment.objects.create(review=review, author=user, text=str(index)) for index in range(4)]
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/?pagination=cursor&page_size=2'
+        ids, pages = self.walk(client, url)
+        assert ids == [comment.id for comment in comments]
+        assert pages == 2
+
+    def test_titles_cursor_walk(self, client, category):
+        from reviews.models import Title
+
+        for name in ('Б', 'А', 'В', 'А', 'Б'):
+            Title.objects.create(name=name, year=2000, category=category)
+        expected = list(Title.objects.order_by('name', 'id').values_list('id', flat=True))
+        ids, _ = self.walk(client, '/api/v1/titles/?pagination=cursor&page_size=2')
+        assert ids == expected
+
+    def test_page_size_is_limited(self, client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {index}', year=2000) for index in range(110)
+        )
+        response = client.get('/api/v1/titles/?page_size=1000')
+        assert len(response.json()['results']) == 100, (
+            'Проверьте, что размер страницы ограничен MAX_PAGE_SIZE'
+        )
+        response = client.get('/api/v1/titles/?pagination=cursor&page_size=1000')
+        assert len(response.json()['results']) == 100
+
+    def test_invalid_cursor(self, client, title):
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/?cursor=broken')
+        assert response.status_code == 404
+
+    def test_cursor_follows_requested_ordering(self, client, django_user_model, title):
+        from reviews.models import Review
+
+        for index, score in enumerate((5, 9, 5, 1, 9)):
+            author = django_user_model.objects.create(
+                username=f'user{index}', email=f'user{index}@yamdb.fake')
+            Review.objects.create(title=title, author=author, text='Текст', score=score)
+        expected = list(Review.objects.order_by('-score', 'id').values_list('id', flat=True))
+        ids, _ = self.walk(
+            client, f'/api/v1/titles/{title.id}/reviews/?pagination=cursor&page_size=2&ordering=-score')
+        assert ids == expected, 'Проверьте, что курсор соблюдает ?ordering='
+
+    @pytest.mark.parametrize('query', (
+        'ordering=rating', 'ordering=category', 'search=побег',
+        'updated_since=2020-01-01T00:00:00Z&ordering=year',
+    ))
+    def test_cursor_rejects_unsupported_ordering(self, client, title, query):
+        response = client.get(f'/api/v1/titles/?pagination=cursor&{query}')
+        assert response.status_code == 400, (
+            'Проверьте, что сортировку, которую курсор не может соблюсти, '
+            'он не подменяет молча'
+        )
+        assert 'ordering' in response.json()
+        assert client.get(f'/api/v1/titles/?{query}').status_code == 200
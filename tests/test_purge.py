@@ -0,0 +1,214 @@
+import io
+import re
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.fixtures.fixture_user import get_client
+
+
+@pytest.fixture
+def discussed_title(title, django_user_model):
+    """Произведение с 6 отзывами по 2 комментария."""
+    from reviews.counters import recount_reviews, recount_titles
+    from reviews.models import Comment, Review, Title
+
+    for index in range(6):
+        author = django_user_model.objects.create(
+            username=f'critic{index}', email=f'critic{index}@yamdb.fake')
+        review = Review.objects.create(title=title, author=author,
+                                       text='Отзыв', score=index + 1)
+        for _ in range(2):
+            Comment.objects.create(review=review, author=author,
+                                   text='Комментарий')
+    recount_titles(Title.objects.filter(pk=title.pk))
+    recount_reviews(Review.objects.filter(title=title))
+    return title
+
+
+@pytest.fixture
+def small_batches(settings):
+    settings.PURGE_BATCH_SIZE = 2
+    settings.PURGE_INLINE_ROWS = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPurge:
+
+    def test_title_hidden_then_purged(self, admin_client, client,
+                                      discussed_title, small_batches):
+        from reviews.models import Comment, GenreTitle, Review, Title
+
+        url = f'/api/v1/titles/{discussed_title.id}/'
+        assert admin_client.delete(url).status_code == 204
+        assert client.get(url).status_code == 404
+        assert client.get(f'{url}reviews/').status_code == 404, (
+            'Проверьте, что отзывы скрытого произведения не отдаются'
+        )
+        assert Title.objects.filter(pk=discussed_title.pk).exists(), (
+            'Проверьте, что в запросе удаляется не больше '
+            'PURGE_INLINE_ROWS строк'
+        )
+
+        call_command('purge_hidden', '--once')
+        assert not Title.objects.filter(pk=discussed_title.pk).exists()
+        assert not Review.objects.exists()
+        assert not Comment.objects.exists()
+        assert not GenreTitle.objects.exists()
+
+    def test_small_title_deleted_in_request(self, admin_client, title):
+        from reviews.models import Title
+
+        assert admin_client.delete(
+            f'/api/v1/titles/{title.id}/').status_code == 204
+        assert not Title.objects.filter(pk=title.pk).exists()
+
+    def test_user_purge_updates_counters(self, admin_client, user,
+                                         discussed_title, another_title,
+                                         small_batches):
+        from reviews.models import Comment, Review, Title
+
+        user_client = get_client(user)
+        for title in (discussed_title, another_title):
+            user_client.post(f'/api/v1/titles/{title.id}/reviews/',
+                             {'text': 'Отзыв', 'score': 10})
+        review = Review.objects.filter(title=discussed_title).exclude(
+            author=user).first()
+        user_client.post(f'/api/v1/titles/{discussed_title.id}/reviews/'
+                         f'{review.id}/comments/', {'text': 'Ответ'})
+
+        assert admin_client.delete(
+            f'/api/v1/users/{user.username}/').status_code == 204
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что токены скрытого пользователя сразу отклоняются'
+        )
+        assert admin_client.get(
+            f'/api/v1/users/{user.username}/').status_code == 404
+        url = f'/api/v1/titles/{discussed_title.id}/reviews/'
+        reviews = admin_client.get(url).json()['results']
+        assert user.username not in {row['author'] for row in reviews}, (
+            'Проверьте, что отзывы скрытого пользователя не отдаются'
+        )
+        comments = admin_client.get(
+            f'{url}{review.id}/comments/').json()['results']
+        assert user.username not in {row['author'] for row in comments}, (
+            'Проверьте, что комментарии скрытого пользователя не отдаются'
+        )
+
+        call_command('purge_hidden', '--once')
+        assert not Review.objects.filter(author=user).exists()
+        assert not Comment.objects.filter(author=user).exists()
+        assert Comment.objects.filter(review=review).count() == 2
+        review.refresh_from_db()
+        assert review.comments_count == 2, (
+            'Проверьте, что при чистке комментариев уменьшается '
+            'comments_count отзыва'
+        )
+        discussed_title = Title.objects.get(pk=discussed_title.pk)
+        assert (discussed_title.score_sum, discussed_title.reviews_count,
+                discussed_title.rating) == (21, 6, 3.5)
+        another_title = Title.objects.get(pk=another_title.pk)
+        assert (another_title.reviews_count, another_title.rating) == (0, None)
+
+    def test_user_hidden_before_purge(self, admin_client, client, user,
+                                      discussed_title, settings):
+        from reviews.counters import titles_with_drift
+
+        settings.PURGE_INLINE_ROWS = 0
+        get_client(user).post(
+            f'/api/v1/titles/{discussed_title.id}/reviews/',
+            {'text': 'Отзыв', 'score': 10})
+        url = f'/api/v1/titles/{discussed_title.id}/'
+        assert client.get(url).json()['rating'] == 4
+        reviews = client.get(f'{url}reviews/').json()
+        assert reviews['count'] == 7
+        client.get('/api/v1/titles/')
+
+        assert admin_client.delete(
+            f'/api/v1/users/{user.username}/').status_code == 204
+        titles = client.get('/api/v1/titles/').json()['results']
+        title = next(row for row in titles if row['id'] == discussed_title.id)
+        assert title['rating'] == 3, (
+            'Проверьте, что отзывы скрытого пользователя сразу вычитаются '
+            'из рейтинга произведения'
+        )
+        reviews = client.get(f'{url}reviews/').json()
+        assert reviews['count'] == 6, (
+            'Проверьте, что скрытие пользователя сбрасывает кэш списков'
+        )
+        assert not titles_with_drift().exists(), (
+            'Проверьте, что пересчёт не возвращает отзывы скрытого '
+            'пользователя в счётчики'
+        )
+        call_command('purge_hidden', '--once')
+        discussed_title.refresh_from_db()
+        assert (discussed_title.score_sum, discussed_title.reviews_count,
+                discussed_title.rating) == (21, 6, 3.5)
+
+    def test_batches_are_bounded(self, discussed_title):
+        from api.purge import hide, purge
+
+        hide(discussed_title)
+        with CaptureQueriesContext(connection) as queries:
+            assert purge(discussed_title, batch_size=4)
+        deletes = [query['sql'] for query in queries
+                   if query['sql'].startswith('DELETE')]
+        assert len(deletes) >= 12 / 4 + 6 / 4, (
+            'Проверьте, что зависимые записи удаляются пачками'
+        )
+        for sql in deletes:
+            ids = re.search(r'IN \(([^)]*)\)', sql)
+            assert ids and len(ids.group(1).split(',')) <= 4, (
+                f'Проверьте, что DELETE затрагивает одну пачку: {sql}'
+            )
+
+    def test_batch_invalidates_once(self, discussed_title, monkeypatch):
+        from django.db import transaction
+
+        from api.purge import delete_comments, delete_reviews, hide
+        from reviews.models import Comment, Review, Tombstone
+
+        hide(discussed_title)
+        callbacks = []
+        monkeypatch.setattr(transaction, 'on_commit',
+                            lambda func, using=None: callbacks.append(func))
+        with transaction.atomic():
+            assert delete_comments(Comment.objects.all(), 4) == 4
+            assert delete_reviews(Review.objects.all(), 4) == 4
+        assert len(callbacks) == 2, (
+            'Проверьте, что пачка сдвигает версии кэша один раз, '
+            'а не по строке из обработчика сигнала'
+        )
+        assert Tombstone.objects.filter(resource='comments').count() == 4
+        assert Tombstone.objects.filter(resource='reviews').count() == 4
+
+    def test_object_deleted_before_purge_is_skipped(self, title,
+                                                    another_title,
+                                                    monkeypatch):
+        from api.management.commands import purge_hidden
+        from api.purge import hide, purge
+        from reviews.models import Title
+
+        hide(title)
+        hide(another_title)
+
+        def purge_and_delete_next(instance, **kwargs):
+            # Следующее скрытое произведение удаляет параллельный запрос.
+            Title.objects.filter(hidden=True).exclude(
+                pk=instance.pk).delete()
+            return purge(instance, **kwargs)
+
+        monkeypatch.setattr(purge_hidden, 'purge', purge_and_delete_next)
+        call_command('purge_hidden', '--once', stdout=io.StringIO(),
+                     stderr=io.StringIO())
+        assert not Title.objects.exists()
+
+    def test_warns_about_local_cache(self):
+        stderr = io.StringIO()
+        call_command('purge_hidden', '--once', stderr=stderr)
+        assert 'shared cache' in stderr.getvalue(), (
+            'Проверьте, что purge_hidden предупреждает о кэше в памяти '
+            'процесса: воркеры API не увидят сброса версий'
+        )
@@ -0,0 +1,141 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleQueries:
+    url = '/api/v1/titles/'
+
+    def create_titles(self, category, genres, count):
+        from reviews.models import Title
+
+        for index in range(count):
+            title = Title.objects.create(name=f'Произведение {index}', year=2000, category=category)
+            title.genre.set(genres)
+
+    @pytest.mark.parametrize('titles_count', (1, 5))
+    def test_list(self, client, category, genres, titles_count, django_assert_num_queries):
+        self.create_titles(category, genres, titles_count)
+        # COUNT(*) для пагинации, произведения с категориями, жанры.
+        with django_assert_num_queries(3):
+            response = client.get(self.url)
+        assert len(response.json()['results']) == titles_count
+
+    @pytest.mark.parametrize('genres_count', (1, 3))
+    def test_retrieve(self, client, category, genres, genres_count, django_assert_num_queries):
+        self.create_titles(category, genres[:genres_count], 1)
+        title_id = client.get(self.url).json()['results'][0]['id']
+        # Произведение с категорией, жанры.
+        with django_assert_num_queries(2):
+            response = client.get(f'{self.url}{title_id}/')
+        assert len(response.json()['genre']) == genres_count
+
+    @pytest.mark.parametrize('genres_count', (1, 3))
+    def test_create(self, admin_client, category, genres, genres_count, django_assert_num_queries):
+        data = {
+            'name': 'Новое произведение', 'year': 2000,
+            'category': category.slug, 'genre': [genre.slug for genre in genres[:genres_count]],
+        }
+        # Пользователь, категория, жанры одним IN, INSERT произведения,
+        # один INSERT связей с жанрами и SAVEPOINT/RELEASE транзакции.
+        with django_assert_num_queries(7):
+            response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 201
+        assert [genre['slug'] for genre in response.json()['genre']] == data['genre']
+
+    def test_unknown_genres(self, admin_client, category, genres, django_assert_num_queries):
+        data = {
+            'name': 'Новое произведение', 'year': 2000,
+            'category': category.slug, 'genre': ['missing-1', genres[0].slug, 'missing-2'],
+        }
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 400
+        error = response.json()['genre'][0]
+        assert 'missing-1' in error and 'missing-2' in error, (
+            'Проверьте, что ошибка перечисляет все неизвестные жанры'
+        )
+
+    def test_update_genres(self, admin_client, title, genres, django_assert_num_queries):
+        from reviews.models import GenreTitle
+
+        kept = GenreTitle.objects.get(title=title, genre=genres[1]).pk
+        data = {'genre': [genres[1].slug, genres[1].slug]}
+        # Пользователь, произведение, текущие жанры, новые жанры одним IN,
+        # SAVEPOINT, UPDATE, DELETE лишних связей, RELEASE.
+        with django_assert_num_queries(8):
+            response = admin_client.patch(f'{self.url}{title.id}/', data, format='json')
+        assert response.status_code == 200
+        assert [genre['slug'] for genre in response.json()['genre']] == [genres[1].slug]
+        assert list(GenreTitle.objects.filter(title=title).values_list('pk', flat=True)) == [kept], (
+            'Проверьте, что оставшиеся связи с жанрами не пересоздаются'
+        )
+
+    def test_partial_update(self, admin_client, title, django_assert_num_queries):
+        # Пользователь, произведение с категорией, жанры, UPDATE.
+        with django_assert_num_queries(4):
+            response = admin_client.patch(f'{self.url}{title.id}/', {'year': 2001}, format='json')
+        assert response.status_code == 200
+        assert response.json()['year'] == 2001
+        assert len(response.json()['genre']) == title.genre.count()
+
+
+@pytest.mark.django_db
+class TestNestedQueries:
+
+    @pytest.fixture
+    def review(self, user, title):
+        from reviews.models import Comment, Review
+
+        review = Review.objects.create(title=title, author=user, text='Текст')
+        for index in range(3):
+            Comment.objects.create(review=review, author=user, text=str(index))
+        return review
+
+    def test_reviews_list(self, client, review, django_assert_num_queries):
+        # COUNT(*) для пагинации, отзывы с авторами.
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{review.title_id}/reviews/')
+        assert len(response.json()['results']) == 1
+
+    def test_comments_list(self, client, review, django_assert_num_queries):
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert len(response.json()['results']) == 3
+        with django_assert_num_queries(1):
+            response = client.get(f'{url}?pagination=cursor')
+        assert len(response.json()['results']) == 3
+
+    def test_comment_retrieve(self, client, review, django_assert_num_queries):
+        comment = review.comments.first()
+        url = f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/{comment.id}/'
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        assert response.json()['id'] == comment.id
+
+    def test_empty_list_of_existing_parent(self, client, title, another_title):
+        response = client.get(f'/api/v1/titles/{another_title.id}/reviews/')
+        assert response.status_code == 200
+        assert response.json()['results'] == []
+
+    def test_missing_parent(self, client, user_client, review):
+        title_id = review.title_id
+        assert client.get(f'/api/v1/titles/{title_id + 100}/reviews/').status_code == 404
+        response = user_client.post(f'/api/v1/titles/{title_id + 100}/reviews/', {'text': 'Текст', 'score': 5})
+        assert response.status_code == 404, (
+            'Проверьте, что отзыв к несуществующему произведению возвращает 404'
+        )
+        assert client.get(f'/api/v1/titles/{title_id}/reviews/{review.id + 100}/comments/').status_code == 404
+
+    def test_review_of_another_title(self, client, user_client, review, another_title):
+        url = f'/api/v1/titles/{another_title.id}/reviews/{review.id}/comments/'
+        assert client.get(url).status_code == 404, (
+            'Проверьте, что комментарии доступны только по произведению своего отзыва'
+        )
+        comment = review.comments.first()
+        assert client.get(f'{url}{comment.id}/').status_code == 404
+        assert user_client.post(url, {'text': 'Комментарий'}).status_code == 404
+
+    def test_non_numeric_ids(self, client, review):
+        assert client.get('/api/v1/titles/abc/reviews/').status_code == 404
+        assert client.get(f'/api/v1/titles/{review.title_id}/reviews/abc/comments/').status_code == 404
+        assert client.get('/api/v1/titles/abc/').status_code == 404
@@ -0,0 +1,72 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def reviews_url(self, title):
+        return f'/api/v1/titles/{title.id}/reviews/'
+
+    def test_rating_follows_review_writes(self, user_client, another_user_client, title):
+        response = user_client.post(self.reviews_url(title), {'text': 'Отлично', 'score': 10})
+        assert response.status_code == 201, 'Проверьте, что отзыв создаётся'
+        another_user_client.post(self.reviews_url(title), {'text': 'Неплохо', 'score': 5})
+
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count) == (15, 2), (
+            'Проверьте, что при создании отзыва обновляются счётчики произведения'
+        )
+        assert title.rating == 7.5
+
+        review_id = response.json()['id']
+        user_client.patch(f'{self.reviews_url(title)}{review_id}/', {'score': 1})
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count) == (6, 2), (
+            'Проверьте, что при изменении оценки обновляется сумма оценок'
+        )
+        assert title.rating == 3
+
+        user_client.delete(f'{self.reviews_url(title)}{review_id}/')
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (5, 1, 5)
+
+    def test_rating_is_null_without_reviews(self, user_client, title):
+        response = user_client.post(self.reviews_url(title), {'text': 'Текст', 'score': 4})
+        user_client.delete(f'{self.reviews_url(title)}{response.json()["id"]}/')
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (0, 0, None)
+
+    def test_list_orders_and_filters_by_rating(self, user_client, title, another_title):
+        user_client.post(self.reviews_url(title), {'text': 'Текст', 'score': 3})
+        user_client.post(self.reviews_url(another_title), {'text': 'Текст', 'score': 9})
+
+        response = user_client.get('/api/v1/titles/?ordering=-rating')
+        names = [item['name'] for item in response.json()['results']]
+        assert names == [another_title.name, title.name], (
+            'Проверьте сортировку произведений по рейтингу'
+        )
+        assert response.json()['results'][0]['rating'] == 9
+
+        response = user_client.get('/api/v1/titles/?rating_min=5')
+        assert [item['id'] for item in response.json()['results']] == [another_title.id], (
+            'Проверьте фильтрацию произведений по рейтингу'
+        )
+
+    def test_deleting_author_updates_rating(self, admin_client, user, user_client, title):
+        user_client.post(self.reviews_url(title), {'text': 'Текст', 'score': 3})
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (0, 0, None)
+
+    def test_recount_command(self, user, title):
+        from reviews.models import Review
+
+        Review.objects.create(title=title, author=user, text='Текст', score=8)
+        with pytest.raises(CommandError):
+            call_command('recount_counters', '--check')
+
+        call_command('recount_counters')
+        title.refresh_from_db()
+        assert (title.score_sum, title.reviews_count, title.rating) == (8, 1, 8)
+        call_command('recount_counters', '--check')
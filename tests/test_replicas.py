@@ -0,0 +1,129 @@
+from time import time_ns
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connections
+from rest_framework.test import APIClient, APIRequestFactory
+
+REPLICA = 'replica_test'
+
+
+@pytest.fixture
+def replica(db, tmp_path, settings, user, admin):
+    """Вторая база SQLite в роли реплики со своими категориями."""
+    from django.core.cache import cache
+
+    from api.cache import ALL_RESOURCES, VERSION_KEY
+    from reviews.models import Category
+    from users.models import User
+
+    connections.databases[REPLICA] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    with connections[REPLICA].schema_editor() as editor:
+        editor.create_model(Category)
+        editor.create_model(User)
+    for account in (user, admin):
+        account.save(using=REPLICA, force_insert=True)
+    Category.objects.using(REPLICA).create(name='С реплики', slug='replica')
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(tmp_path / 'cache'),
+    }}
+    settings.DATABASE_REPLICAS = [REPLICA]
+    settings.DATABASE_ROUTERS = ['api_yamdb.db.router.ReplicaRouter']
+    settings.DB_REPLICA_PIN_SECONDS = 5
+    # Категории давно не менялись: чтение не переключается на основную базу.
+    cache.set_many({
+        VERSION_KEY.format(resource): time_ns() - 60 * 10 ** 9
+        for resource in ('categories', ALL_RESOURCES)
+    }, timeout=None)
+    yield REPLICA
+    connections[REPLICA].close()
+    del connections.databases[REPLICA]
+    delattr(connections._connections, REPLICA)
+
+
+def category_slugs(client):
+    response = client.get('/api/v1/categories/')
+    assert response.status_code == 200
+    return [category['slug'] for category in response.json()['results']]
+
+
+def create_category(client, slug):
+    response = client.post('/api/v1/categories/', {'name': slug, 'slug': slug})
+    assert response.status_code == 201
+
+
+class TestReplicaRouting:
+
+    def test_safe_requests_read_from_replica(self, replica, user_client):
+        assert category_slugs(APIClient()) == ['replica']
+        assert category_slugs(user_client) == ['replica']
+
+    def test_writes_go_to_primary(self, replica, admin_client):
+        from reviews.models import Category
+
+        create_category(admin_client, 'primary')
+        assert Category.objects.using('default').filter(slug='primary').exists()
+        assert not Category.objects.using(replica).filter(slug='primary').exists()
+
+    def test_writer_reads_from_primary(self, replica, admin_client, user_client):
+        create_category(admin_client, 'primary')
+        assert category_slugs(admin_client) == ['primary'], (
+            'Проверьте, что после записи пользователь читает из основной базы'
+        )
+        assert category_slugs(user_client) == ['replica']
+
+    def test_pin_expires(self, replica, admin_client, settings):
+        settings.DB_REPLICA_PIN_SECONDS = 0
+        create_category(admin_client, 'primary')
+        assert category_slugs(admin_client) == ['replica']
+
+    def test_recently_changed_resource_reads_from_primary(self, replica, category):
+        from api.cache import bump_versions
+
+        bump_versions('categories')
+        assert category_slugs(APIClient()) == [category.slug]
+
+    def test_async_middleware(self, replica):
+        from django.db import router
+
+        from api.middleware import replica_routing_middleware
+        from reviews.models import Category
+
+        async def get_response(request):
+            return router.db_for_read(Category)
+
+        middleware = replica_routing_middleware(get_response)
+        factory = APIRequestFactory()
+        assert async_to_sync(middleware)(factory.get('/')) == replica
+        assert async_to_sync(middleware)(factory.post('/')) == 'default'
+
+    def test_no_request_reads_from_primary(self, replica):
+        from django.db import router
+
+        from reviews.models import Category
+
+        assert Category.objects.all().db == 'default'
+        assert not router.allow_migrate(replica, 'reviews')
+        assert router.allow_migrate('default', 'reviews')
+
+    def test_disabled_without_replicas(self, settings):
+        from django.core.exceptions import MiddlewareNotUsed
+
+        from api.middleware import replica_routing_middleware
+
+        assert settings.DATABASE_REPLICAS == []
+        with pytest.raises(MiddlewareNotUsed):
+            replica_routing_middleware(lambda request: None)
+
+    def test_requires_shared_cache(self, settings):
+        from django.core.exceptions import ImproperlyConfigured
+
+        from api.middleware import replica_routing_middleware
+
+        settings.DATABASE_REPLICAS = [REPLICA]
+        with pytest.raises(ImproperlyConfigured, match='shared cache'):
+            replica_routing_middleware(lambda request: None)
@@ -0,0 +1,55 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestTitleSearch:
+    url = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self, category, genres):
+        from reviews.models import Title
+
+        in_name = Title.objects.create(
+            name='Побег из Шоушенка', year=1994, category=category,
+            description='Тюремная драма',
+        )
+        in_description = Title.objects.create(
+            name='Зелёная миля', year=1999, category=category,
+            description='Ещё одна история по Кингу, не про Шоушенк',
+        )
+        other = Title.objects.create(name='Крестный отец', year=1972, category=category)
+        in_name.genre.set(genres[:1])
+        in_description.genre.set(genres[1:2])
+        return in_name, in_description, other
+
+    def search(self, client, query, **params):
+        response = client.get(self.url, {'search': query, **params})
+        assert response.status_code == 200
+        return [item['id'] for item in response.json()['results']]
+
+    def test_search_is_ranked(self, client, titles):
+        in_name, in_description, _ = titles
+        assert self.search(client, 'шоушенк') == [in_name.id, in_description.id], (
+            'Проверьте, что совпадение в названии релевантнее совпадения в описании'
+        )
+
+    def test_search_combines_with_filters(self, client, titles, genres):
+        in_name, in_description, _ = titles
+        assert self.search(client, 'шоушенк', year=1999) == [in_description.id]
+        assert self.search(client, 'шоушенк', genre=genres[0].slug) == [in_name.id]
+
+    def test_explicit_ordering_wins(self, client, titles):
+        in_name, in_description, _ = titles
+        assert self.search(client, 'шоушенк', ordering='-year') == [in_description.id, in_name.id]
+
+    def test_index_follows_writes(self, admin_client, titles):
+        _, _, other = titles
+        assert self.search(admin_client, 'гангстерская') == []
+        admin_client.patch(f'{self.url}{other.id}/', {'description': 'Гангстерская сага'}, format='json')
+        assert self.search(admin_client, 'гангстерская') == [other.id]
+        admin_client.delete(f'{self.url}{other.id}/')
+        assert self.search(admin_client, 'гангстерская') == []
+
+    @pytest.mark.parametrize('query', ('"Шоушенк* OR (', 'NEAR(a b', '-:*', '   '))
+    def test_search_syntax_never_fails(self, client, titles, query):
+        self.search(client, query)
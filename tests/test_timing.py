@@ -0,0 +1,98 @@
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+
+def server_timing(response):
+    header = response.get('Server-Timing', '')
+    return {
+        name: (float(duration), description)
+        for name, duration, description in re.findall(
+            r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', header)
+    }
+
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware:
+
+    def test_server_timing_for_admin(self, admin_client, title):
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        metrics = server_timing(response)
+        assert set(metrics) == {'total', 'db', 'auth', 'render', 'app'}, (
+            'Проверьте, что администратор получает заголовок Server-Timing'
+        )
+        assert metrics['db'][1] == f'{len(queries)} queries'
+        assert metrics['total'][0] >= metrics['db'][0]
+
+    def test_no_server_timing_for_users(self, user_client, client, title):
+        assert 'Server-Timing' not in user_client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in client.get('/api/v1/titles/')
+
+    def test_slow_request_logged(self, user_client, title, settings, caplog):
+        settings.PERF_SLOW_REQUEST_MS = 0
+        with caplog.at_level(logging.WARNING, logger='api.middleware'):
+            user_client.get(f'/api/v1/titles/{title.id}/')
+        [record] = caplog.records
+        assert f'GET /api/v1/titles/{title.id}/: 200' in record.getMessage()
+        assert 'SELECT' in record.getMessage(), (
+            'Проверьте, что в лог попадает самый долгий запрос к базе'
+        )
+
+    def test_fast_request_not_logged(self, user_client, title, caplog):
+        with caplog.at_level(logging.WARNING, logger='api.middleware'):
+            user_client.get(f'/api/v1/titles/{title.id}/')
+        assert not caplog.records
+
+
+@pytest.mark.django_db(transaction=True)
+def test_queries_counted_in_thread_pool(title, settings, caplog):
+    from api.async_views import async_read_view
+    from api.middleware import performance_middleware
+    from api.views import TitleViewSet
+
+    settings.PERF_SLOW_REQUEST_MS = 0
+    view = async_read_view(TitleViewSet.as_view({'get': 'list'}))
+    middleware = performance_middleware(view)
+    with caplog.at_level(logging.WARNING, logger='api.middleware'):
+        async_to_sync(middleware)(APIRequestFactory().get('/api/v1/titles/'))
+    [record] = caplog.records
+    assert re.search(r'[1-9]\d* queries', record.getMessage()), (
+        'Проверьте, что запросы из потоков sync_to_async учитываются'
+    )
+
+
+def test_query_timer_keeps_wrapper_stack():
+    from api.timing import install_query_timer, record_query
+
+    def other(execute, sql, params, many, context):
+        return execute(sql, params, many, context)
+
+    saved = list(connection.execute_wrappers)
+    connection.execute_wrappers[:] = []
+    try:
+        # Соединение открылось внутри временной обёртки.
+        with connection.execute_wrapper(other):
+            install_query_timer(None, connection)
+        assert connection.execute_wrappers == [record_query]
+    finally:
+        connection.execute_wrappers[:] = saved
+
+
+@pytest.mark.django_db(transaction=True)
+def test_session_user_not_loaded_in_event_loop(admin):
+    from django.test import AsyncClient
+
+    client = AsyncClient()
+    client.force_login(admin)
+    response = async_to_sync(client.get)('/api/v1/missing/')
+    assert response.status_code == 404, (
+        'Проверьте, что middleware в асинхронной ветке не загружает '
+        'пользователя сессии из базы'
+    )